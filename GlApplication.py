@@ -10,29 +10,60 @@ http://www.willmcgugan.com/blog/tech/2007/6/4/opengl-sample-code-for-pygame/
 @author: pi
 """
 
+import sys
+
+import util.OffscreenContext
+
+# Headless mode renders through an offscreen OpenGl platform, which has to be selected before OpenGL is imported
+if __name__ == '__main__' and '--headless' in sys.argv:
+    util.OffscreenContext.selectPlatform('osmesa' if '--osmesa' in sys.argv else 'egl')
+
 import pygame
 from pygame.locals import *
 
-from OpenGL import GL
-from OpenGL.GL.ARB.vertex_array_object import glBindVertexArray
-from OpenGL import GLUT
+import util.GlBackend
+from util.GlBackend import GL
+if util.GlBackend.backend == 'recording':
+    # Records the GL calls without OpenGl, see util.GlBackend
+    GLUT = None
+else:
+    try:
+        from OpenGL import GLUT
+    except NotImplementedError:
+        # The offscreen platforms do not provide GLUT
+        GLUT = None
 
 from ctypes import c_void_p
 
 from math import radians
-import sys
+import argparse
+import time
 
 import numpy as np
 
 import util.OpenGlUtilities as og_util
+import util.GlState as gl_state
 import util.PyGameUtilities as pg_util
 import util.SceneObject
+import util.AssetLoader
+import util.VertexBuffer
+import util.FrameProfiler
+import util.Overlay
+import util.Uniforms
+import util.ShaderCache
+import util.SceneGraph
+import util.Culling
+import util.Picking
+import util.LevelMesh
 
 from util.vec3 import vec3
 
 # TileSize in model space
 TILESIZE = 0.25
 
+# Distance from the player beyond which the fog of war hides everything, in model space
+FOG_DISTANCE = 4.0
+
 # 4 bytes in a float
 # TODO: Find a better way to deal with this
 SIZE_OF_FLOAT = 4
@@ -40,6 +71,13 @@ SIZE_OF_FLOAT = 4
 # 4 components in a vector: X, Y, Z, W
 VERTEX_COMPONENTS = 4
 
+# 4 bytes in an element index
+SIZE_OF_INDEX = 4
+
+# Vertex inputs of the instance records: offset and scale, color
+INSTANCE_OFFSET_SCALE_INPUT = 3
+INSTANCE_COLOR_INPUT = 4
+
 # Camera modes
 CAM_FREE = 0
 CAM_LOOKAT = 1
@@ -47,6 +85,15 @@ CAM_MAP = 2
 CAM_ACTOR = 3
 CAM_FIRSTPERSON = 4
 
+# Phases of a frame measured by the frame profiler, mark() takes the index
+PROFILER_PHASES = ("events", "clear", "camera", "assets", "dynamicObjects", "drawVBAs", "drawHUD", "flip")
+PHASE_EVENTS, PHASE_CLEAR, PHASE_CAMERA, PHASE_ASSETS, PHASE_DYNAMIC_OBJECTS, PHASE_DRAW_VBAS, PHASE_DRAW_HUD, \
+    PHASE_FLIP = range(len(PROFILER_PHASES))
+
+# Fields of the FrameData uniform block in the vertex shader, in declaration order
+FRAME_DATA_FIELDS = (("perspectiveMatrix", "mat4"), ("cameraMatrix", "mat4"), ("lightingMatrix", "mat3"),
+                     ("lightIntensity", "vec4"), ("ambientIntensity", "vec4"), ("lightPos", "vec3"))
+
 
 
 class GlApplication(object):
@@ -65,7 +112,14 @@ class GlApplication(object):
         This will also load the vertex buffer for the level mesh
         """
         self._level = level
-        # Load the mesh for the level in the vertex buffer
+        # The level mesh starts empty, the chunks around the player are meshed in the background and streamed
+        # in by renderFrame, so a large map opens right away and takes a fixed amount of memory
+        if self.levelMesh is not None:
+            self.staticObjects.remove(self.levelMesh)
+        self.levelMesh = util.LevelMesh.StreamingLevelSceneObject.fromTiles(level.map.tiles, TILESIZE,
+                                                                           self.normalizeColor)
+        self.staticObjects.append(self.levelMesh)
+        # Load the (empty) mesh for the level in the vertex buffer
         self.loadVAOStaticObjects()
 
     @property
@@ -177,11 +231,20 @@ class GlApplication(object):
     def fogActive(self):
         return False
 
-    def __init__(self):
+    def __init__(self, headless=False, profile=False, profileOutput=None):
         """
         Constructor to create a new GlApplication object.
+        :param headless: Render offscreen without a window, see runHeadless()
+        :param profile: Measure the time of every phase of the frames, see util.FrameProfiler
+        :param profileOutput: JSON or CSV file the profile is written to on exit
         """
         # Initialize class properties
+        self.headless = headless
+        # The profiler is None when profiling is off, the main loop then only checks for None
+        self.profiler = util.FrameProfiler.FrameProfiler(PROFILER_PHASES) if profile else None
+        self.profileOutput = profileOutput
+        self.offscreenContext = None
+        self.framebuffer = None
         self._level = None
         self._displaySize = (800, 600)
         self._openGlProgram = None
@@ -192,21 +255,43 @@ class GlApplication(object):
         self._dragging = False
         self._rotating = False
         self.FPS = 0
+        # Shader variants without and with fog of war: fogActive -> (program, uniform cache)
+        self.shaderCache = None
+        self.shaderVariants = {}
         # Initialize uniform class variables
-        self.perspectiveMatrixUnif = None
-        self.cameraMatrixUnif = None
-        self.lightPosUnif = None
-        self.lightIntensityUnif = None
-        self.ambientIntensityUnif = None
-        self.lightingMatrixUnif = None
+        # Camera, projection and lights are in the frameData uniform block, the other uniforms go through
+        # the uniform cache of the variant which skips values that did not change
+        self.frameData = None
+        self.uniforms = None
+        self.uniformFrames = 0
         self.playerPositionUnif = None
         self.fogDistanceUnif = None
-        self.fogActiveUnif = None
+        # World matrices of the scene objects, calculated by the scene graph and kept in the modelData block
+        self.sceneGraph = util.SceneGraph.SceneGraph()
+        self.modelData = None
+        # Largest model matrix block, the objects in the slots past it get their matrix per draw
+        self.maxModelMatrices = util.SceneGraph.MAX_NODES
+        # Draws can start at the instance records of an object (OpenGl 4.2), see setInstancePointers
+        self.baseInstance = False
+        # Objects outside the view frustum are not drawn
+        self.culler = util.Culling.FrustumCuller()
+        # Mouse picking, the selection is the PickResult of the last click
+        self.picker = util.Picking.Picker()
+        self.selection = None
+        # The HUD is a retained 2D overlay, created with the OpenGl context
+        self.overlay = None
+        # Initialize vertex buffers, the buffers are created when they are first loaded and reused afterwards
+        self.levelBuffers = None
+        self.actorsBuffers = None
+        # Mesh of the tiles of the level, see util.LevelMesh
+        self.levelMesh = None
+
+        # Start the asset loader before there is an OpenGl context, its worker processes should not inherit it
+        self.assetLoader = util.AssetLoader.AssetLoader()
 
         axisObj = util.SceneObject.AxisSceneObject(scale=10)
         #cubeObj = util.SceneObject.OBJ("./util/cube.obj")
         cubeObj = util.SceneObject.Cube()
-        lucyObj = util.SceneObject.OBJ("./util/lucy.obj")
         plantObj = util.SceneObject.PlantSceneObject(1.5)
 
         self.dynamicObjects = []
@@ -216,6 +301,9 @@ class GlApplication(object):
         self.staticObjects = []
         self.staticObjects.append(axisObj)
 
+        # Large models are loaded in the background, nothing is shown for them until they are ready
+        self.assetLoader.loadOBJ("./util/lucy.obj", onReady=self.addStaticObject)
+
     def resizeWindow(self, displaySize):
         """
         Function to be called whenever window is resized.
@@ -223,9 +311,20 @@ class GlApplication(object):
         """
         self._displaySize = displaySize
         width, height = displaySize
-        pygame.display.set_mode(self.displaySize, RESIZABLE | HWSURFACE | DOUBLEBUF | OPENGL)
-        # Uncomment to run in fullscreen
-        # pygame.display.set_mode(self.displaySize,FULLSCREEN|HWSURFACE|DOUBLEBUF|OPENGL)
+        if self.headless:
+            # Render into a framebuffer object of the offscreen context instead of a window
+            if self.offscreenContext is None:
+                self.offscreenContext = util.OffscreenContext.OffscreenContext()
+            if self.framebuffer is None:
+                self.framebuffer = util.OffscreenContext.Framebuffer(width, height)
+            else:
+                self.framebuffer.resize(width, height)
+        else:
+            pygame.display.set_mode(self.displaySize, RESIZABLE | HWSURFACE | DOUBLEBUF | OPENGL)
+            # Uncomment to run in fullscreen
+            # pygame.display.set_mode(self.displaySize,FULLSCREEN|HWSURFACE|DOUBLEBUF|OPENGL)
+            # Some platforms create a new context when the window is resized
+            gl_state.invalidate()
         GL.glViewport(0, 0, width, height)
         self.calculatePerspectiveMatrix()
 
@@ -251,56 +350,42 @@ class GlApplication(object):
         """
         Initializes OpenGl settings and shaders
         """
-        GLUT.glutInit([])
-
-        # Compile Shaders into program object
-        from OpenGL.GL.shaders import compileShader, compileProgram
-
-        strVertexShader = open("shaders/VertexShader.glsl").read()
-        strFragmentShader = open("shaders/FragmentShader.glsl").read()
-        self.openGlProgram = compileProgram(
-            compileShader(strVertexShader, GL.GL_VERTEX_SHADER),
-            compileShader(strFragmentShader, GL.GL_FRAGMENT_SHADER)
-        )
-
-        # Create uniform variables for the compiled shaders
-        GL.glUseProgram(self.openGlProgram)
-        # Camera and perspective projection
-        self.perspectiveMatrixUnif = GL.glGetUniformLocation(self.openGlProgram, "perspectiveMatrix")
-        self.cameraMatrixUnif = GL.glGetUniformLocation(self.openGlProgram, "cameraMatrix")
-        # Lighting
-        self.lightPosUnif = GL.glGetUniformLocation(self.openGlProgram, "lightPos")
-        self.lightIntensityUnif = GL.glGetUniformLocation(self.openGlProgram, "lightIntensity")
-        self.ambientIntensityUnif = GL.glGetUniformLocation(self.openGlProgram, "ambientIntensity")
-        self.lightingMatrixUnif = GL.glGetUniformLocation(self.openGlProgram, "lightingMatrix")
-        # Fog of War
-        self.playerPositionUnif = GL.glGetUniformLocation(self.openGlProgram, "playerPosition")
-        self.fogDistanceUnif = GL.glGetUniformLocation(self.openGlProgram, "fogDistance")
-        GL.glUniform1f(self.fogDistanceUnif, 4.0)
-        self.fogActiveUnif = GL.glGetUniformLocation(self.openGlProgram, "fogActive")
+        # GLUT needs a display, it is not available in headless mode
+        if GLUT is not None and not self.headless:
+            GLUT.glutInit([])
+
+        # Camera, perspective projection and lighting, one uniform buffer bound once for all shader variants
+        self.frameData = util.Uniforms.UniformBlock(FRAME_DATA_FIELDS)
+        # Model matrices of the scene objects, uploaded per moved object
+        # The largest block the driver supports, OpenGl guarantees 16 kB (the initial capacity of the scene graph)
+        self.maxModelMatrices = max(int(GL.glGetIntegerv(GL.GL_MAX_UNIFORM_BLOCK_SIZE)) // util.Uniforms.MATRIX_SIZE,
+                                    util.SceneGraph.MAX_NODES)
+        # With base instance draws the instance inputs keep pointing at the start of the instance buffer
+        version = (GL.glGetIntegerv(GL.GL_MAJOR_VERSION), GL.glGetIntegerv(GL.GL_MINOR_VERSION))
+        self.baseInstance = version >= (4, 2)
+        self.shaderCache = util.ShaderCache.ShaderCache()
+        self.loadShaderVariants(min(self.sceneGraph.capacity, self.maxModelMatrices))
 
         # Generate Vertex Array Object for the level
-        self.VAO_level = GL.GLuint(0)
-        GL.ARB.vertex_array_object.glGenVertexArrays(1, self.VAO_level)
+        self.VAO_level = GL.glGenVertexArrays(1)
 
         # Generate Vertex Array Object for the actors
-        self.VAO_actors = GL.GLuint(0)
-        GL.ARB.vertex_array_object.glGenVertexArrays(1, self.VAO_actors)
+        self.VAO_actors = GL.glGenVertexArrays(1)
+
+        # HUD overlay, fonts are loaded and rasterized once
+        self.overlay = util.Overlay.Overlay()
+        self.initHUD()
 
         # Recalculate the perspective matrix
         self.calculatePerspectiveMatrix()
 
-        GL.glUseProgram(0)
-
         # Enable depth testing
         GL.glEnable(GL.GL_DEPTH_TEST)
         GL.glDepthMask(GL.GL_TRUE)
         GL.glDepthFunc(GL.GL_LEQUAL)
         GL.glDepthRange(0.0, 1.0)
 
-        # Enable alpha testing
-        GL.glEnable(GL.GL_ALPHA_TEST)
-        GL.glAlphaFunc(GL.GL_GREATER, 0.5)
+        # Alpha testing: fragments with an alpha of 0.5 or less are discarded in the fragment shader
 
         # Enable face culling
         GL.glEnable(GL.GL_CULL_FACE)
@@ -308,6 +393,41 @@ class GlApplication(object):
         GL.glFrontFace(GL.GL_CCW)  # front of the face is based on counter clockwise order of vertices
         #GL.glFrontFace(GL.GL_CW)  # front of the face is based on clockwise order of vertices
 
+    def loadShaderVariants(self, capacity):
+        """
+        Creates the model matrix block and the shader variants for a number of model matrices
+        Called again with a larger capacity when the scene graph outgrows the block
+        :param capacity: Length of the model matrix array in the block and the shaders (MAX_MODEL_MATRICES)
+        """
+        if self.modelData is not None:
+            self.modelData.delete()
+        self.modelData = util.Uniforms.MatrixBlock(capacity)
+        # The variants for the previous capacity are replaced
+        for program, uniforms in self.shaderVariants.values():
+            GL.glDeleteProgram(program)
+            gl_state.programDeleted(program)
+        self.shaderVariants.clear()
+
+        # Shader variants without and with fog of war, the linked programs are loaded from the shader cache
+        # when possible instead of compiling them
+        for fog in (False, True):
+            defines = {"MAX_MODEL_MATRICES": capacity}
+            if fog:
+                defines["FOG"] = 1
+            program = self.shaderCache.program("shaders/VertexShader.glsl", "shaders/FragmentShader.glsl", defines)
+            self.frameData.attach(program, "FrameData")
+            self.modelData.attach(program, "ModelData")
+            self.shaderVariants[fog] = (program, util.Uniforms.UniformCache(program))
+
+        # Fog of War, only in the fog variant
+        program, uniforms = self.shaderVariants[True]
+        gl_state.useProgram(program)
+        self.playerPositionUnif = uniforms.location("playerPosition")
+        self.fogDistanceUnif = uniforms.location("fogDistance")
+        uniforms.set1f(self.fogDistanceUnif, FOG_DISTANCE)
+        self.openGlProgram, self.uniforms = self.shaderVariants[self.fogActive]
+
+
     def showMainMenu(self):
         # Init pygame
         pygame.init()
@@ -328,14 +448,20 @@ class GlApplication(object):
         rotation_speed = radians(90.0)
         movement_speed = 25.0
 
+        profiler = self.profiler
+
         while True:
+            if profiler is not None: profiler.beginFrame()
+
             # handle pygame (GUI) events
             events = pygame.event.get()
             for event in events:
                 self.handlePyGameEvent(event)
+            if profiler is not None: profiler.mark(PHASE_EVENTS)
 
             # Clear the screen, and z-buffer
             GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT);
+            if profiler is not None: profiler.mark(PHASE_CLEAR)
 
             time_passed = clock.tick()
             time_passed_seconds = time_passed / 1000.
@@ -408,18 +534,111 @@ class GlApplication(object):
                 self.firstPersonCamera()
             elif self.cameraMode == CAM_ACTOR:
                 self.centerCameraOnActor(self.game.player)
+            if profiler is not None: profiler.mark(PHASE_CAMERA)
 
-            # Refresh the actors VAO (some actors might have moved)
-            self.loadVAODynamicObjects()
-
-            # Render the 3D view (Vertex Array Buffers
-            self.drawVBAs()
-
-            # Render the HUD (health bar, XP bar, etc...)
-            self.drawHUD()
+            self.renderFrame()
 
             # Show the screen
             pygame.display.flip()
+            if profiler is not None:
+                profiler.mark(PHASE_FLIP)
+                profiler.endFrame()
+
+    def renderFrame(self):
+        """
+        Renders one frame of the scene, used by both the main loop and headless mode
+        """
+        profiler = self.profiler
+
+        # Request the level chunks around the player, they are meshed by the asset loader workers
+        if self.levelMesh is not None:
+            self.levelMesh.stream(self.getPlayerPosition(), self.assetLoader)
+
+        # Add background loaded assets and level chunks to the scene, within the per frame upload budget
+        self.assetLoader.processReady()
+        if self.levelMesh is not None:
+            # Uploads the slots of the chunks that arrived, nothing when none did
+            self.loadVAOStaticObjects()
+        if profiler is not None: profiler.mark(PHASE_ASSETS)
+
+        # Refresh the actors VAO (some actors might have moved)
+        self.loadVAODynamicObjects()
+        if profiler is not None: profiler.mark(PHASE_DYNAMIC_OBJECTS)
+
+        # Render the 3D view (Vertex Array Buffers
+        self.drawVBAs()
+        if profiler is not None: profiler.mark(PHASE_DRAW_VBAS)
+
+        # Render the HUD (health bar, XP bar, etc...)
+        self.drawHUD()
+        if profiler is not None: profiler.mark(PHASE_DRAW_HUD)
+
+        # Redundant GL state changes per frame, only counted in debug mode
+        gl_state.endFrame()
+
+    def writeProfile(self):
+        """
+        Writes the frame profile to profileOutput and prints the percentiles, when profiling is on.
+        Prints the redundant GL state changes per frame when the GL state debug mode is on.
+        """
+        if gl_state.debug:
+            print gl_state.report()
+        if self.profiler is None:
+            return
+        print self.profiler.report()
+        print self.culler.report()
+        print "Uniform GL calls per frame: %.1f made, %.1f saved" % \
+            util.Uniforms.callsPerFrame([self.frameData, self.modelData] +
+                                        [uniforms for program, uniforms in self.shaderVariants.values()],
+                                        self.uniformFrames)
+        if self.profileOutput is not None:
+            self.profiler.dump(self.profileOutput)
+
+    def runHeadless(self, frames, displaySize=(800, 600), imagePattern=None, waitForAssets=True):
+        """
+        Renders a fixed number of frames offscreen, without a window or a GPU (e.g. Mesa llvmpipe).
+        The camera does not move, so the frames can be used for performance and regression measurements.
+        The platform has to be selected with util.OffscreenContext.selectPlatform before OpenGL is imported.
+        :param frames: Number of frames to render
+        :param displaySize: (width, height) of the rendered images
+        :param imagePattern: Optional file name pattern with a frame number placeholder, e.g. "frame%04d.png",
+                             every frame is read back and saved
+        :param waitForAssets: Wait for the background loaded assets before the first frame
+        :return: List with the render time in seconds of every frame (including the read back)
+        """
+        assert self.headless, "Create the GlApplication with headless=True"
+        # Fonts for the HUD text, no display is needed for them
+        pygame.font.init()
+        self.resizeWindow(displaySize)
+        pg_util.initFonts()
+        self.initOpenGl()
+
+        self.lookAtCamera()
+        self.loadVAOStaticObjects()
+        while waitForAssets and self.assetLoader.pendingCount > 0:
+            self.assetLoader.processReady()
+            time.sleep(0.01)
+
+        profiler = self.profiler
+        frameTimes = []
+        for frame in range(frames):
+            start = time.time()
+            if profiler is not None: profiler.beginFrame()
+            GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+            if profiler is not None: profiler.mark(PHASE_CLEAR)
+            self.renderFrame()
+            if imagePattern is not None:
+                util.OffscreenContext.saveImage(imagePattern % frame, self.framebuffer.readPixels())
+            else:
+                # Wait for the frame to finish, otherwise only the command submission is timed
+                GL.glFinish()
+            # In headless mode the read back takes the place of showing the screen
+            if profiler is not None:
+                profiler.mark(PHASE_FLIP)
+                profiler.endFrame()
+            frameTimes.append(time.time() - start)
+            self.FPS = 1 / max(frameTimes[-1], 1e-6)
+        return frameTimes
 
     def lookAtCamera(self):
         # OLD VERSION
@@ -495,170 +714,50 @@ class GlApplication(object):
         # return (playerX, playerY, playerZ, 1.0)
         return (0.0, 0.0, 0.0, 1.0)
 
+    def addStaticObject(self, obj):
+        """
+        Adds an object to the static objects and reloads the level VAO.
+        This is called on the render thread when a background loaded asset is ready.
+        """
+        self.staticObjects.append(obj)
+        self.loadVAOStaticObjects()
+        # The picking hierarchy of a large model is built in the background as well
+        self.picker.buildLater(obj, self.assetLoader)
+
     def loadVAOStaticObjects(self):
         """
         Initializes the context of the level VAO
         The level VAO contains the basic level mesh
-        To optimize performance this will only be called when a new level is loaded
-        """
-        # Create vertex buffers on the GPU, remember the address IDs
-        self.VBO_level_id = GL.glGenBuffers(1)
-        self.VBO_level_elements_id = GL.glGenBuffers(1)
-
-        # Construct the data arrays that will be loaded into the buffer
-        vertexData = []
-        colorData = []
-        normalsData = []
-        elementData = []
-
-        elemOffset = 0
-        for obj in self.staticObjects:
-            vertexData.extend(obj.vertices)
-            colorData.extend(obj.colors)
-            normalsData.extend(obj.normals)
-            for elem in obj.triangleIndices:
-                 elementData.append(elem + elemOffset)
-            elemOffset += obj.vertexCount
-
-        # # Store the vertex coordinates
-        # for tileRow in self.game.currentLevel.map.tiles:
-        #     for tile in tileRow:
-        #         if tile.blocked:
-        #             height = TILESIZE
-        #         else:
-        #             height = 0.0
-        #         # 4 components per vertex: x, y, z, w
-        #         # 4 vertices: bottom of the rectangular tile area
-        #         vertexData.extend((tile.x * TILESIZE, tile.y * TILESIZE, 0.0, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE, tile.y * TILESIZE + TILESIZE, 0.0, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE + TILESIZE, tile.y * TILESIZE + TILESIZE, 0.0, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE + TILESIZE, tile.y * TILESIZE, 0.0, 1.0))
-        #         # 4 vertices: top of the rectangular tile area
-        #         vertexData.extend((tile.x * TILESIZE, tile.y * TILESIZE, height, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE, tile.y * TILESIZE + TILESIZE, height, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE + TILESIZE, tile.y * TILESIZE + TILESIZE, height, 1.0))
-        #         vertexData.extend((tile.x * TILESIZE + TILESIZE, tile.y * TILESIZE, height, 1.0))
-        #
-        # # Store the vertex colors
-        # self.VBO_level_color_offset = len(vertexData)
-        # for tileRow in self.game.currentLevel.map.tiles:
-        #     for tile in tileRow:
-        #         # 4 components per color: R, G, B, A, one color for every vertex
-        #         color = self.normalizeColor(tile.color)
-        #         # 4 vertices for the bottom
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         # 4 vertices for the top
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #         vertexData.extend((color[0], color[1], color[2], 1.0))
-        #
-        # # Store the vertex normals
-        # self.VBO_level_normals_offset = len(vertexData)
-        # for tileRow in self.game.currentLevel.map.tiles:
-        #     for tile in tileRow:
-        #         # 3 components per normal: x, y, z
-        #         # 4 vertex normals for the bottom
-        #         vertexData.extend((-1.0, -1.0, -0.01))
-        #         vertexData.extend((1.0, -1.0, -0.01))
-        #         vertexData.extend((1.0, 1.0, -0.01))
-        #         vertexData.extend((-1.0, 1.0, -0.01))
-        #         # 4 vertex normals for the top
-        #         vertexData.extend((-1.0, -1.0, -1.0))
-        #         vertexData.extend((1.0, -1.0, -1.0))
-        #         vertexData.extend((1.0, 1.0, -1.0))
-        #         vertexData.extend((-1.0, 1.0, -1.0))
-        #
-        # self.VBO_level_length = len(vertexData)
-        #
-        # # Create the element array
-        # offset = 0
-        # for tileRow in self.game.currentLevel.map.tiles:
-        #     for tile in tileRow:
-        #         # 12 Triangles for a complete block
-        #         elementData.extend((0 + offset, 2 + offset, 1 + offset))
-        #         elementData.extend((0 + offset, 3 + offset, 2 + offset))
-        #         elementData.extend((0 + offset, 4 + offset, 7 + offset))
-        #         elementData.extend((0 + offset, 7 + offset, 3 + offset))
-        #         elementData.extend((3 + offset, 7 + offset, 6 + offset))
-        #         elementData.extend((3 + offset, 6 + offset, 2 + offset))
-        #         elementData.extend((2 + offset, 6 + offset, 5 + offset))
-        #         elementData.extend((2 + offset, 5 + offset, 1 + offset))
-        #         elementData.extend((1 + offset, 5 + offset, 4 + offset))
-        #         elementData.extend((1 + offset, 4 + offset, 0 + offset))
-        #         elementData.extend((4 + offset, 5 + offset, 6 + offset))
-        #         elementData.extend((4 + offset, 6 + offset, 7 + offset))
-        #         offset += 8
-        #
-        # self.VBO_level_elements_length = len(elementData)
+        To optimize performance this will only be called when a new level is loaded,
+        when a background loaded asset is added or when level chunks were streamed in
+        """
+        # The tiles of the level map are meshed per chunk by util.LevelMesh (see the level property), the level
+        # mesh is one of the static objects
 
+        # Set up the VAO context, the bindings are left in place afterwards (see util.GlState)
+        gl_state.bindVertexArray(self.VAO_level)
 
-        # Remember where each data set begins
-        self.VBO_level_color_offset = len(vertexData)
-        vertexData.extend(colorData)
-        self.VBO_level_normals_offset = len(vertexData)
-        vertexData.extend(normalsData)
-        self.VBO_level_length = len(vertexData)
-        self.VBO_level_elements_length = len(elementData)
+        # Create vertex buffers on the GPU once, they are reused when the level changes
+        if self.levelBuffers is None:
+            self.levelBuffers = util.VertexBuffer.SceneBuffers(GL.GL_STATIC_DRAW)
+            self.setVertexAttributePointers(self.levelBuffers)
 
-        # Set up the VAO context
-        GL.glUseProgram(self.openGlProgram)
-        glBindVertexArray(self.VAO_level)
+        # Load the vertex, color, normal and element data into the buffers, only the changes are uploaded
+        self.levelBuffers.update(self.staticObjects)
 
-        # Load the constructed vertex and color data array into the created array buffer
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.VBO_level_id)
-        array_type = (GL.GLfloat * len(vertexData))
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, len(vertexData) * SIZE_OF_FLOAT, array_type(*vertexData), GL.GL_STATIC_DRAW)
-        # Enable Vertex inputs and define pointer
-        GL.glEnableVertexAttribArray(0)
-        GL.glVertexAttribPointer(0, VERTEX_COMPONENTS, GL.GL_FLOAT, False, 0, None)
-        # Enable Color inputs and define pointer
-        GL.glEnableVertexAttribArray(1)
-        colorDataStart = self.VBO_level_color_offset * SIZE_OF_FLOAT
-        GL.glVertexAttribPointer(1, VERTEX_COMPONENTS, GL.GL_FLOAT, False, 0, c_void_p(colorDataStart))
-        # Enable Normals inputs and define pointer
-        GL.glEnableVertexAttribArray(2)
-        normalsDataStart = self.VBO_level_normals_offset * SIZE_OF_FLOAT
-        GL.glVertexAttribPointer(2, 3, GL.GL_FLOAT, False, 0, c_void_p(normalsDataStart))
-
-        # Load the constructed element data array into the created element array buffer
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.VBO_level_elements_id)
-        array_type = (GL.GLint * len(elementData))
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, len(elementData) * SIZE_OF_FLOAT, array_type(*elementData),
-                        GL.GL_STATIC_DRAW)
-
-        # Done
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
-        GL.glUseProgram(0)
+    def tileChanged(self, tile):
+        """
+        Updates the level mesh after a tile of the level map changed (e.g. a wall was destroyed)
+        Only the chunks that show the tile are meshed again and uploaded
+        """
+        self.levelMesh.setTile(tile.x, tile.y, tile.blocked, self.normalizeColor(tile.color))
+        self.loadVAOStaticObjects()
 
     def loadVAODynamicObjects(self):
         """
         Initializes the context of the actors VAO
         This should be called whenever there is a change in actor positions or visibility
         """
-        # Create the vertex buffer on the GPU and remember the address ID
-        self.VBO_actors_id = GL.glGenBuffers(1)
-        self.VBO_actors_elements_id = GL.glGenBuffers(1)
-
-        # Construct the data arrays that will be loaded into the buffer
-        vertexData = []
-        colorData = []
-        normalsData = []
-        elementData = []
-
-        elemOffset = 0
-        for obj in self.dynamicObjects:
-            vertexData.extend(obj.vertices)
-            colorData.extend(obj.colors)
-            normalsData.extend(obj.normals)
-            for elem in obj.triangleIndices:
-                 elementData.append(elem + elemOffset)
-            elemOffset += obj.vertexCount
-
         # for part in self.construct.parts:
         #     vertexData.extend(part.vertexData)
         #     colorData.extend(part.colorData)
@@ -724,195 +823,249 @@ class GlApplication(object):
         #         elementData.extend((1 + elemOffset, 4 + elemOffset, 0 + elemOffset))
         #         elemOffset += 5
 
-        # Remember where each data set begins
-        self.VBO_actors_color_offset = len(vertexData)
-        vertexData.extend(colorData)
-        self.VBO_actors_normals_offset = len(vertexData)
-        vertexData.extend(normalsData)
-        self.VBO_actors_length = len(vertexData)
-        self.VBO_actors_elements_length = len(elementData)
-
         # Set up the VAO context
-        GL.glUseProgram(self.openGlProgram)
-        glBindVertexArray(self.VAO_actors)
+        gl_state.bindVertexArray(self.VAO_actors)
+
+        # Create vertex buffers on the GPU once, they are reused every frame
+        if self.actorsBuffers is None:
+            self.actorsBuffers = util.VertexBuffer.SceneBuffers(GL.GL_DYNAMIC_DRAW)
+            self.setVertexAttributePointers(self.actorsBuffers)
 
-        # Load the constructed vertex data array into the created array buffer
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.VBO_actors_id)
-        array_type = (GL.GLfloat * len(vertexData))
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, len(vertexData) * SIZE_OF_FLOAT, array_type(*vertexData), GL.GL_STATIC_DRAW)
+        # Load the data into the buffers, only the changes are uploaded and nothing when no dynamic object changed
+        self.actorsBuffers.update(self.dynamicObjects)
+
+    def setVertexAttributePointers(self, sceneBuffers):
+        """
+        Defines the vertex inputs of the bound VAO, pointing into the attribute buffers of sceneBuffers
+        Every attribute has its own buffer so this is only needed once, the buffers keep their IDs when they grow
+        """
         # Enable Vertex inputs and define pointer
+        sceneBuffers.vertexBuffer.bind()
         GL.glEnableVertexAttribArray(0)
         GL.glVertexAttribPointer(0, VERTEX_COMPONENTS, GL.GL_FLOAT, False, 0, None)
         # Enable Color inputs and define pointer
+        sceneBuffers.colorBuffer.bind()
         GL.glEnableVertexAttribArray(1)
-        colorDataStart = self.VBO_actors_color_offset * SIZE_OF_FLOAT
-        GL.glVertexAttribPointer(1, VERTEX_COMPONENTS, GL.GL_FLOAT, False, 0, c_void_p(colorDataStart))
+        GL.glVertexAttribPointer(1, VERTEX_COMPONENTS, GL.GL_FLOAT, False, 0, None)
         # Enable Normals inputs and define pointer
+        sceneBuffers.normalBuffer.bind()
         GL.glEnableVertexAttribArray(2)
-        normalsDataStart = self.VBO_actors_normals_offset * SIZE_OF_FLOAT
-        GL.glVertexAttribPointer(2, 3, GL.GL_FLOAT, False, 0, c_void_p(normalsDataStart))
-
-        # Load the constructed element data array into the created element array buffer
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.VBO_actors_elements_id)
-        array_type = (GL.GLint * len(elementData))
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, len(elementData) * SIZE_OF_FLOAT, array_type(*elementData),
-                        GL.GL_STATIC_DRAW)
-
-        # Done
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
-        GL.glUseProgram(0)
+        GL.glVertexAttribPointer(2, 3, GL.GL_FLOAT, False, 0, None)
+        # Enable the instance inputs, they advance once per instance instead of once per vertex
+        # They point at the first instance record, the draw of an object starts at its records (setInstancePointers)
+        for location in (INSTANCE_OFFSET_SCALE_INPUT, INSTANCE_COLOR_INPUT):
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribDivisor(location, 1)
+        self.pointInstanceInputs(sceneBuffers, 0)
 
     def drawVBAs(self):
         DEBUG_GLSL = False
         if DEBUG_GLSL: print '\n\nDEBUG MODE: Simulating GLSL calculation:\n'
 
-        GL.glUseProgram(self.openGlProgram)
+        # Model matrices, only the matrices of moved objects are uploaded
+        # First, a scene graph that outgrew the model matrix block loads new shader variants
+        self.updateModelMatrices()
 
-        # Bind Level VAO context
-        glBindVertexArray(self.VAO_level)
-        # Load uniforms
-        GL.glUniformMatrix4fv(self.perspectiveMatrixUnif, 1, GL.GL_FALSE, np.reshape(self.perspectiveMatrix, (16)))
+        # Branch free shader variant for the fog of war setting
+        self.openGlProgram, self.uniforms = self.shaderVariants[self.fogActive]
+        gl_state.useProgram(self.openGlProgram)
+
+        # Load uniforms, once for both VAOs
+        # Per frame data, uploaded in one call when something changed
+        frameData = self.frameData
+        frameData.set("perspectiveMatrix", self.perspectiveMatrix)
         if DEBUG_GLSL: print "perspectiveMatrix"
         if DEBUG_GLSL: print self.perspectiveMatrix
 
         #camMatrix = np.linalg.inv(self.cameraMatrix)
-        GL.glUniformMatrix4fv(self.cameraMatrixUnif, 1, GL.GL_FALSE, np.reshape(self.cameraMatrix, (16)))
+        frameData.set("cameraMatrix", self.cameraMatrix)
         if DEBUG_GLSL: print "camMatrix"
         if DEBUG_GLSL: print self.cameraMatrix
 
         lightMatrix = self.cameraMatrix[:3, :3]  # Extracts 3*3 matrix out of 4*4
         if DEBUG_GLSL: print "LightMatrix"
         if DEBUG_GLSL: print lightMatrix
-        GL.glUniformMatrix3fv(self.lightingMatrixUnif, 1, GL.GL_FALSE, np.reshape(lightMatrix, (9)))
+        frameData.set("lightingMatrix", lightMatrix)
 
-        if DEBUG_GLSL: print "Light position: " + self.lightPosition
-        GL.glUniform3f(self.lightPosUnif, self.lightPosition[0], self.lightPosition[1], self.lightPosition[2])
+        if DEBUG_GLSL: print "Light position: " + str(self.lightPosition)
+        frameData.set("lightPos", self.lightPosition)
         if DEBUG_GLSL: print "Light intensity: (0.8, 0.8, 0.8, 1.0)"
-        GL.glUniform4f(self.lightIntensityUnif, 0.8, 0.8, 0.8, 1.0)
+        frameData.set("lightIntensity", (0.8, 0.8, 0.8, 1.0))
         if DEBUG_GLSL: print "Ambient intensity: (0.2, 0.2, 0.2, 1.0)"
-        GL.glUniform4f(self.ambientIntensityUnif, 0.2, 0.2, 0.2, 1.0)
+        frameData.set("ambientIntensity", (0.2, 0.2, 0.2, 1.0))
+        frameData.upload()
 
-        GL.glUniform4f(self.playerPositionUnif, *self.getPlayerPosition())
-        GL.glUniform1i(self.fogActiveUnif, 1 if self.fogActive else 0)
+        # Fog of war, skipped when unchanged
+        if self.fogActive:
+            self.uniforms.set4f(self.playerPositionUnif, *self.getPlayerPosition())
+        self.uniformFrames += 1
 
-        # Bind element array
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.VBO_level_elements_id)
-        # Draw elements
-        GL.glDrawElements(GL.GL_TRIANGLES, self.VBO_level_elements_length, GL.GL_UNSIGNED_INT, None)
-        glBindVertexArray(0)
-
-        # Bind Actors VAO context
-        glBindVertexArray(self.VAO_actors)
-        # Load uniforms
-        GL.glUniformMatrix4fv(self.perspectiveMatrixUnif, 1, GL.GL_FALSE, np.reshape(self.perspectiveMatrix, (16)))
-
-        #camMatrix = np.linalg.inv(self.cameraMatrix)
-        GL.glUniformMatrix4fv(self.cameraMatrixUnif, 1, GL.GL_FALSE, np.reshape(self.cameraMatrix, (16)))
-
-        lightMatrix = self.cameraMatrix[:3, :3]  # Extracts 3*3 matrix out of 4*4
-        GL.glUniformMatrix3fv(self.lightingMatrixUnif, 1, GL.GL_FALSE, np.reshape(lightMatrix, (9)))
+        # Frustum (and fog of war) culling of the objects of both VAOs
+        levelVisible, actorsVisible, chunkRanges = self.cullObjects()
 
-        GL.glUniform3f(self.lightPosUnif, self.lightPosition[0], self.lightPosition[1], self.lightPosition[2])
-        GL.glUniform4f(self.lightIntensityUnif, 0.8, 0.8, 0.8, 1.0)
-        GL.glUniform4f(self.ambientIntensityUnif, 0.2, 0.2, 0.2, 1.0)
-        GL.glUniform4f(self.playerPositionUnif, *self.getPlayerPosition())
+        # Bind Level VAO context
+        gl_state.bindVertexArray(self.VAO_level)
+        # Bind element array, a no-op when the VAO still has it bound
+        self.levelBuffers.elementBuffer.bind()
+        # Draw elements
+        self.drawObjects(self.levelBuffers, levelVisible, chunkRanges)
 
+        # Bind Actors VAO context, the uniforms are still set
+        gl_state.bindVertexArray(self.VAO_actors)
         # Bind element array
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.VBO_actors_elements_id)
+        self.actorsBuffers.elementBuffer.bind()
         # Draw elements
-        GL.glDrawElements(GL.GL_TRIANGLES, self.VBO_actors_elements_length, GL.GL_UNSIGNED_INT, None)
-        glBindVertexArray(0)
+        self.drawObjects(self.actorsBuffers, actorsVisible)
 
-        GL.glUseProgram(0)
+    def updateModelMatrices(self):
+        """
+        Recalculates the world matrices of the scene objects and uploads the ones that changed
+        When the scene graph outgrew the model matrix block, the block and the shader variants are created again
+        with room for all objects, up to the largest block the driver supports (see drawObjects for the rest)
+        """
+        changed = self.sceneGraph.update(self.staticObjects + self.dynamicObjects)
+        capacity = min(self.sceneGraph.capacity, self.maxModelMatrices)
+        if capacity != self.modelData.capacity:
+            self.loadShaderVariants(capacity)
+            changed = [(0, self.sceneGraph.nodeCount)]
+        # The matrices past the end of the block are set per draw
+        changed = [(start, min(end, capacity)) for start, end in changed if start < capacity]
+        self.modelData.upload(self.sceneGraph.worldMatrices, changed)
+
+    def cullObjects(self):
+        """
+        Tests the objects of the level and actors VAOs against the view frustum, in one batched pass
+        With the fog of war on, the objects and level chunks beyond the fog distance are skipped as well,
+        the shader would only draw them black
+        :return: Visibility of the draw ranges of the level VAO and of the actors VAO, and the element ranges
+                 of the level mesh chunks to draw (None to draw the whole level mesh)
+        """
+        levelRanges = self.levelBuffers.drawRanges()
+        actorsRanges = self.actorsBuffers.drawRanges()
+        objects = [entry[0] for entry in levelRanges] + [entry[0] for entry in actorsRanges]
+        slots = [self.sceneGraph.slot(obj) for obj in objects]
+        fog = (self.getPlayerPosition(), FOG_DISTANCE) if self.fogActive else None
+        visible = self.culler.cull(objects, self.sceneGraph.worldMatrices[slots],
+                                   self.cameraMatrix.dot(self.perspectiveMatrix), fog)
+        chunkRanges = None
+        if fog is not None and self.levelMesh in objects[:len(levelRanges)]:
+            chunkRanges = {self.levelMesh: self.culler.cullChunks(
+                self.levelMesh, self.sceneGraph.worldMatrices[self.sceneGraph.slot(self.levelMesh)], fog)}
+        return visible[:len(levelRanges)], visible[len(levelRanges):], chunkRanges
+
+    def drawObjects(self, sceneBuffers, visible, subRanges=None):
+        """
+        Draws the visible objects in sceneBuffers one by one, each with its own model matrix
+        The geometry of an object is drawn once for every instance record in one instanced draw call
+        The VAO of sceneBuffers and the program have to be in use
+        :param visible: Visibility of every draw range of sceneBuffers (see cullObjects)
+        :param subRanges: Optional dictionary object -> list of (first element, element count) within the object,
+                          to draw only those parts of it (e.g. the level chunks within the fog distance)
+        """
+        modelIndexUnif = self.uniforms.location("modelIndex")
+        overflowModelMatrixUnif = self.uniforms.location("overflowModelMatrix")
+        for drawRange, isVisible in zip(sceneBuffers.drawRanges(), visible):
+            obj, elementStart, elementCount, instanceStart, instanceCount = drawRange
+            if elementCount == 0 or not isVisible:
+                continue
+            ranges = subRanges.get(obj) if subRanges is not None else None
+            if ranges is None:
+                ranges = [(0, elementCount)]
+            elif len(ranges) == 0:
+                continue
+            slot = self.sceneGraph.slot(obj)
+            self.uniforms.set1i(modelIndexUnif, slot)
+            if slot >= self.modelData.capacity:
+                # More objects than the largest model matrix block holds
+                self.uniforms.setMatrix4(overflowModelMatrixUnif, self.sceneGraph.worldMatrices[slot])
+            if len(ranges) > 1 and instanceCount == 1:
+                # All parts in one draw call, it has no base instance
+                self.setInstancePointers(sceneBuffers, instanceStart, False)
+                counts = np.array([count for first, count in ranges], dtype=np.int32)
+                offsets = np.array([(elementStart + first) * SIZE_OF_INDEX for first, count in ranges],
+                                   dtype=np.uintp)
+                GL.glMultiDrawElements(GL.GL_TRIANGLES, counts, GL.GL_UNSIGNED_INT, offsets, len(ranges))
+                continue
+            baseInstance = self.setInstancePointers(sceneBuffers, instanceStart, self.baseInstance)
+            for first, count in ranges:
+                if baseInstance == 0:
+                    GL.glDrawElementsInstanced(GL.GL_TRIANGLES, count, GL.GL_UNSIGNED_INT,
+                                               c_void_p((elementStart + first) * SIZE_OF_INDEX), instanceCount)
+                else:
+                    GL.glDrawElementsInstancedBaseInstance(GL.GL_TRIANGLES, count, GL.GL_UNSIGNED_INT,
+                                                           c_void_p((elementStart + first) * SIZE_OF_INDEX),
+                                                           instanceCount, baseInstance)
+
+    def setInstancePointers(self, sceneBuffers, instanceStart, baseInstance):
+        """
+        Makes the instance inputs of the bound VAO reach the instance records of one object
+        With a base instance the inputs keep pointing where they are, the object is drawn from its records with the
+        returned base instance. They are only pointed at the first record again when they point past the object,
+        after a draw without base instance. Otherwise the inputs are pointed at the records of the object,
+        skipped when they already point there.
+        :param baseInstance: The object is drawn with a base instance (OpenGl 4.2)
+        :return: Base instance to draw the object with, 0 without
+        """
+        offset = instanceStart * util.VertexBuffer.INSTANCE_SIZE
+        if baseInstance and sceneBuffers.instanceOffset <= offset:
+            return (offset - sceneBuffers.instanceOffset) // util.VertexBuffer.INSTANCE_SIZE
+        if baseInstance:
+            offset = 0
+        if sceneBuffers.instanceOffset != offset:
+            self.pointInstanceInputs(sceneBuffers, offset)
+        return instanceStart - offset // util.VertexBuffer.INSTANCE_SIZE
+
+    def pointInstanceInputs(self, sceneBuffers, offset):
+        """
+        Points the instance inputs of the bound VAO at a byte offset in the instance buffer of sceneBuffers
+        The buffer keeps its ID when it grows, the inputs stay valid when sceneBuffers.update changes the layout
+        """
+        sceneBuffers.instanceBuffer.bind()
+        GL.glVertexAttribPointer(INSTANCE_OFFSET_SCALE_INPUT, 4, GL.GL_FLOAT, False,
+                                 util.VertexBuffer.INSTANCE_SIZE, c_void_p(offset))
+        GL.glVertexAttribPointer(INSTANCE_COLOR_INPUT, 4, GL.GL_FLOAT, False,
+                                 util.VertexBuffer.INSTANCE_SIZE, c_void_p(offset + 4 * SIZE_OF_FLOAT))
+        sceneBuffers.instanceOffset = offset
 
 
     def normalizeColor(self, color):
         return (float(color[0]) / 250, float(color[1]) / 250, float(color[2]) / 250)
 
-    def setDrawColor(self, color):
-        GL.glColor3f(*self.normalizeColor(color))
-
-    def drawText(self, position, textString, textSize):
-        font = pygame.font.Font(None, textSize)
-        textSurface = font.render(textString, True, (255, 255, 255, 255))  # , (0,0,0,255))
-        textData = pygame.image.tostring(textSurface, "RGBA", True)
-        GL.glRasterPos3d(*position)
-        GL.glDrawPixels(textSurface.get_width(), textSurface.get_height(), GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, textData)
-
-    def drawHUD(self):
+    def initHUD(self):
         """
-        For the HUD we use an Orthographic projection and some older style opengl code
-        This is not using Vertex Buffers.
+        Creates the elements of the HUD overlay, drawHUD only updates their values
         """
-        # Switch to Orthographic projection
-        GL.glOrtho(0.0, self.displayWidth, self.displayHeight, 0.0, -1.0, 10.0)
-
-        GL.glClear(GL.GL_DEPTH_BUFFER_BIT)
-
+        overlay = self.overlay
         # Level name
-        GL.glLoadIdentity()
-        self.drawText((-0.98, 0.9, 0), "Wuuut!", 24)
-
+        self.hudLevelName = overlay.addText((-0.98, 0.9), "Wuuut!", 24)
         # Player name
-        GL.glLoadIdentity()
-        self.drawText((-0.98, -0.85, 0), "Player" + " (Lvl ?)", 18)
+        self.hudPlayerName = overlay.addText((-0.98, -0.85), "Player" + " (Lvl ?)", 18)
+        # Health Bar
+        self.hudHealthBar = overlay.addBar((-0.98, -0.94), (0.46, 0.08),
+                                           pg_util.COLOR_BAR_HEALTH, pg_util.COLOR_BAR_HEALTH_BG)
+        # Xp Bar
+        self.hudXpBar = overlay.addBar((-0.98, -0.99), (0.46, 0.04),
+                                       pg_util.COLOR_BAR_XP, pg_util.COLOR_BAR_XP_BG)
+        # FPS
+        self.hudFPS = overlay.addText((-0.98, -1.0), "0", 12)
 
+    def drawHUD(self):
+        """
+        The HUD is a retained 2D overlay (see initHUD), only the values that changed are updated.
+        The whole overlay is drawn with one draw call.
+        """
         # Health Bar
-        GL.glLoadIdentity()
-        GL.glTranslatef(-0.98, -0.94, 0)
         current = 80 #self.game.player.currentHitPoints
         maximum = 100 #self.game.player.maxHitPoints
-        barWidth = 0.46
-        barHeight = 0.08
-        GL.glBegin(GL.GL_QUADS);
-        self.setDrawColor(pg_util.COLOR_BAR_HEALTH_BG)
-        # Draw vertices (counter clockwise for face culling!)
-        GL.glVertex2f(barWidth, 0.0)
-        GL.glVertex2f(barWidth, barHeight)
-        GL.glVertex2f(0.0, barHeight)
-        GL.glVertex2f(0.0, 0.0)
-        GL.glEnd()
-        if current > 0:
-            filWidth = current * barWidth / maximum
-            GL.glBegin(GL.GL_QUADS);
-            self.setDrawColor(pg_util.COLOR_BAR_HEALTH)
-            # Draw vertices (counter clockwise for face culling!)
-            GL.glVertex2f(filWidth, 0.0)
-            GL.glVertex2f(filWidth, barHeight)
-            GL.glVertex2f(0.0, barHeight)
-            GL.glVertex2f(0.0, 0.0)
-            GL.glEnd()
+        self.hudHealthBar.setValue(current, maximum)
 
         # Xp Bar
-        GL.glLoadIdentity()
-        GL.glTranslatef(-0.98, -0.99, 0)
         current = 99 #self.game.player.xp
         maximum = 111 #self.game.player.nextLevelXp
-        barWidth = 0.46
-        barHeight = 0.04
-        GL.glBegin(GL.GL_QUADS);
-        self.setDrawColor(pg_util.COLOR_BAR_XP_BG)
-        # Draw vertices (counter clockwise for face culling!)
-        GL.glVertex2f(barWidth, 0.0)
-        GL.glVertex2f(barWidth, barHeight)
-        GL.glVertex2f(0.0, barHeight)
-        GL.glVertex2f(0.0, 0.0)
-        GL.glEnd()
-        if current > 0:
-            filWidth = current * barWidth / maximum
-            GL.glBegin(GL.GL_QUADS);
-            self.setDrawColor(pg_util.COLOR_BAR_XP)
-            # Draw vertices (counter clockwise for face culling!)
-            GL.glVertex2f(filWidth, 0.0)
-            GL.glVertex2f(filWidth, barHeight)
-            GL.glVertex2f(0.0, barHeight)
-            GL.glVertex2f(0.0, 0.0)
-            GL.glEnd()
+        self.hudXpBar.setValue(current, maximum)
 
-        # FPS
-        GL.glLoadIdentity()
-        self.drawText((-0.98, -1, 0), str(self.FPS), 12)
+        # FPS, rounded so the text does not change every frame
+        self.hudFPS.setText(str(int(round(self.FPS))))
 
         # # Right side: render game messages
         # GL.glLoadIdentity()
@@ -939,10 +1092,12 @@ class GlApplication(object):
         #
         #     messageCounter += 1
 
+        self.overlay.draw(self.displaySize)
+
     def handlePyGameEvent(self, event):
         # Quit
         if event.type == pygame.QUIT:
-            sys.exit()
+            self.eventQuit()
 
         # Window resize
         elif event.type == VIDEORESIZE:
@@ -951,6 +1106,7 @@ class GlApplication(object):
         # mouse
         elif event.type == MOUSEBUTTONDOWN:
             if event.button == 1:
+                self.eventSelect(event.pos)
                 self.eventDraggingStart()
             elif event.button == 3:
                 self.eventRotatingStart()
@@ -970,7 +1126,7 @@ class GlApplication(object):
         elif event.type == pygame.KEYDOWN:
             # Handle keys that are always active
             if event.key == pygame.K_ESCAPE:
-                sys.exit()
+                self.eventQuit()
             elif event.key == pygame.K_p:
                 self.centerCameraOnActor(self.game.player)
             elif event.key == pygame.K_m:
@@ -985,6 +1141,27 @@ class GlApplication(object):
                     if isinstance(obj,util.SceneObject.PlantSceneObject):
                         obj.grow()
 
+    def pick(self, position):
+        """
+        Finds the scene object under a window position, e.g. the mouse position
+        :param position: (x, y) in pixels from the top left corner of the window
+        :return: util.Picking.PickResult with the object, triangle and instance that were hit or None
+        """
+        origin, direction = util.Picking.unproject(self.cameraMatrix.dot(self.perspectiveMatrix), position,
+                                                   self.displaySize)
+        # The objects and world matrices of the last frame
+        return self.picker.pick(self.sceneGraph.nodes, self.sceneGraph.worldMatrices, origin, direction)
+
+    def eventSelect(self, position):
+        """
+        Event handler for a click, selects the object under the mouse
+        """
+        self.selection = self.pick(position)
+        if self.selection is not None:
+            print "Selected %s, triangle %d, instance %d at %s" % (
+                type(self.selection.obj).__name__, self.selection.triangle, self.selection.instance,
+                self.selection.position)
+
     def eventDraggingStart(self):
         self._dragging = True
         # call pygame.mouse.get_rel() to make pygame correctly register the starting point of the drag
@@ -1043,6 +1220,14 @@ class GlApplication(object):
 
 
 
+    def eventQuit(self):
+        """
+        Event handler for closing the window or pressing escape.
+        Writes the frame profile before the application exits.
+        """
+        self.writeProfile()
+        sys.exit()
+
     def eventZoomIn(self):
         """
         Event handler for ZoomIn event.
@@ -1067,6 +1252,30 @@ class GlApplication(object):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PyOpenGl project using PyGame")
+    parser.add_argument("--headless", action="store_true",
+                        help="render offscreen through EGL (surfaceless), no display or GPU needed")
+    parser.add_argument("--osmesa", action="store_true", help="use OSMesa instead of EGL for --headless")
+    parser.add_argument("--frames", type=int, default=100, help="number of frames to render with --headless")
+    parser.add_argument("--size", default="800x600", help="image size with --headless, e.g. 800x600")
+    parser.add_argument("--images", metavar="PATTERN",
+                        help="save every frame with --headless, e.g. frame%%04d.png")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="", default=None,
+                        help="time the phases of every frame, print the percentiles on exit "
+                             "and write the frames to FILE (.json or .csv)")
+    parser.add_argument("--debug-state", action="store_true",
+                        help="count the redundant GL binding calls per frame and check the tracked GL state")
+    arguments = parser.parse_args()
+    gl_state.setDebug(arguments.debug_state)
+
     #This is where it all starts!
-    _application = GlApplication()
-    _application.showMainMenu()
\ No newline at end of file
+    _application = GlApplication(headless=arguments.headless, profile=arguments.profile is not None,
+                                 profileOutput=arguments.profile or None)
+    if arguments.headless:
+        width, height = (int(v) for v in arguments.size.split("x"))
+        frameTimes = _application.runHeadless(arguments.frames, (width, height), arguments.images)
+        print "%d frames, %.2f ms per frame" % (len(frameTimes), 1000 * sum(frameTimes) / max(len(frameTimes), 1))
+        _application.writeProfile()
+        _application.assetLoader.close()
+    else:
+        _application.showMainMenu()
\ No newline at end of file
@@ -0,0 +1,112 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares frustum culling of scene objects object by object (the bounds of one object against the six
+planes per Python iteration) against the batched pass of util.Culling. The objects are cubes spread
+randomly around the origin, the camera moves every frame so the batched pass can not reuse its result.
+Both have to find the same visible objects.
+
+Usage:
+python benchmarks/CullingBenchmark.py [objects ...]
+'''
+import math
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.Culling
+import util.OpenGlUtilities as og_util
+import util.SceneObject
+from util.vec3 import vec3
+
+FRAMES = 50
+
+
+def perspectiveMatrix():
+    '''
+    The perspective projection of GlApplication for an 800x600 window.
+    '''
+    zNear, zFar = 0.1, 1000.0
+    matrix = np.zeros((4, 4), dtype=np.float32)
+    matrix[0, 0] = 1.0
+    matrix[1, 1] = 800.0 / 600
+    matrix[2, 2] = (zFar + zNear) / (zNear - zFar)
+    matrix[3, 2] = (2 * zFar * zNear) / (zNear - zFar)
+    matrix[2, 3] = -1.0
+    return matrix
+
+
+def cameras(frames):
+    '''
+    A camera circling the origin, one view projection matrix per frame.
+    '''
+    result = []
+    for frame in range(frames):
+        angle = 2 * math.pi * frame / frames
+        eye = vec3(20 * math.cos(angle), 20 * math.sin(angle), 8)
+        result.append(og_util.lookAtMatrix44(eye, vec3(0, 0, 0), vec3(0, 0, 1)).dot(perspectiveMatrix()))
+    return result
+
+
+def perObject(objects, matrices, viewProjection):
+    '''
+    The same tests as util.Culling, one object at a time.
+    '''
+    planes = util.Culling.frustumPlanes(viewProjection)
+    visible = []
+    for obj, matrix in zip(objects, matrices):
+        low, high, center, radius = obj.bounds
+        linear = matrix[:3, :3].astype(np.float64)
+        translation = matrix[3, :3]
+        boxCenter = ((low + high) / 2).dot(linear) + translation
+        boxExtent = ((high - low) / 2).dot(np.abs(linear))
+        sphereCenter = center.dot(linear) + translation
+        sphereRadius = radius * math.sqrt(max((linear ** 2).sum(axis=1)))
+        inside = True
+        for plane in planes:
+            normal = plane[:3]
+            if sphereCenter.dot(normal) + plane[3] < -sphereRadius or \
+                    boxCenter.dot(normal) + plane[3] + boxExtent.dot(np.abs(normal)) < 0:
+                inside = False
+                break
+        visible.append(inside)
+    return np.array(visible)
+
+
+def run(count):
+    '''
+    :return: (ms per frame object by object, ms per frame batched, average fraction of culled objects)
+    '''
+    random.seed(1)
+    objects = [util.SceneObject.Cube() for i in range(count)]
+    matrices = np.array([og_util.translationMatrix44(random.uniform(-30, 30), random.uniform(-30, 30),
+                                                     random.uniform(-2, 2)) for obj in objects])
+    views = cameras(FRAMES)
+
+    start = timeit.default_timer()
+    expected = [perObject(objects, matrices, view) for view in views]
+    loop = timeit.default_timer() - start
+
+    culler = util.Culling.FrustumCuller()
+    start = timeit.default_timer()
+    results = [culler.cull(objects, matrices, view) for view in views]
+    batched = timeit.default_timer() - start
+
+    for a, b in zip(expected, results):
+        assert np.array_equal(a, b)
+    return 1000 * loop / FRAMES, 1000 * batched / FRAMES, float(culler.totalCulledObjects) / (FRAMES * count)
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    print '%10s %14s %14s %10s' % ('objects', 'per object ms', 'batched ms', 'culled')
+    for count in counts:
+        loop, batched, culled = run(count)
+        print '%10d %14.3f %14.3f %9.0f%%' % (count, loop, batched, 100 * culled)
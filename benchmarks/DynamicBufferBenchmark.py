@@ -0,0 +1,112 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Simulates the per frame refresh of the dynamic objects and checks that the number of GPU buffers
+stays constant: the buffers are created once, grow when needed and are not uploaded at all in
+frames where no dynamic object changed. The plant grows every growEvery frames.
+Compares the bytes uploaded when only the changes are uploaded against uploading everything,
+and checks the buffer content against the scene objects at the end.
+Creates an offscreen OpenGl context (util.OffscreenContext), no display is needed.
+
+Usage:
+python benchmarks/DynamicBufferBenchmark.py [frames] [growEvery]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+from OpenGL import GL
+
+import numpy as np
+
+import util.OpenGlUtilities as og_util
+import util.GlState as gl_state
+import util.SceneObject
+import util.VertexBuffer
+
+
+def run(frames, growEvery, incremental=True):
+    '''
+    Runs the frames in the current OpenGl context.
+    :return: Tuple (seconds, buffer count at the start, buffer count at the end, SceneBuffers)
+    '''
+    plant = util.SceneObject.PlantSceneObject(1.5)
+    dynamicObjects = [util.SceneObject.Cube(), plant]
+
+    vao = GL.glGenVertexArrays(1)
+    gl_state.bindVertexArray(vao)
+    buffers = util.VertexBuffer.SceneBuffers(GL.GL_DYNAMIC_DRAW, incremental)
+    startCount = og_util.liveBufferCount()
+
+    start = time.time()
+    for frame in range(frames):
+        if frame % growEvery == 0:
+            plant.grow()
+        buffers.update(dynamicObjects)
+        # Every frame must leave the buffer count unchanged
+        assert og_util.liveBufferCount() == startCount
+    GL.glFinish()
+    seconds = time.time() - start
+
+    checkContent(buffers, dynamicObjects)
+    endCount = og_util.liveBufferCount()
+    gl_state.bindVertexArray(0)
+    GL.glDeleteVertexArrays(1, [vao])
+    gl_state.vertexArrayDeleted(vao)
+    buffers.delete()
+    return seconds, startCount, endCount, buffers
+
+
+def checkContent(buffers, sceneObjects):
+    '''
+    Reads the buffers back and compares them with the data of the scene objects.
+    '''
+    for name, buf in (('vertices', buffers.vertexBuffer), ('colors', buffers.colorBuffer),
+                      ('normals', buffers.normalBuffer)):
+        expected = np.concatenate([getattr(obj, name).array for obj in sceneObjects])
+        buf.bind()
+        content = np.frombuffer(GL.glGetBufferSubData(buf.target, 0, expected.nbytes), dtype=np.float32)
+        assert np.array_equal(content, expected), name
+    expected = np.concatenate([obj.instanceData() for obj in sceneObjects])
+    buffers.instanceBuffer.bind()
+    content = np.frombuffer(GL.glGetBufferSubData(GL.GL_ARRAY_BUFFER, 0, expected.nbytes), dtype=np.float32)
+    assert np.array_equal(content, expected), 'instances'
+    vertexStarts = np.cumsum([0] + [obj.vertexCount for obj in sceneObjects[:-1]])
+    expected = np.concatenate([obj.triangleIndices.array + start
+                               for obj, start in zip(sceneObjects, vertexStarts)]).astype(np.uint32)
+    buffers.elementBuffer.bind()
+    content = np.frombuffer(GL.glGetBufferSubData(GL.GL_ELEMENT_ARRAY_BUFFER, 0, expected.nbytes), dtype=np.uint32)
+    assert np.array_equal(content, expected), 'triangleIndices'
+
+
+def report(frames, result):
+    seconds, startCount, endCount, buffers = result
+    print 'Uploads:             %d, skipped %d' % (buffers.version, buffers.skipped)
+    print 'Frames:              %d in %.3f s (%.1f us per frame)' % (frames, seconds, 1e6 * seconds / frames)
+    print 'Live buffers:        %d at the start, %d at the end' % (startCount, endCount)
+    print 'Uploaded:            %.2f MB, %.0f bytes per upload' % (buffers.bytesUploaded / 1e6,
+                                                                    float(buffers.bytesUploaded) / buffers.version)
+    print 'Vertex buffer:       %d allocations, capacity %d bytes' % (buffers.vertexBuffer.allocations,
+                                                                      buffers.vertexBuffer.capacity)
+    print 'Element buffer:      %d allocations, capacity %d bytes' % (buffers.elementBuffer.allocations,
+                                                                      buffers.elementBuffer.capacity)
+    print 'Instance buffer:     %d allocations, capacity %d bytes' % (buffers.instanceBuffer.allocations,
+                                                                      buffers.instanceBuffer.capacity)
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    growEvery = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    context = util.OffscreenContext.OffscreenContext()
+    for incremental in (True, False):
+        print 'Upload only the changes' if incremental else 'Upload everything on a change'
+        report(frames, run(frames, growEvery, incremental))
+        print
+    context.destroy()
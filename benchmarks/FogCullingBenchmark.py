@@ -0,0 +1,135 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures the fog of war culling of util.Culling on a level mesh (a generated map, see LevelMeshBenchmark) with
+cubes spread over it, for a player walking through the level: the time of the culling pass per frame and the
+triangles and draw calls that are left of the ones drawn without it. Every culled object and level chunk is
+checked with the distance of the vertex shader: none of its vertices may lie within the fog distance.
+
+Usage:
+python benchmarks/FogCullingBenchmark.py [size] [objects] [frames] [fogDistance]
+'''
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.Culling
+import util.LevelMesh
+import util.OpenGlUtilities as og_util
+import util.SceneObject
+from util.vec3 import vec3
+from LevelMeshBenchmark import TILESIZE, generateMap
+
+
+def perspectiveMatrix():
+    '''
+    The perspective projection of GlApplication for an 800x600 window.
+    '''
+    zNear, zFar = 0.1, 1000.0
+    matrix = np.zeros((4, 4), dtype=np.float32)
+    matrix[0, 0] = 1.0
+    matrix[1, 1] = 800.0 / 600
+    matrix[2, 2] = (zFar + zNear) / (zNear - zFar)
+    matrix[3, 2] = (2 * zFar * zNear) / (zNear - zFar)
+    matrix[2, 3] = -1.0
+    return matrix
+
+
+def worldVertices(obj, matrix):
+    '''
+    World positions of all vertices of an object and its instances, like the vertex shader.
+    '''
+    vertices = np.asarray(obj.vertices, dtype=np.float64).reshape(-1, 4)
+    records = np.asarray(obj.instanceData(), dtype=np.float64).reshape(-1, util.SceneObject.INSTANCE_COMPONENTS)
+    vertices = np.concatenate([np.column_stack((vertices[:, :3] * record[3] + record[:3] * vertices[:, 3:],
+                                                vertices[:, 3])) for record in records])
+    return vertices.dot(matrix)
+
+
+def checkCulled(objects, matrices, fogged, level, ranges, position, fogDistance):
+    '''
+    No vertex of an object or level quad skipped by the fog lies within the fog distance of the position,
+    with the distance of the vertex shader.
+    '''
+    for obj, matrix in zip(objects[fogged], matrices[fogged]):
+        distances = np.sqrt(((worldVertices(obj, matrix)[:, :3] - position[:3]) ** 2).sum(axis=1))
+        assert (distances > fogDistance).all()
+    drawn = np.zeros(len(level.triangleIndices) / 6, dtype=bool)
+    for first, count in ranges:
+        drawn[first / 6:(first + count) / 6] = True
+    quads = np.asarray(level.triangleIndices).reshape(-1, 6)[~drawn]
+    # Degenerate quads (the unused rest of a slot) draw nothing
+    indices = quads[(quads != quads[:, :1]).any(axis=1)].ravel()
+    vertices = np.asarray(level.vertices, dtype=np.float64).reshape(-1, 4)[indices, :3]
+    assert (np.sqrt(((vertices - position[:3]) ** 2).sum(axis=1)) > fogDistance).all()
+
+
+def run(size, count, frames, fogDistance):
+    '''
+    :return: Dictionary with the results
+    '''
+    random = np.random.RandomState(1)
+    blocked, colors = generateMap(size, random)
+    level = util.LevelMesh.LevelSceneObject(blocked, colors, TILESIZE)
+    extent = size * TILESIZE
+    objects = np.array([level] + [util.SceneObject.Cube() for i in range(count)], dtype=object)
+    matrices = np.array([np.identity(4)] + [np.diag((0.2, 0.2, 0.2, 1)).dot(og_util.translationMatrix44(x, y, 0.5))
+                                            for x, y in random.uniform(0, extent, (count, 2))])
+    triangles = np.array([len(obj.triangleIndices) / 3 for obj in objects])
+
+    # Frustum culling only (the fogged objects are drawn black), and frustum and fog culling
+    frustumOnly = util.Culling.FrustumCuller()
+    culler = util.Culling.FrustumCuller()
+    cullTime = 0
+    result = dict.fromkeys(('triangles', 'fogTriangles', 'drawCalls', 'fogDrawCalls'), 0.0)
+    for frame in range(frames):
+        # The player walks through the middle of the level, the camera looks down at the player
+        position = np.array((extent * (frame + 0.5) / frames, extent / 2, 0.0, 1.0))
+        view = og_util.lookAtMatrix44(vec3(position[0], position[1] - 2, 6),
+                                      vec3(position[0], position[1], 0), vec3(0, 0, 1))
+        viewProjection = view.dot(perspectiveMatrix())
+        visible = frustumOnly.cull(objects, matrices, viewProjection)
+
+        start = timeit.default_timer()
+        fog = (position, fogDistance)
+        fogVisible = culler.cull(objects, matrices, viewProjection, fog)
+        ranges = culler.cullChunks(level, matrices[0], fog) if fogVisible[0] else []
+        cullTime += timeit.default_timer() - start
+
+        result['triangles'] += triangles[visible].sum()
+        result['drawCalls'] += visible.sum()
+        result['fogTriangles'] += triangles[1:][fogVisible[1:]].sum() + sum(count for first, count in ranges) / 3
+        # The level chunks are drawn with one glMultiDrawElements call
+        result['fogDrawCalls'] += fogVisible[1:].sum() + (len(ranges) > 0)
+        if frame % max(frames / 10, 1) == 0:
+            fogged = visible & ~fogVisible
+            fogged[0] = False
+            checkCulled(objects, matrices, fogged, level, ranges, position, fogDistance)
+
+    for key in result:
+        result[key] /= frames
+    result.update({'objects': count, 'chunks': level.chunkCount, 'cull': cullTime / frames})
+    return result
+
+
+def report(result):
+    print 'Objects:                     %d cubes, level of %d chunks' % (result['objects'], result['chunks'])
+    print 'Culling pass:                %8.2f ms per frame' % (1000 * result['cull'])
+    print 'Triangles, frustum:          %8.0f per frame' % result['triangles']
+    print 'Triangles, frustum and fog:  %8.0f per frame' % result['fogTriangles']
+    print 'Draw calls, frustum:         %8.1f per frame' % result['drawCalls']
+    print 'Draw calls, frustum and fog: %8.1f per frame' % result['fogDrawCalls']
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    frames = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    fogDistance = float(sys.argv[4]) if len(sys.argv) > 4 else 4.0
+    report(run(size, count, frames, fogDistance))
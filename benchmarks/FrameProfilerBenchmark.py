@@ -0,0 +1,42 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures the per frame overhead of the frame profiler, switched off (only the None checks of the
+main loop) and switched on (beginFrame, a mark per phase and endFrame).
+
+Usage:
+python benchmarks/FrameProfilerBenchmark.py [frames]
+'''
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.FrameProfiler
+
+PHASES = ("events", "clear", "camera", "assets", "dynamicObjects", "drawVBAs", "drawHUD", "flip")
+
+
+def frames(profiler, count):
+    '''
+    The profiler calls of the main loop, without any work in the phases.
+    '''
+    phases = range(len(PHASES))
+    start = timeit.default_timer()
+    for frame in xrange(count):
+        if profiler is not None: profiler.beginFrame()
+        for phase in phases:
+            if profiler is not None: profiler.mark(phase)
+        if profiler is not None: profiler.endFrame()
+    return timeit.default_timer() - start
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    empty = frames(None, count)
+    enabled = frames(util.FrameProfiler.FrameProfiler(PHASES), count)
+    print 'Profiler off: %6.2f us per frame' % (1e6 * empty / count)
+    print 'Profiler on:  %6.2f us per frame (%d phases)' % (1e6 * enabled / count, len(PHASES))
@@ -0,0 +1,137 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares the binding calls of a frame (dynamic objects refresh, level and actors draw, HUD overlay):
+the original sequence of glUseProgram, glBindVertexArray and glBindBuffer calls that binds and resets
+to 0 around every step, against the same steps through util.GlState, which leaves the bindings in place
+and drops the calls that would not change anything. Only the binding calls are measured, nothing is drawn.
+Creates an offscreen OpenGl context (util.OffscreenContext), no display is needed.
+
+Usage:
+python benchmarks/GlStateBenchmark.py [frames]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+from OpenGL import GL
+from OpenGL.GL.shaders import compileShader, compileProgram
+
+import util.GlState as gl_state
+
+VERTEX_SHADER = '''
+#version 330
+layout(location = 0) in vec4 position;
+void main() { gl_Position = position; }
+'''
+
+FRAGMENT_SHADER = '''
+#version 330
+out vec4 outputColor;
+void main() { outputColor = vec4(1.0); }
+'''
+
+
+def createObjects():
+    '''
+    :return: Two programs, three vertex array objects (level, actors, overlay) and their element buffers
+    '''
+    programs = [compileProgram(compileShader(VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                               compileShader(FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)) for i in range(2)]
+    vertexArrays = [int(vao) for vao in GL.glGenVertexArrays(3)]
+    elementBuffers = [int(buf) for buf in GL.glGenBuffers(3)]
+    return programs, vertexArrays, elementBuffers
+
+
+def legacyFrames(frames, programs, vertexArrays, elementBuffers):
+    mainProgram, overlayProgram = programs
+    level, actors, overlay = vertexArrays
+    levelElements, actorsElements, overlayElements = elementBuffers
+    start = time.time()
+    for frame in range(frames):
+        # Dynamic objects
+        GL.glUseProgram(mainProgram)
+        GL.glBindVertexArray(actors)
+        GL.glBindVertexArray(0)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glUseProgram(0)
+        # Level and actors
+        GL.glUseProgram(mainProgram)
+        GL.glBindVertexArray(level)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, levelElements)
+        GL.glBindVertexArray(0)
+        GL.glBindVertexArray(actors)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, actorsElements)
+        GL.glBindVertexArray(0)
+        GL.glUseProgram(0)
+        # Overlay
+        GL.glUseProgram(overlayProgram)
+        GL.glBindVertexArray(overlay)
+        GL.glBindVertexArray(0)
+        GL.glUseProgram(0)
+    GL.glFinish()
+    return time.time() - start, 17 * frames
+
+
+def trackedFrames(frames, programs, vertexArrays, elementBuffers):
+    mainProgram, overlayProgram = programs
+    level, actors, overlay = vertexArrays
+    levelElements, actorsElements, overlayElements = elementBuffers
+    gl_state.invalidate()
+    calls = gl_state.calls
+    start = time.time()
+    for frame in range(frames):
+        # Dynamic objects
+        gl_state.bindVertexArray(actors)
+        # Level and actors
+        gl_state.useProgram(mainProgram)
+        gl_state.bindVertexArray(level)
+        gl_state.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, levelElements)
+        gl_state.bindVertexArray(actors)
+        gl_state.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, actorsElements)
+        # Overlay
+        gl_state.useProgram(overlayProgram)
+        gl_state.bindVertexArray(overlay)
+    GL.glFinish()
+    return time.time() - start, gl_state.calls - calls
+
+
+def run(frames):
+    '''
+    Runs the measurements in the current OpenGl context.
+    :return: List of (name, milliseconds per frame, GL calls per frame)
+    '''
+    objects = createObjects()
+    results = []
+    for name, function in (('legacy', legacyFrames), ('tracked', trackedFrames)):
+        seconds, calls = function(frames, *objects)
+        results.append((name, 1000 * seconds / frames, float(calls) / frames))
+    gl_state.bindVertexArray(0)
+    gl_state.useProgram(0)
+    programs, vertexArrays, elementBuffers = objects
+    for program in programs:
+        GL.glDeleteProgram(program)
+    GL.glDeleteVertexArrays(len(vertexArrays), vertexArrays)
+    GL.glDeleteBuffers(len(elementBuffers), elementBuffers)
+    gl_state.invalidate()
+    return results
+
+
+def report(results):
+    print '%8s %12s %16s' % ('bindings', 'ms / frame', 'GL calls / frame')
+    for name, milliseconds, calls in results:
+        print '%8s %12.4f %16.1f' % (name, milliseconds, calls)
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    context = util.OffscreenContext.OffscreenContext()
+    report(run(frames))
+    context.destroy()
@@ -0,0 +1,124 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares the per frame time of drawing the HUD: the original immediate mode HUD (a new pygame font,
+render, tostring and glDrawPixels for every text, glBegin/glEnd for the bars) against the retained
+util.Overlay, with unchanged values and with the FPS text and a bar changing every frame.
+The text length is varied to show that the overlay cost does not depend on it.
+Creates an offscreen OpenGl context (util.OffscreenContext) with the compatibility profile for the
+immediate mode HUD and renders into a framebuffer, no display is needed.
+
+Usage:
+python benchmarks/HudBenchmark.py [frames]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+import pygame
+from OpenGL import GL
+
+import util.GlState as gl_state
+import util.Overlay
+import util.PyGameUtilities as pg_util
+
+DISPLAY_SIZE = (800, 600)
+
+
+def legacyDrawText(position, textString, textSize):
+    font = pygame.font.Font(None, textSize)
+    textSurface = font.render(textString, True, (255, 255, 255, 255))
+    textData = pygame.image.tostring(textSurface, "RGBA", True)
+    GL.glRasterPos3d(*position)
+    GL.glDrawPixels(textSurface.get_width(), textSurface.get_height(), GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, textData)
+
+
+def legacyDrawBar(position, width, height, fraction, color, backgroundColor):
+    GL.glLoadIdentity()
+    GL.glTranslatef(position[0], position[1], 0)
+    for barWidth, barColor in ((width, backgroundColor), (width * fraction, color)):
+        GL.glBegin(GL.GL_QUADS)
+        GL.glColor3f(*[c / 250.0 for c in barColor])
+        GL.glVertex2f(barWidth, 0.0)
+        GL.glVertex2f(barWidth, height)
+        GL.glVertex2f(0.0, height)
+        GL.glVertex2f(0.0, 0.0)
+        GL.glEnd()
+
+
+def legacyHUD(text, frame):
+    GL.glLoadIdentity()
+    legacyDrawText((-0.98, 0.9, 0), text, 24)
+    legacyDrawText((-0.98, -0.85, 0), "Player (Lvl ?)", 18)
+    legacyDrawBar((-0.98, -0.94), 0.46, 0.08, (frame % 100) / 100.0, pg_util.COLOR_BAR_HEALTH,
+                  pg_util.COLOR_BAR_HEALTH_BG)
+    legacyDrawBar((-0.98, -0.99), 0.46, 0.04, 0.9, pg_util.COLOR_BAR_XP, pg_util.COLOR_BAR_XP_BG)
+    GL.glLoadIdentity()
+    legacyDrawText((-0.98, -1, 0), str(frame), 12)
+
+
+def run(frames, shaderDirectory="shaders"):
+    '''
+    Runs the measurements in the current OpenGl context.
+    :return: List of (text length, legacy, overlay unchanged, overlay changing) with milliseconds per frame
+    '''
+    pygame.font.init()
+    results = []
+    for length in (10, 100, 1000):
+        text = ('Level 1 The Dungeon ' * (length // 20 + 1))[:length]
+        timings = [length]
+
+        # The immediate mode HUD uses the fixed function pipeline, the overlay leaves its program bound
+        gl_state.useProgram(0)
+        gl_state.bindVertexArray(0)
+        start = time.time()
+        for frame in range(frames):
+            legacyHUD(text, frame)
+        GL.glFinish()
+        timings.append(1000 * (time.time() - start) / frames)
+
+        # Creating the overlay and rasterizing the fonts is a one time cost
+        overlay = util.Overlay.Overlay(shaderDirectory=shaderDirectory)
+        overlay.addText((-0.98, 0.9), text, 24)
+        overlay.addText((-0.98, -0.85), "Player (Lvl ?)", 18)
+        healthBar = overlay.addBar((-0.98, -0.94), (0.46, 0.08), pg_util.COLOR_BAR_HEALTH,
+                                   pg_util.COLOR_BAR_HEALTH_BG)
+        overlay.addBar((-0.98, -0.99), (0.46, 0.04), pg_util.COLOR_BAR_XP, pg_util.COLOR_BAR_XP_BG, 0.9)
+        fps = overlay.addText((-0.98, -1.0), "0", 12)
+        overlay.draw(DISPLAY_SIZE)
+
+        for changing in (False, True):
+            start = time.time()
+            for frame in range(frames):
+                if changing:
+                    healthBar.setValue(frame % 100, 100)
+                    fps.setText(str(frame))
+                overlay.draw(DISPLAY_SIZE)
+            GL.glFinish()
+            timings.append(1000 * (time.time() - start) / frames)
+        overlay.delete()
+        results.append(timings)
+    return results
+
+
+def report(results):
+    print '%12s %12s %20s %20s' % ('text length', 'legacy ms', 'overlay unchanged ms', 'overlay changing ms')
+    for length, legacy, unchanged, changing in results:
+        print '%12d %12.3f %20.3f %20.3f' % (length, legacy, unchanged, changing)
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    context = util.OffscreenContext.OffscreenContext(compatibility=True)
+    framebuffer = util.OffscreenContext.Framebuffer(*DISPLAY_SIZE)
+    GL.glViewport(0, 0, DISPLAY_SIZE[0], DISPLAY_SIZE[1])
+    report(run(frames))
+    framebuffer.delete()
+    context.destroy()
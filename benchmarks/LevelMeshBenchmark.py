@@ -0,0 +1,115 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures the chunked level mesh of util.LevelMesh on a generated map of rooms and corridors: the triangles
+of a box per tile (the original level mesh), of the visible faces and of the merged faces, the time to mesh the
+whole level, and per tile edit the time to mesh the chunks again and the bytes that have to be uploaded.
+
+Usage:
+python benchmarks/LevelMeshBenchmark.py [size] [chunkSize] [edits]
+'''
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.LevelMesh
+
+TILESIZE = 0.25
+WALL_COLOR = (0.4, 0.4, 0.45)
+FLOOR_COLORS = ((0.6, 0.5, 0.3), (0.3, 0.5, 0.3))
+
+
+def generateMap(size, random):
+    '''
+    Rooms connected by corridors, walls everywhere else.
+    :return: (blocked, colors) arrays indexed [x, y]
+    '''
+    blocked = np.ones((size, size), dtype=bool)
+    colors = np.empty((size, size, 3), dtype=np.float32)
+    colors[:] = WALL_COLOR
+    previous = None
+    for room in range(size * size / 200):
+        width, height = random.randint(4, 16, 2)
+        x, y = random.randint(1, size - 17, 2)
+        blocked[x:x + width, y:y + height] = False
+        colors[x:x + width, y:y + height] = FLOOR_COLORS[random.randint(len(FLOOR_COLORS))]
+        center = (x + width / 2, y + height / 2)
+        if previous is not None:
+            # An L shaped corridor to the previous room
+            (x0, y0), (x1, y1) = previous, center
+            blocked[min(x0, x1):max(x0, x1) + 1, y0] = False
+            blocked[x1, min(y0, y1):max(y0, y1) + 1] = False
+        previous = center
+    colors[~blocked & (colors == WALL_COLOR).all(axis=2)] = FLOOR_COLORS[0]
+    return blocked, colors
+
+
+def visibleFaces(blocked):
+    '''
+    Number of visible tile faces without merging: a top per tile and the wall sides facing an open tile.
+    '''
+    padded = np.zeros((blocked.shape[0] + 2, blocked.shape[1] + 2), dtype=bool)
+    padded[1:-1, 1:-1] = blocked
+    sides = sum((blocked & ~neighbour).sum() for neighbour in (padded[2:, 1:-1], padded[:-2, 1:-1],
+                                                               padded[1:-1, 2:], padded[1:-1, :-2]))
+    return blocked.size + sides
+
+
+def uploadBytes(obj):
+    '''
+    Bytes of the changes of a scene object that would be uploaded, then forgets the changes.
+    '''
+    total = 0
+    for name in ('vertices', 'colors', 'normals', 'triangleIndices'):
+        total += sum(end - start for start, end in obj.changedRanges(name)) * 4
+    obj.markClean()
+    return total
+
+
+def run(size, chunkSize, edits):
+    random = np.random.RandomState(1)
+    blocked, colors = generateMap(size, random)
+
+    start = timeit.default_timer()
+    level = util.LevelMesh.LevelSceneObject(blocked, colors, TILESIZE, chunkSize)
+    build = timeit.default_timer() - start
+    level.markClean()
+
+    editTime = 0
+    editBytes = 0
+    chunks = 0
+    for edit in range(edits):
+        x, y = random.randint(0, size, 2)
+        start = timeit.default_timer()
+        chunks += len(level.setTile(x, y, blocked=not level.tileBlocked[x, y]))
+        editTime += timeit.default_timer() - start
+        editBytes += uploadBytes(level)
+
+    return {'tiles': size * size, 'chunks': level.chunkCount, 'boxTriangles': level.boxTriangleCount,
+            'visibleTriangles': 2 * visibleFaces(blocked), 'mergedTriangles': 2 * level.quadCount,
+            'build': build, 'edit': editTime / edits, 'editBytes': float(editBytes) / edits,
+            'editChunks': float(chunks) / edits, 'levelBytes': level.vertices.nbytes + level.colors.nbytes +
+            level.normals.nbytes + level.triangleIndices.nbytes}
+
+
+def report(result):
+    print 'Tiles:                       %d in %d chunks' % (result['tiles'], result['chunks'])
+    print 'Triangles, box per tile:     %d' % result['boxTriangles']
+    print 'Triangles, visible faces:    %d' % result['visibleTriangles']
+    print 'Triangles, merged faces:     %d' % result['mergedTriangles']
+    print 'Mesh whole level:            %8.1f ms' % (1000 * result['build'])
+    print 'Tile edit:                   %8.2f ms, %.1f chunks' % (1000 * result['edit'], result['editChunks'])
+    print 'Bytes per tile edit:         %8.0f of %d' % (result['editBytes'], result['levelBytes'])
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    chunkSize = int(sys.argv[2]) if len(sys.argv) > 2 else util.LevelMesh.CHUNK_SIZE
+    edits = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    report(run(size, chunkSize, edits))
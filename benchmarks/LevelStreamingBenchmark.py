@@ -0,0 +1,103 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures streaming the level chunks around a walking player with util.LevelMesh.StreamingLevelSceneObject
+on a generated map (see LevelMeshBenchmark), against meshing the whole level up front: the time to open the
+level, the memory of the mesh, the time until the chunks around the player are shown, and per frame the time
+the render thread spends (requesting chunks and writing the finished ones) and the bytes it has to upload.
+The frames are paced at 60 per second, the chunks are meshed by the asset loader workers in the meantime.
+
+Usage:
+python benchmarks/LevelStreamingBenchmark.py [size] [frames] [radius] [budget]
+'''
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.AssetLoader
+import util.LevelMesh
+from LevelMeshBenchmark import TILESIZE, generateMap, uploadBytes
+
+FRAME_TIME = 1.0 / 60
+# Tiles the player walks per frame
+SPEED = 0.5
+
+
+def meshBytes(obj):
+    return obj.vertices.nbytes + obj.colors.nbytes + obj.normals.nbytes + obj.triangleIndices.nbytes
+
+
+def run(size, frames, radius, budget):
+    '''
+    :return: Dictionary with the results
+    '''
+    blocked, colors = generateMap(size, np.random.RandomState(1))
+
+    start = timeit.default_timer()
+    whole = util.LevelMesh.LevelSceneObject(blocked, colors, TILESIZE)
+    wholeOpen = timeit.default_timer() - start
+    wholeBytes = meshBytes(whole)
+    del whole
+
+    loader = util.AssetLoader.AssetLoader()
+    start = timeit.default_timer()
+    level = util.LevelMesh.StreamingLevelSceneObject(blocked, colors, TILESIZE, radius=radius, budget=budget)
+    streamOpen = timeit.default_timer() - start
+    uploadBytes(level)
+
+    # The player walks diagonally through the map and back
+    frameTimes = []
+    frameBytes = []
+    firstView = None
+    for frame in range(frames):
+        begin = timeit.default_timer()
+        position = (frame * SPEED) % (2 * (size - 1))
+        position = min(position, 2 * (size - 1) - position) * TILESIZE
+        wanted = level.wantedChunks((position, position))
+        level.stream((position, position), loader)
+        loader.processReady()
+        frameTimes.append(timeit.default_timer() - begin)
+        frameBytes.append(uploadBytes(level))
+        if firstView is None and all(chunk in level.residentChunks for chunk in wanted):
+            firstView = frame + 1
+        time.sleep(max(FRAME_TIME - (timeit.default_timer() - begin), 0))
+    loader.close()
+
+    frameTimes = np.array(frameTimes)
+    frameBytes = np.array(frameBytes)
+    return {'tiles': size * size, 'wholeOpen': wholeOpen, 'wholeBytes': wholeBytes, 'streamOpen': streamOpen,
+            'streamBytes': meshBytes(level), 'quads': len(level.triangleIndices) / 6, 'budget': budget,
+            'firstView': firstView, 'frame50': np.percentile(frameTimes, 50),
+            'frame99': np.percentile(frameTimes, 99), 'frameMax': frameTimes.max(), 'bytesMean': frameBytes.mean(), 'bytesMax': frameBytes.max(),
+            'streamed': level.streamedChunks, 'evicted': level.evictedChunks, 'discarded': level.discardedChunks,
+            'resident': len(level.residentChunks)}
+
+
+def report(result):
+    print 'Tiles:                          %d' % result['tiles']
+    print 'Open, whole level:              %8.1f ms' % (1000 * result['wholeOpen'])
+    print 'Open, streaming:                %8.1f ms' % (1000 * result['streamOpen'])
+    print 'Mesh, whole level:              %8d bytes' % result['wholeBytes']
+    print 'Mesh, streaming:                %8d bytes, %d quads for a budget of %d' % (
+        result['streamBytes'], result['quads'], result['budget'])
+    print 'Frames until the view is shown: %s' % result['firstView']
+    print 'Render thread per frame:        %8.2f ms median, %.2f ms 99%%, %.2f ms max' % (
+        1000 * result['frame50'], 1000 * result['frame99'], 1000 * result['frameMax'])
+    print 'Upload per frame:               %8.0f bytes mean, %d max' % (result['bytesMean'], result['bytesMax'])
+    print 'Chunks:                         %d streamed, %d evicted, %d discarded, %d resident' % (
+        result['streamed'], result['evicted'], result['discarded'], result['resident'])
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 1200
+    radius = float(sys.argv[3]) if len(sys.argv) > 3 else util.LevelMesh.STREAMING_RADIUS
+    budget = int(sys.argv[4]) if len(sys.argv) > 4 else util.LevelMesh.STREAMING_BUDGET
+    report(run(size, frames, radius, budget))
@@ -0,0 +1,148 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Draws more scene objects than the initial model matrix block holds (util.SceneGraph.MAX_NODES) with
+GlApplication in an offscreen context: a grid of cubes, one of them moving every frame. Once with the
+model matrix block grown to hold all objects, and once with the block limited to its initial size, so the
+objects past it get their matrix per draw (overflowModelMatrix). Measures drawVBAs per frame and checks that
+both images are the same and that every cube is drawn.
+
+Usage:
+python benchmarks/ModelMatrixBenchmark.py [objects] [frames]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+import numpy as np
+import pygame
+
+import util.GlState as gl_state
+import util.OpenGlUtilities as og_util
+import util.PyGameUtilities as pg_util
+import util.SceneGraph
+import util.SceneObject
+from util.GlBackend import GL
+from util.vec3 import vec3
+import GlApplication
+
+DISPLAY_SIZE = (800, 600)
+# Distance between the cubes of the grid
+SPACING = 1.5
+
+
+def cubeGrid(count):
+    '''
+    :return: List of cubes in a square grid around the origin
+    '''
+    side = int(np.ceil(np.sqrt(count)))
+    cubes = []
+    for i in range(count):
+        cube = util.SceneObject.Cube()
+        cube.localMatrix = og_util.translationMatrix44(SPACING * (i % side - side / 2.0),
+                                                       SPACING * (i // side - side / 2.0), 0.0)
+        cubes.append(cube)
+    return cubes
+
+
+def cubePixels(application, cubes):
+    '''
+    :return: (n, 2) array with the (row, column) of the center of every cube in the image
+    '''
+    matrices = np.array([application.sceneGraph.worldMatrix(cube) for cube in cubes], dtype=np.float64)
+    # Center of the top face of the cube, the camera looks down at the grid
+    clip = np.dot((0.0, 0.0, 0.5, 1.0), matrices).dot(application.cameraMatrix).dot(application.perspectiveMatrix)
+    ndc = clip[:, :2] / clip[:, 3:]
+    width, height = DISPLAY_SIZE
+    columns = ((ndc[:, 0] + 1) / 2 * width).astype(int)
+    rows = ((1 - ndc[:, 1]) / 2 * height).astype(int)
+    return np.column_stack((rows, columns))
+
+
+def run(count, frames, maxModelMatrices=None):
+    '''
+    :param maxModelMatrices: Limits the model matrix block, None for the largest block of the driver
+    :return: (milliseconds per drawVBAs, model matrix block capacity, image of the last frame, cube pixels)
+    '''
+    application = GlApplication.GlApplication(headless=True)
+    # Every run has its own context
+    gl_state.invalidate()
+    pygame.font.init()
+    application.resizeWindow(DISPLAY_SIZE)
+    pg_util.initFonts()
+    application.initOpenGl()
+    # Only the cubes are drawn, the background loaded models are replaced below
+    while application.assetLoader.pendingCount > 0:
+        application.assetLoader.processReady()
+        time.sleep(0.01)
+    application.assetLoader.close()
+    if maxModelMatrices is not None:
+        application.maxModelMatrices = maxModelMatrices
+    # Looks down at the grid
+    extent = SPACING * np.sqrt(count)
+    application.cameraMatrix = og_util.lookAtMatrix44(vec3(0, -0.01, extent * 1.1), vec3(0, 0, 0), vec3(0, 1, 0))
+    cubes = cubeGrid(count)
+    application.dynamicObjects = cubes
+    application.staticObjects = []
+    application.loadVAOStaticObjects()
+    # The cube in the last slot moves
+    moving = cubes[-1]
+    origin = moving.localMatrix
+
+    initialPrograms = [program for program, uniforms in application.shaderVariants.values()]
+
+    drawTime = 0
+    for frame in range(frames):
+        moving.localMatrix = origin.dot(og_util.translationMatrix44(0.0, 0.0, 0.001 * (frame + 1 - frames)))
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        application.loadVAODynamicObjects()
+        start = time.time()
+        application.drawVBAs()
+        GL.glFinish()
+        drawTime += time.time() - start
+    # The shader variants of a grown block replace the initial ones
+    programs = [program for program, uniforms in application.shaderVariants.values()]
+    leaked = [program for program in initialPrograms if program not in programs and GL.glIsProgram(program)]
+    assert not leaked, 'programs %s of the initial block were not deleted' % leaked
+    image = application.framebuffer.readPixels().copy()
+    pixels = cubePixels(application, cubes)
+    capacity = application.modelData.capacity
+    application.offscreenContext.destroy()
+    return 1000 * drawTime / frames, capacity, image, pixels
+
+
+def report(count, grown, limited):
+    print 'Objects:                     %d, initial model matrix block %d' % (count, util.SceneGraph.MAX_NODES)
+    print 'Grown block:                 %8.2f ms per frame, %d matrices' % (grown[0], grown[1])
+    print 'Per draw past the block:     %8.2f ms per frame, %d matrices' % (limited[0], limited[1])
+
+
+def check(grown, limited):
+    '''
+    Both ways draw the same image, and something is drawn at the center of every cube.
+    '''
+    image, pixels = grown[2], grown[3]
+    assert np.array_equal(image, limited[2]), 'the images differ'
+    background = image[0, 0]
+    inside = (pixels >= 0) & (pixels < image.shape[:2])
+    assert inside.all(), 'the camera does not see all cubes'
+    drawn = (image[pixels[:, 0], pixels[:, 1]] != background).any(axis=1)
+    assert drawn.all(), '%d cubes are not drawn, the first in slot %d' % (
+        (~drawn).sum(), np.flatnonzero(~drawn)[0])
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    grown = run(count, frames)
+    limited = run(count, frames, util.SceneGraph.MAX_NODES)
+    report(count, grown, limited)
+    check(grown, limited)
@@ -0,0 +1,48 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures how the parallel OBJ parser scales with the number of worker processes.
+
+Usage:
+python benchmarks/ObjParallelBenchmark.py [triangles]
+'''
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import util.ObjLoader
+from ObjParserBenchmark import writeSyntheticOBJ
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    tempDir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tempDir, 'synthetic.obj')
+        writeSyntheticOBJ(filename, size)
+        print 'File: %.1f MB, %d CPUs' % (os.path.getsize(filename) / 1e6, multiprocessing.cpu_count())
+        print '%8s %10s %9s %11s' % ('workers', 'time s', 'speedup', 'efficiency')
+
+        reference = None
+        for workers in (1, 2, 4, 8, 16):
+            start = time.time()
+            mesh = util.ObjLoader.parseOBJ(filename, workers=workers)
+            seconds = time.time() - start
+            if reference is None:
+                reference, referenceSeconds = mesh, seconds
+            # Every worker count should produce exactly the same mesh
+            assert np.array_equal(mesh.positions, reference.positions)
+            assert np.array_equal(mesh.corners, reference.corners)
+            speedup = referenceSeconds / seconds
+            print '%8d %10.3f %8.2fx %10.0f%%' % (workers, seconds, speedup, 100 * speedup / workers)
+    finally:
+        shutil.rmtree(tempDir)
@@ -0,0 +1,133 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares the vectorized OBJ parser with the original line by line parser on synthetic OBJ files.
+
+Usage:
+python benchmarks/ObjParserBenchmark.py [triangles ...]
+'''
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.ObjLoader
+
+
+def writeSyntheticOBJ(filename, triangles):
+    '''
+    Writes a grid mesh of (at least) the given number of triangles using the v/vt/vn face syntax.
+    '''
+    side = int((triangles / 2) ** 0.5) + 1
+    with open(filename, 'w') as f:
+        f.write('# Synthetic grid %d x %d\n' % (side, side))
+        # Records grouped by tag, the way most exporters write them
+        for y in range(side + 1):
+            for x in range(side + 1):
+                f.write('v %f %f %f\n' % (x * 0.01, y * 0.01, ((x * y) % 7) * 0.001))
+        for y in range(side + 1):
+            for x in range(side + 1):
+                f.write('vt %f %f\n' % (float(x) / side, float(y) / side))
+        for i in range((side + 1) * (side + 1)):
+            f.write('vn 0.000000 0.000000 1.000000\n')
+        for y in range(side):
+            for x in range(side):
+                a = y * (side + 1) + x + 1
+                b = a + 1
+                c = a + side + 1
+                d = c + 1
+                f.write('f %d/%d/%d %d/%d/%d %d/%d/%d\n' % (a, a, a, b, b, b, d, d, d))
+                f.write('f %d/%d/%d %d/%d/%d %d/%d/%d\n' % (a, a, a, d, d, d, c, c, c))
+
+
+def legacyParse(filename, swapyz=False):
+    '''
+    The original line by line parser of util.SceneObject.OBJ, kept as a reference.
+    '''
+    OBJvertices = []
+    OBJnormals = []
+    OBJtexCoords = []
+    faces = []
+    material = None
+    for line in open(filename, "r"):
+        if line.startswith('#'): continue
+        values = line.split()
+        if not values: continue
+        if values[0] == 'v':
+            v = map(float, values[1:4])
+            if swapyz:
+                v = v[0], v[2], v[1]
+            OBJvertices.append(v)
+        elif values[0] == 'vn':
+            v = map(float, values[1:4])
+            if swapyz:
+                v = v[0], v[2], v[1]
+            OBJnormals.append(v)
+        elif values[0] == 'vt':
+            OBJtexCoords.append(map(float, values[1:3]))
+        elif values[0] in ('usemtl', 'usemat'):
+            material = values[1]
+        elif values[0] == 'f':
+            face = []
+            texcoords = []
+            norms = []
+            for v in values[1:]:
+                w = v.split('/')
+                face.append(int(w[0]))
+                if len(w) >= 2 and len(w[1]) > 0:
+                    texcoords.append(int(w[1]))
+                else:
+                    texcoords.append(0)
+                if len(w) >= 3 and len(w[2]) > 0:
+                    norms.append(int(w[2]))
+                else:
+                    norms.append(0)
+            faces.append((face, norms, texcoords, material))
+
+    vertices = []
+    normals = []
+    triangleIndices = []
+    ind = 0
+    for faceVerts, faceNorms, faceTexCoords, faceMaterial in faces:
+        for i in range(0, 3):
+            vertices.extend(OBJvertices[faceVerts[i] - 1])
+            vertices.append(1.0)
+            normals.extend(OBJnormals[faceNorms[i] - 1])
+            triangleIndices.append(ind)
+            ind += 1
+    return vertices, normals, triangleIndices
+
+
+def vectorizedParse(filename, swapyz=False):
+    mesh = util.ObjLoader.parseOBJ(filename, swapyz)
+    return util.ObjLoader.buildVertexArrays(mesh)
+
+
+def timeIt(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+    tempDir = tempfile.mkdtemp()
+    try:
+        print '%12s %12s %12s %12s %9s' % ('triangles', 'file MB', 'legacy s', 'vectorized s', 'speedup')
+        for size in sizes:
+            filename = os.path.join(tempDir, 'synthetic_%d.obj' % size)
+            writeSyntheticOBJ(filename, size)
+            megaBytes = os.path.getsize(filename) / 1e6
+            legacyTime, legacy = timeIt(legacyParse, filename)
+            vectorizedTime, vectorized = timeIt(vectorizedParse, filename)
+            # Both parsers should produce the same vertex data
+            assert len(legacy[0]) == vectorized[0].size
+            print '%12d %12.1f %12.3f %12.3f %8.1fx' % (len(vectorized[3]) / 3, megaBytes, legacyTime,
+                                                       vectorizedTime, legacyTime / vectorizedTime)
+    finally:
+        shutil.rmtree(tempDir)
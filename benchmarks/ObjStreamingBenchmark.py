@@ -0,0 +1,62 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures the peak memory (RSS) of streaming a large synthetic OBJ file through util.ObjLoader.iterOBJChunks
+for different chunk sizes, compared with parsing the whole file at once.
+Every measurement runs in a fresh interpreter so the peaks do not influence each other.
+
+Usage:
+python benchmarks/ObjStreamingBenchmark.py [triangles]
+'''
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.ObjLoader
+from ObjParserBenchmark import writeSyntheticOBJ
+
+
+def measure(filename, chunkSize):
+    '''
+    Streams the file (chunkSize > 0) or parses it at once (chunkSize == 0) and counts the triangles.
+    '''
+    start = time.time()
+    triangles = 0
+    if chunkSize:
+        for chunk in util.ObjLoader.iterOBJChunks(filename, chunkSize=chunkSize):
+            triangles += chunk.triangleCount
+    else:
+        triangles = util.ObjLoader.parseOBJ(filename, chunkSize=os.path.getsize(filename)).triangleCount
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+    print '%d %f %f' % (triangles, peak, time.time() - start)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    tempDir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tempDir, 'synthetic.obj')
+        writeSyntheticOBJ(filename, size)
+        print 'File: %.1f MB' % (os.path.getsize(filename) / 1e6)
+        print '%12s %12s %12s %10s' % ('chunk MB', 'triangles', 'peak RSS MB', 'time s')
+        for chunkSize in (0, 64 << 20, 16 << 20, 4 << 20, 1 << 20):
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--measure',
+                                              filename, str(chunkSize)])
+            triangles, peak, seconds = output.split()
+            label = '%12.0f' % (chunkSize / 1048576.) if chunkSize else '%12s' % 'whole file'
+            print '%s %12s %12.1f %10.3f' % (label, triangles, float(peak), float(seconds))
+    finally:
+        shutil.rmtree(tempDir)
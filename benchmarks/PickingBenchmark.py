@@ -0,0 +1,121 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures mouse picking with the bounding volume hierarchy of util.Picking on a terrain mesh (a bumpy grid)
+with the given number of triangles: building and refitting the hierarchy, and picking random window positions
+through the camera of GlApplication. The picks are compared with intersecting all triangles, which also have
+to find the same triangles.
+
+Usage:
+python benchmarks/PickingBenchmark.py [triangles] [picks]
+'''
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OpenGlUtilities as og_util
+import util.Picking
+import util.SceneObject
+from util.vec3 import vec3
+
+DISPLAY_SIZE = (800, 600)
+
+
+class Terrain(util.SceneObject.SceneObject):
+    '''
+    A grid of size x size cells (two triangles each) between -10 and 10, with hills.
+    '''
+
+    def __init__(self, size):
+        super(Terrain, self).__init__()
+        coordinates = np.linspace(-10, 10, size + 1)
+        x, y = np.meshgrid(coordinates, coordinates)
+        z = np.sin(x) * np.cos(0.7 * y)
+        vertices = np.column_stack((x.ravel(), y.ravel(), z.ravel(), np.ones(x.size))).astype(np.float32)
+        corner = (np.arange(size)[:, np.newaxis] * (size + 1) + np.arange(size)).ravel()
+        triangles = np.column_stack((corner, corner + 1, corner + size + 2,
+                                     corner, corner + size + 2, corner + size + 1)).astype(np.uint32)
+        self._vertices.extend(vertices.ravel())
+        self._triangleIndices.extend(triangles.ravel())
+
+
+def perspectiveMatrix():
+    '''
+    The perspective projection of GlApplication.
+    '''
+    zNear, zFar = 0.1, 1000.0
+    matrix = np.zeros((4, 4), dtype=np.float32)
+    matrix[0, 0] = 1.0
+    matrix[1, 1] = float(DISPLAY_SIZE[0]) / DISPLAY_SIZE[1]
+    matrix[2, 2] = (zFar + zNear) / (zNear - zFar)
+    matrix[3, 2] = (2 * zFar * zNear) / (zNear - zFar)
+    matrix[2, 3] = -1.0
+    return matrix
+
+
+def run(triangles, picks):
+    '''
+    :return: Dictionary with the results
+    '''
+    terrain = Terrain(max(int(math.sqrt(triangles / 2)), 1))
+    objects = [terrain]
+    matrices = np.identity(4)[np.newaxis]
+    viewProjection = og_util.lookAtMatrix44(vec3(10, 10, 10), vec3(0, 0, 0), vec3(0, 0, 1)).dot(perspectiveMatrix())
+    random = np.random.RandomState(1)
+    positions = random.randint(0, DISPLAY_SIZE[0], picks), random.randint(0, DISPLAY_SIZE[1], picks)
+    rays = [util.Picking.unproject(viewProjection, position, DISPLAY_SIZE) for position in zip(*positions)]
+
+    picker = util.Picking.Picker()
+    start = timeit.default_timer()
+    picker.hierarchy(terrain)
+    build = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    results = [picker.pick(objects, matrices, origin, direction) for origin, direction in rays]
+    pick = (timeit.default_timer() - start) / picks
+
+    corners = util.Picking.triangleCorners(terrain).astype(np.float64)
+    start = timeit.default_timer()
+    expected = [util.Picking.intersectTriangles(corners, origin, direction) for origin, direction in rays]
+    bruteForce = (timeit.default_timer() - start) / picks
+    for result, distances in zip(results, expected):
+        nearest = distances.argmin()
+        if np.isinf(distances[nearest]):
+            assert result is None
+        else:
+            assert result is not None and abs(result.distance - distances[nearest]) < 1e-4
+
+    # Raising the terrain moves all triangles, the hierarchy is refitted
+    terrain.vertices[2::4] = terrain.vertices[2::4] + 0.5
+    start = timeit.default_timer()
+    picker.hierarchy(terrain)
+    refit = timeit.default_timer() - start
+    assert picker.builds == 1 and picker.refits == 1
+
+    bvh = picker.hierarchy(terrain)
+    return {'triangles': bvh.triangleCount, 'nodes': bvh.nodeCount, 'depth': len(bvh.depths),
+            'build': build, 'refit': refit, 'pick': pick, 'bruteForce': bruteForce,
+            'hits': sum(result is not None for result in results)}
+
+
+def report(result):
+    print 'Triangles:            %d' % result['triangles']
+    print 'Nodes:                %d, depth %d' % (result['nodes'], result['depth'])
+    print 'Build:                %8.1f ms' % (1000 * result['build'])
+    print 'Refit:                %8.1f ms' % (1000 * result['refit'])
+    print 'Pick:                 %8.2f ms' % (1000 * result['pick'])
+    print 'Pick, all triangles:  %8.2f ms' % (1000 * result['bruteForce'])
+    print 'Hits:                 %d' % result['hits']
+
+
+if __name__ == '__main__':
+    triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    picks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    report(run(triangles, picks))
@@ -0,0 +1,135 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Times the CPU side of the render pipeline of GlApplication without OpenGl: the GL calls go to the
+RecordingGL backend of util.GlBackend, which counts them. Measures loading the level VAO (with the background
+loaded lucy model) once, and loadVAODynamicObjects, drawVBAs and drawHUD per frame, with the plant growing
+every growEvery frames and the cube moving every frame (which only uploads its model matrix). The recorded calls are checked against the call count budgets below, the exit code
+is 1 when a budget is exceeded so the script can be used as a regression check.
+
+Usage:
+python benchmarks/RenderPipelineBenchmark.py [frames] [growEvery]
+'''
+import collections
+import os
+import sys
+import time
+import timeit
+
+# The backend is chosen when util.GlBackend is first imported
+os.environ['PYTHONOPENGL_GL'] = 'recording'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+
+import util.GlBackend
+import util.OpenGlUtilities as og_util
+import util.SceneObject
+import GlApplication
+
+# Maximum GL calls and draw calls per phase and frame (for the level VAO: for the build)
+BUDGETS = {
+    # The build points the instance inputs of the VAO at the first instance record
+    'loadVAOStaticObjects': {'calls': 53, 'drawCalls': 0},
+    'loadVAODynamicObjects': {'calls': 12, 'drawCalls': 0},
+    # One (instanced) draw per scene object, the first frame uploads all model matrices
+    # The instance inputs are not pointed again, the draws start at the instance records of the objects
+    'drawVBAs': {'calls': 18, 'drawCalls': 4},
+    'drawHUD': {'calls': 18, 'drawCalls': 1},
+}
+
+PHASES = ('loadVAODynamicObjects', 'drawVBAs', 'drawHUD')
+
+
+def run(frames, growEvery):
+    '''
+    :return: List of (phase, seconds per frame, FrameRecord per frame), the level VAO build as first entry
+    '''
+    gl = util.GlBackend.GL
+    pygame.font.init()
+    application = GlApplication.GlApplication()
+    application.initOpenGl()
+    application.lookAtCamera()
+    while application.assetLoader.pendingCount > 0:
+        application.assetLoader.processReady()
+        time.sleep(0.01)
+    # The first frame creates the actors buffers
+    application.loadVAODynamicObjects()
+    gl.endFrame()
+
+    # Build the level VAO from scratch, with the lucy model
+    application.levelBuffers.delete()
+    application.levelBuffers = None
+    start = timeit.default_timer()
+    application.loadVAOStaticObjects()
+    results = [('loadVAOStaticObjects', [timeit.default_timer() - start], [gl.endFrame()])]
+
+    plants = [obj for obj in application.dynamicObjects if isinstance(obj, util.SceneObject.PlantSceneObject)]
+    cubes = [obj for obj in application.dynamicObjects if isinstance(obj, util.SceneObject.Cube)]
+    times = dict((phase, []) for phase in PHASES)
+    records = dict((phase, []) for phase in PHASES)
+    for frame in range(frames):
+        if frame % growEvery == 0:
+            for plant in plants:
+                plant.grow()
+        for cube in cubes:
+            cube.localMatrix = og_util.translationMatrix44(0.01 * frame, 0.0, 0.0)
+        for phase in PHASES:
+            function = getattr(application, phase)
+            start = timeit.default_timer()
+            function()
+            times[phase].append(timeit.default_timer() - start)
+            records[phase].append(gl.endFrame())
+    for phase in PHASES:
+        results.append((phase, times[phase], records[phase]))
+    application.assetLoader.close()
+    return results
+
+
+def report(results):
+    '''
+    Prints the results and checks the budgets.
+    :return: Number of exceeded budgets
+    '''
+    exceeded = 0
+    print '%-22s %10s %10s %10s %12s %10s' % ('phase', 'ms', 'calls', 'max calls', 'bytes', 'draws')
+    for phase, times, records in results:
+        calls = [record.callCount for record in records]
+        print '%-22s %10.3f %10.1f %10d %12.0f %10.1f' % (
+            phase, 1000 * sum(times) / len(times), float(sum(calls)) / len(calls), max(calls),
+            float(sum(record.bytesUploaded for record in records)) / len(records),
+            float(sum(record.drawCalls for record in records)) / len(records))
+        budget = BUDGETS.get(phase)
+        if budget is None:
+            continue
+        if max(calls) > budget['calls']:
+            print '  over budget: %d calls, budget %d' % (max(calls), budget['calls'])
+            exceeded += 1
+        draws = max(record.drawCalls for record in records)
+        if draws > budget['drawCalls']:
+            print '  over budget: %d draw calls, budget %d' % (draws, budget['drawCalls'])
+            exceeded += 1
+    return exceeded
+
+
+def mostFrequent(results, count=10):
+    '''
+    Prints the most frequent GL functions per frame.
+    '''
+    for phase, times, records in results[1:]:
+        total = sum((record.calls for record in records), collections.Counter())
+        print '%s:' % phase, ', '.join('%s %.1f' % (name, float(n) / len(records))
+                                       for name, n in total.most_common(count))
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    growEvery = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    results = run(frames, growEvery)
+    exceeded = report(results)
+    mostFrequent(results)
+    sys.exit(1 if exceeded else 0)
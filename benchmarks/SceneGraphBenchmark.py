@@ -0,0 +1,141 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares calculating the world matrices of a transform hierarchy: a recursive walk that multiplies the
+matrices object by object against util.SceneGraph.
+The hierarchy is a tree of cubes with the given depth and number of children per object, every frame a
+child of the root moves with all its descendants. Also prints the bytes a move uploads: the model matrices
+that changed against uploading the vertex data of the moved objects again.
+Then prints the crossover of the two ways util.SceneGraph updates a move: the subtrees of the moved objects
+object by object and the batched pass, for trees of increasing depth. The graph walks object by object below
+util.SceneGraph.BATCH_NODES objects.
+
+Usage:
+python benchmarks/SceneGraphBenchmark.py [depth] [children] [frames]
+'''
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OpenGlUtilities as og_util
+import util.SceneGraph
+import util.SceneObject
+import util.Uniforms
+
+
+def buildTree(depth, children):
+    '''
+    :return: List of all objects, the root first
+    '''
+    root = util.SceneObject.Cube()
+    objects = [root]
+    level = [root]
+    for d in range(1, depth):
+        nextLevel = []
+        for parent in level:
+            for c in range(children):
+                child = util.SceneObject.Cube()
+                child.localMatrix = og_util.translationMatrix44(c, 0.0, 1.0)
+                parent.addChild(child)
+                nextLevel.append(child)
+        objects.extend(nextLevel)
+        level = nextLevel
+    return objects
+
+
+def recursiveWorldMatrices(obj, parentMatrix, result):
+    '''
+    The world matrices object by object, like a scene graph without flat arrays.
+    '''
+    matrix = obj.localMatrix if parentMatrix is None else obj.localMatrix.dot(parentMatrix)
+    result[obj] = matrix
+    for child in obj.children:
+        recursiveWorldMatrices(child, matrix, result)
+
+
+def vertexBytes(obj):
+    '''
+    Bytes of the vertex coordinates, colors and normals of an object and its descendants.
+    '''
+    total = (len(obj.vertices) + len(obj.colors) + len(obj.normals)) * 4
+    return total + sum(vertexBytes(child) for child in obj.children)
+
+
+def run(depth, children, frames):
+    '''
+    :return: (objects, ms recursive, ms batched, matrix bytes per move, vertex bytes per move) per frame
+    '''
+    objects = buildTree(depth, children)
+    root = objects[0]
+    # A child of the root, its descendants move along
+    moving = objects[1]
+
+    start = timeit.default_timer()
+    for frame in range(frames):
+        moving.localMatrix = og_util.translationMatrix44(0.01 * frame, 0.0, 1.0)
+        recursiveWorldMatrices(root, None, {})
+    recursive = timeit.default_timer() - start
+
+    graph = util.SceneGraph.SceneGraph(capacity=len(objects))
+    graph.update([root])
+    matrixBytes = 0
+    start = timeit.default_timer()
+    for frame in range(frames):
+        moving.localMatrix = og_util.translationMatrix44(0.01 * frame, 0.0, 1.0)
+        changed = graph.update([root])
+        matrixBytes += sum(end - begin for begin, end in changed) * util.Uniforms.MATRIX_SIZE
+    batched = timeit.default_timer() - start
+
+    # Check the batched result against the recursive one
+    expected = {}
+    recursiveWorldMatrices(root, None, expected)
+    for obj in objects:
+        assert np.allclose(graph.worldMatrix(obj), expected[obj], atol=1e-4)
+
+    return (len(objects), 1000 * recursive / frames, 1000 * batched / frames,
+            float(matrixBytes) / frames, vertexBytes(moving))
+
+
+def report(result):
+    objects, recursive, batched, matrixBytes, meshBytes = result
+    print 'Objects:                     %d' % objects
+    print 'Recursive world matrices:    %8.3f ms per frame' % recursive
+    print 'Scene graph world matrices:  %8.3f ms per frame' % batched
+    print 'Bytes per move, matrices:    %8.0f' % matrixBytes
+    print 'Bytes per move, vertex data: %8d' % meshBytes
+
+
+def crossover(children, frames, maxObjects=2000):
+    '''
+    Prints the time per frame of both update paths of the scene graph for trees of increasing depth.
+    '''
+    batchNodes = util.SceneGraph.BATCH_NODES
+    print '%8s %12s %14s %12s  %s' % ('objects', 'recursive', 'object by obj', 'batched', 'scene graph uses')
+    depth = 2
+    while children ** (depth - 1) <= maxObjects:
+        # Timings are the fastest of a few runs, the small trees take microseconds
+        util.SceneGraph.BATCH_NODES = maxObjects * children
+        walked = [run(depth, children, frames) for i in range(3)]
+        util.SceneGraph.BATCH_NODES = 0
+        batched = [run(depth, children, frames) for i in range(3)]
+        util.SceneGraph.BATCH_NODES = batchNodes
+        objects = walked[0][0]
+        print '%8d %12.4f %14.4f %12.4f  %s' % (objects, min(r[1] for r in walked + batched),
+                                               min(r[2] for r in walked), min(r[2] for r in batched),
+                                               'batched' if objects >= batchNodes else 'object by object')
+        depth += 1
+
+
+if __name__ == '__main__':
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    children = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    frames = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    report(run(depth, children, frames))
+    print
+    crossover(children, frames)
@@ -0,0 +1,69 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares the memory footprint per plant part of the scene object storage:
+the original Python lists of floats against the GrowableArray NumPy storage.
+The plant geometry is stored once, every part is an instance record.
+
+Usage:
+python benchmarks/SceneObjectMemoryBenchmark.py [parts]
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.SceneObject
+
+
+def listFootprint(values):
+    '''
+    Bytes used by a list and the (distinct) objects it references.
+    '''
+    seen = set()
+    total = sys.getsizeof(values)
+    for value in values:
+        if id(value) not in seen:
+            seen.add(id(value))
+            total += sys.getsizeof(value)
+    return total
+
+
+def arrayFootprint(values):
+    '''
+    Bytes used by a GrowableArray, including the unused capacity of its buffer.
+    '''
+    return sys.getsizeof(values) + values.capacity * values.dtype.itemsize
+
+
+def growPlant(parts, useLists):
+    random.seed(1)
+    plant = util.SceneObject.PlantSceneObject(1.5)
+    if useLists:
+        # The original storage: Python lists of boxed floats and ints
+        plant._vertices = list(plant._vertices.array.tolist())
+        plant._normals = list(plant._normals.array.tolist())
+        plant._colors = list(plant._colors.array.tolist())
+        plant._triangleIndices = list(plant._triangleIndices.array.tolist())
+        plant._instances = list(plant._instances.array.tolist())
+    for i in range(parts - 1):
+        plant.grow()
+    return plant
+
+
+if __name__ == '__main__':
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print '%-8s %10s %10s %14s %10s' % ('storage', 'parts', 'MB', 'bytes/part', 'build s')
+    for useLists in (True, False):
+        start = time.time()
+        plant = growPlant(parts, useLists)
+        seconds = time.time() - start
+        footprint = listFootprint if useLists else arrayFootprint
+        total = sum(footprint(data) for data in (plant.vertices, plant.normals, plant.colors, plant.triangleIndices,
+                                                 plant.instances))
+        print '%-8s %10d %10.1f %14.1f %10.3f' % ('lists' if useLists else 'arrays', len(plant.parts), total / 1e6,
+                                                 float(total) / len(plant.parts), seconds)
@@ -0,0 +1,105 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares building the shader variants of the main shader (fog of war off and on) at startup:
+compiling and linking them (empty shader cache) against loading the linked program binaries from the
+shader cache. The cache is kept in a temporary directory. Note that the driver may have its own shader
+cache (e.g. Mesa, disable it with MESA_SHADER_CACHE_DISABLE=true for cold compile times).
+Also checks that the variants are still built when the cache directory can not be written.
+Creates an offscreen OpenGl context (util.OffscreenContext), no display is needed.
+
+Usage:
+python benchmarks/ShaderCacheBenchmark.py [repeats]
+'''
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+from OpenGL import GL
+
+import util.ShaderCache
+
+SHADER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shaders')
+
+VARIANTS = (None, {"FOG": 1})
+
+
+def buildVariants(cache):
+    '''
+    :return: Seconds to build all variants
+    '''
+    start = timeit.default_timer()
+    programs = [cache.program(os.path.join(SHADER_DIRECTORY, "VertexShader.glsl"),
+                              os.path.join(SHADER_DIRECTORY, "FragmentShader.glsl"), defines)
+                for defines in VARIANTS]
+    GL.glFinish()
+    seconds = timeit.default_timer() - start
+    for program in programs:
+        GL.glDeleteProgram(program)
+    return seconds
+
+
+def run(repeats):
+    '''
+    Runs the measurements in the current OpenGl context.
+    :return: (milliseconds for the first compile, fastest compile, fastest load from the cache, ShaderCache)
+    '''
+    directory = tempfile.mkdtemp()
+    try:
+        cache = util.ShaderCache.ShaderCache(directory)
+        if not cache.binarySupported:
+            print 'The driver does not support program binaries, the variants are always compiled'
+        compiled = []
+        loaded = []
+        for repeat in range(repeats):
+            cache.clear()
+            compiled.append(buildVariants(cache))
+            loaded.append(buildVariants(cache))
+        return 1000 * compiled[0], 1000 * min(compiled), 1000 * min(loaded), cache
+    finally:
+        shutil.rmtree(directory)
+
+
+def checkUnwritable():
+    '''
+    A cache directory that can not be created (it would be inside a file) must not stop building the variants:
+    every variant is compiled, nothing is stored.
+    '''
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        cache = util.ShaderCache.ShaderCache(os.path.join(path, 'shaders'))
+        for defines in VARIANTS:
+            program = cache.program(os.path.join(SHADER_DIRECTORY, "VertexShader.glsl"),
+                                    os.path.join(SHADER_DIRECTORY, "FragmentShader.glsl"), defines)
+            assert GL.glGetProgramiv(program, GL.GL_LINK_STATUS)
+            GL.glDeleteProgram(program)
+        assert cache.hits == 0 and cache.entries() == []
+    finally:
+        os.remove(path)
+
+
+def report(result):
+    first, compiled, loaded, cache = result
+    print 'Variants:             %d' % len(VARIANTS)
+    print 'First compile:        %8.2f ms' % first
+    print 'Compile and link:     %8.2f ms' % compiled
+    print 'Load from the cache:  %8.2f ms' % loaded
+    print 'Cache hits / misses:  %d / %d' % (cache.hits, cache.misses)
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    context = util.OffscreenContext.OffscreenContext()
+    report(run(repeats))
+    checkUnwritable()
+    context.destroy()
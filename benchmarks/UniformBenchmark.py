@@ -0,0 +1,153 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Compares the per frame cost of setting the uniforms of the main shader for the level and the actors VAO:
+the original code (np.reshape and a glUniform call per uniform, for every VAO) against the FrameData
+uniform block and the uniform cache of util.Uniforms. Measured with a camera that stands still and with a
+camera that moves every frame. The original uniforms are declared by replacing the block in the shader.
+Creates an offscreen OpenGl context (util.OffscreenContext), no display is needed.
+
+Usage:
+python benchmarks/UniformBenchmark.py [frames]
+'''
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+from OpenGL import GL
+from OpenGL.GL.shaders import compileShader, compileProgram
+
+import numpy as np
+
+import util.OpenGlUtilities as og_util
+import util.ShaderCache
+import util.Uniforms
+
+SHADER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shaders')
+
+FRAME_DATA_FIELDS = (("perspectiveMatrix", "mat4"), ("cameraMatrix", "mat4"), ("lightingMatrix", "mat3"),
+                     ("lightIntensity", "vec4"), ("ambientIntensity", "vec4"), ("lightPos", "vec3"))
+
+LIGHT_POSITION = (10.866, 5, -15.001)
+
+# Number of VAOs drawn per frame, the original code sets all uniforms for each of them
+VAO_COUNT = 2
+
+
+def linkProgram(vertexShader):
+    fragmentShader = open(os.path.join(SHADER_DIRECTORY, "FragmentShader.glsl")).read()
+    return compileProgram(compileShader(vertexShader, GL.GL_VERTEX_SHADER),
+                          compileShader(fragmentShader, GL.GL_FRAGMENT_SHADER))
+
+
+def legacyProgram():
+    '''
+    The main shader with the FrameData block replaced by plain uniforms, like before the block existed.
+    '''
+    source = util.ShaderCache.variantSource(open(os.path.join(SHADER_DIRECTORY, "VertexShader.glsl")).read(),
+                                            {"FOG": 1})
+    declarations = ''.join('uniform %s %s;\n' % (glslType, name) for name, glslType in FRAME_DATA_FIELDS)
+    declarations += 'uniform bool fogActive;\n'
+    return linkProgram(re.sub(r'layout\(std140\) uniform FrameData\s*\{[^}]*\};', declarations, source))
+
+
+def cameraMatrices(frames, moving):
+    matrices = []
+    for frame in range(frames):
+        x = 0.01 * frame if moving else 0.0
+        matrices.append(og_util.translationMatrix44(x, -3.0, 3.0))
+    return matrices
+
+
+def legacyFrames(program, perspectiveMatrix, cameras):
+    unif = dict((name, GL.glGetUniformLocation(program, name)) for name, glslType in FRAME_DATA_FIELDS)
+    playerPositionUnif = GL.glGetUniformLocation(program, "playerPosition")
+    fogActiveUnif = GL.glGetUniformLocation(program, "fogActive")
+    GL.glUseProgram(program)
+    calls = 0
+    start = time.time()
+    for cameraMatrix in cameras:
+        for vao in range(VAO_COUNT):
+            GL.glUniformMatrix4fv(unif["perspectiveMatrix"], 1, GL.GL_FALSE, np.reshape(perspectiveMatrix, (16)))
+            GL.glUniformMatrix4fv(unif["cameraMatrix"], 1, GL.GL_FALSE, np.reshape(cameraMatrix, (16)))
+            lightMatrix = cameraMatrix[:3, :3]
+            GL.glUniformMatrix3fv(unif["lightingMatrix"], 1, GL.GL_FALSE, np.reshape(lightMatrix, (9)))
+            GL.glUniform3f(unif["lightPos"], LIGHT_POSITION[0], LIGHT_POSITION[1], LIGHT_POSITION[2])
+            GL.glUniform4f(unif["lightIntensity"], 0.8, 0.8, 0.8, 1.0)
+            GL.glUniform4f(unif["ambientIntensity"], 0.2, 0.2, 0.2, 1.0)
+            GL.glUniform4f(playerPositionUnif, 0.0, 0.0, 0.0, 1.0)
+            calls += 7
+            if vao == 0:
+                GL.glUniform1i(fogActiveUnif, 0)
+                calls += 1
+    GL.glFinish()
+    seconds = time.time() - start
+    GL.glUseProgram(0)
+    return seconds, calls
+
+
+def managedFrames(program, perspectiveMatrix, cameras):
+    frameData = util.Uniforms.UniformBlock(FRAME_DATA_FIELDS)
+    frameData.attach(program, "FrameData")
+    uniforms = util.Uniforms.UniformCache(program)
+    playerPositionUnif = uniforms.location("playerPosition")
+    GL.glUseProgram(program)
+    start = time.time()
+    for cameraMatrix in cameras:
+        frameData.set("perspectiveMatrix", perspectiveMatrix)
+        frameData.set("cameraMatrix", cameraMatrix)
+        frameData.set("lightingMatrix", cameraMatrix[:3, :3])
+        frameData.set("lightPos", LIGHT_POSITION)
+        frameData.set("lightIntensity", (0.8, 0.8, 0.8, 1.0))
+        frameData.set("ambientIntensity", (0.2, 0.2, 0.2, 1.0))
+        frameData.upload()
+        uniforms.set4f(playerPositionUnif, 0.0, 0.0, 0.0, 1.0)
+    GL.glFinish()
+    seconds = time.time() - start
+    GL.glUseProgram(0)
+    frameData.delete()
+    return seconds, frameData.calls + uniforms.calls
+
+
+def run(frames):
+    '''
+    Runs the measurements in the current OpenGl context.
+    :return: List of (camera, legacy ms, legacy calls, managed ms, managed calls) per frame
+    '''
+    perspectiveMatrix = np.identity(4, dtype=np.float32)
+    legacy = legacyProgram()
+    # The fog variant, it has the most uniforms
+    managed = linkProgram(util.ShaderCache.variantSource(
+        open(os.path.join(SHADER_DIRECTORY, "VertexShader.glsl")).read(), {"FOG": 1}))
+    results = []
+    for moving in (False, True):
+        cameras = cameraMatrices(frames, moving)
+        legacySeconds, legacyCalls = legacyFrames(legacy, perspectiveMatrix, cameras)
+        managedSeconds, managedCalls = managedFrames(managed, perspectiveMatrix, cameras)
+        results.append(('moving' if moving else 'still',
+                        1000 * legacySeconds / frames, float(legacyCalls) / frames,
+                        1000 * managedSeconds / frames, float(managedCalls) / frames))
+    GL.glDeleteProgram(legacy)
+    GL.glDeleteProgram(managed)
+    return results
+
+
+def report(results):
+    print '%8s %12s %14s %12s %14s' % ('camera', 'legacy ms', 'legacy calls', 'managed ms', 'managed calls')
+    for camera, legacyMs, legacyCalls, managedMs, managedCalls in results:
+        print '%8s %12.4f %14.1f %12.4f %14.1f' % (camera, legacyMs, legacyCalls, managedMs, managedCalls)
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    context = util.OffscreenContext.OffscreenContext()
+    report(run(frames))
+    context.destroy()
@@ -0,0 +1,141 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Measures the time to load scene object data into GPU buffers, against the vertex count:
+the original path (concatenating Python lists, unpacking them into a ctypes array and glBufferData)
+and util.VertexBuffer.SceneBuffers.update as used by loadVAOStaticObjects / loadVAODynamicObjects
+(contiguous NumPy arrays handed to glBufferSubData as they are). The buffers of SceneBuffers are read
+back and compared with the original data.
+Renders in an offscreen context (util.OffscreenContext), no display is needed.
+
+Usage:
+python benchmarks/VertexUploadBenchmark.py [vertices ...]
+'''
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import util.OffscreenContext
+util.OffscreenContext.selectPlatform('egl')
+
+import numpy as np
+from OpenGL import GL
+
+import util.GlState as gl_state
+import util.SceneObject
+import util.VertexBuffer
+from util.GrowableArray import GrowableArray
+
+
+def makeSceneObjects(vertices, objects=4):
+    '''
+    Returns scene objects with random data and the given total number of vertices.
+    '''
+    sceneObjects = []
+    for i in range(objects):
+        count = vertices // objects
+        obj = util.SceneObject.SceneObject()
+        obj._vertices = GrowableArray(np.float32, np.random.rand(count * 4))
+        obj._colors = GrowableArray(np.float32, np.random.rand(count * 4))
+        obj._normals = GrowableArray(np.float32, np.random.rand(count * 3))
+        obj._triangleIndices = GrowableArray(np.uint32, np.random.randint(0, count, count * 2))
+        sceneObjects.append(obj)
+    return sceneObjects
+
+
+def legacyPrepare(sceneObjects):
+    '''
+    The original preparation of loadVAOStaticObjects / loadVAODynamicObjects.
+    '''
+    vertexData = []
+    colorData = []
+    normalsData = []
+    elementData = []
+    elemOffset = 0
+    for obj in sceneObjects:
+        vertexData.extend(obj.vertices)
+        colorData.extend(obj.colors)
+        normalsData.extend(obj.normals)
+        for elem in obj.triangleIndices:
+            elementData.append(elem + elemOffset)
+        elemOffset += obj.vertexCount
+    vertexData.extend(colorData)
+    vertexData.extend(normalsData)
+    vertices = (ctypes.c_float * len(vertexData))(*vertexData)
+    elements = (ctypes.c_int * len(elementData))(*elementData)
+    return vertices, elements
+
+
+def legacyUpload(sceneObjects):
+    '''
+    The original upload: the prepared arrays in new buffers.
+    '''
+    vertices, elements = legacyPrepare(sceneObjects)
+    vertexBuffer, elementBuffer = GL.glGenBuffers(2)
+    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertexBuffer)
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, ctypes.sizeof(vertices), vertices, GL.GL_STATIC_DRAW)
+    GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, elementBuffer)
+    GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, ctypes.sizeof(elements), elements, GL.GL_STATIC_DRAW)
+    GL.glFinish()
+    GL.glDeleteBuffers(2, [vertexBuffer, elementBuffer])
+    # The bindings were changed behind the back of the GL state tracker
+    gl_state.invalidate()
+    return vertices, elements
+
+
+def sceneBuffersUpload(sceneObjects):
+    '''
+    The upload of the application: SceneBuffers.update in the vertex array object.
+    '''
+    buffers = util.VertexBuffer.SceneBuffers(GL.GL_STATIC_DRAW)
+    buffers.update(sceneObjects)
+    GL.glFinish()
+    return buffers
+
+
+def readBack(buffers):
+    '''
+    :return: Tuple (vertices, colors and normals one after the other, triangle indices) in the buffers
+    '''
+    floats = []
+    for buf in (buffers.vertexBuffer, buffers.colorBuffer, buffers.normalBuffer):
+        buf.bind()
+        floats.append(np.frombuffer(GL.glGetBufferSubData(buf.target, 0, buf.size), dtype=np.float32))
+    buffers.elementBuffer.bind()
+    elements = GL.glGetBufferSubData(GL.GL_ELEMENT_ARRAY_BUFFER, 0, buffers.elementBuffer.size)
+    return np.concatenate(floats), np.frombuffer(elements, dtype=np.uint32)
+
+
+def timeIt(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+    context = util.OffscreenContext.OffscreenContext()
+    vao = GL.glGenVertexArrays(1)
+    gl_state.bindVertexArray(vao)
+    print '%10s %12s %12s %10s %12s' % ('vertices', 'legacy ms', 'buffers ms', 'speedup', 'upload MB')
+    for size in sizes:
+        sceneObjects = makeSceneObjects(size)
+        legacyTime, legacy = timeIt(legacyUpload, sceneObjects)
+        buffersTime, buffers = timeIt(sceneBuffersUpload, sceneObjects)
+        # Both paths should produce the same buffer content
+        vertexData, elementData = readBack(buffers)
+        assert np.array_equal(np.frombuffer(legacy[0], dtype=np.float32), vertexData)
+        assert np.array_equal(np.frombuffer(legacy[1], dtype=np.int32), elementData.astype(np.int32))
+        megaBytes = (vertexData.nbytes + elementData.nbytes) / 1e6
+        print '%10d %12.2f %12.2f %9.0fx %12.1f' % (size, legacyTime * 1000, buffersTime * 1000,
+                                                   legacyTime / max(buffersTime, 1e-9), megaBytes)
+        buffers.delete()
+    gl_state.bindVertexArray(0)
+    GL.glDeleteVertexArrays(1, [vao])
+    gl_state.vertexArrayDeleted(vao)
+    context.destroy()
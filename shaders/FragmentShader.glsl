@@ -9,5 +9,9 @@ void main()
 	// TODO: Ideally color should be calculated in the fragment shader to avoid Interpolation
 	// http://www.arcsynthesis.org/gltut/Illumination/Tut10%20Interpolation.html
 
+	// Alpha test, in the shader so it also works in core profile contexts
+	if (interpColor.a <= 0.5)
+		discard;
+
 	outputColor = interpColor;
 }
\ No newline at end of file
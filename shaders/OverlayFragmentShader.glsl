@@ -0,0 +1,14 @@
+#version 330
+
+smooth in vec2 interpTexCoord;
+smooth in vec4 interpColor;
+
+out vec4 outputColor;
+
+// Texture atlas: white glyphs with the coverage in the alpha channel and a white block for solid shapes
+uniform sampler2D atlas;
+
+void main()
+{
+	outputColor = interpColor * texture(atlas, interpTexCoord);
+}
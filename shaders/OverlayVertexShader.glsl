@@ -0,0 +1,22 @@
+#version 330
+
+layout(location = 0) in vec2 anchor;
+layout(location = 1) in vec2 offset;
+layout(location = 2) in vec2 texCoord;
+layout(location = 3) in vec4 color;
+
+smooth out vec2 interpTexCoord;
+smooth out vec4 interpColor;
+
+// Size of the viewport in pixels
+uniform vec2 screenSize;
+
+void main()
+{
+	// The anchor is in normalized device coordinates, the offset in pixels (e.g. a glyph in a string)
+	// The anchor is rounded to a pixel so the glyphs map 1:1 on the screen pixels
+	vec2 pixel = floor((anchor + 1.0) * 0.5 * screenSize + 0.5) + offset;
+	gl_Position = vec4(pixel / screenSize * 2.0 - 1.0, 0.0, 1.0);
+	interpTexCoord = texCoord;
+	interpColor = color;
+}
@@ -3,30 +3,60 @@
 layout(location = 0) in vec4 position;
 layout(location = 1) in vec4 color;
 layout(location = 2) in vec3 normal;
+// Instance record (see SceneObject.addInstance): offset xyz and scale, color
+layout(location = 3) in vec4 instanceOffsetScale;
+layout(location = 4) in vec4 instanceColor;
 
 smooth out vec4 interpColor;
 
-// Camera & Perspective projection
-uniform mat4 perspectiveMatrix;
-uniform mat4 cameraMatrix;
+// Per frame data shared by all draws, one uniform buffer (see util/Uniforms.py)
+layout(std140) uniform FrameData
+{
+    // Camera & Perspective projection
+    mat4 perspectiveMatrix;
+    mat4 cameraMatrix;
+
+    // Lighting inputs
+    mat3 lightingMatrix;
+    vec4 lightIntensity;
+    vec4 ambientIntensity;
+    vec3 lightPos;
+};
 
-// Lighting inputs
-uniform vec3 lightPos;
-uniform vec4 lightIntensity;
-uniform vec4 ambientIntensity;
-uniform mat3 lightingMatrix;
+// World matrices of all scene objects, only the matrices of moved objects are uploaded (see util/SceneGraph.py)
+#ifndef MAX_MODEL_MATRICES
+#define MAX_MODEL_MATRICES 256
+#endif
+layout(std140) uniform ModelData
+{
+    mat4 modelMatrices[MAX_MODEL_MATRICES];
+};
 
-// Fog of war inputs
+// Slot of the drawn object in modelMatrices, set per draw
+uniform int modelIndex;
+// Model matrix of an object whose slot is past the end of modelMatrices, set per draw
+uniform mat4 overflowModelMatrix;
+
+// Fog of war inputs, only in the FOG variant (see util/ShaderCache.py)
+#ifdef FOG
 uniform vec4 playerPosition;
 uniform float fogDistance;
-uniform bool fogActive;
+#endif
 
 void main()
 {
-	vec4 camSpacePosition = cameraMatrix * position;
+	vec4 instancePosition = vec4(position.xyz * instanceOffsetScale.w + instanceOffsetScale.xyz * position.w,
+	                             position.w);
+	vec4 objectColor = color * instanceColor;
+
+	mat4 modelMatrix = overflowModelMatrix;
+	if (modelIndex < MAX_MODEL_MATRICES)
+		modelMatrix = modelMatrices[modelIndex];
+	vec4 worldPosition = modelMatrix * instancePosition;
+	vec4 camSpacePosition = cameraMatrix * worldPosition;
 	gl_Position = perspectiveMatrix * camSpacePosition;
 
-	vec3 camSpaceNormal = normalize(lightingMatrix * normal);
+	vec3 camSpaceNormal = normalize(lightingMatrix * mat3(modelMatrix) * normal);
 
     vec3 camSpaceLightPos = lightingMatrix * lightPos;
 
@@ -36,16 +66,16 @@ void main()
 	cosAngIncidence = clamp(cosAngIncidence, 0, 1);
 
     // Color coming from direct light
-	vec4 directLightColor = color * lightIntensity * cosAngIncidence;
+	vec4 directLightColor = objectColor * lightIntensity * cosAngIncidence;
 
 	// Color coming from ambient light
-	vec4 ambientLightColor = color * ambientIntensity;
+	vec4 ambientLightColor = objectColor * ambientIntensity;
 
     // Fog of war
     interpColor = directLightColor + ambientLightColor;
-    if ( fogActive == true)
+#ifdef FOG
     {
-        float myDist = distance(playerPosition, position);
+        float myDist = distance(playerPosition, worldPosition);
         float fullViewDist = fogDistance / 3;
         if ( myDist <= fullViewDist )
         {
@@ -62,6 +92,7 @@ void main()
             interpColor = vec4(0.0, 0.0, 0.0, 1.0);
         }
     }
+#endif
 
 	// Make sure final output is in [0:1]
 	interpColor = clamp(interpColor, 0, 1);
@@ -0,0 +1,127 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Background loading of assets.
+Parsing and preprocessing run in a pool of worker processes (or threads), the render thread only
+picks up the finished assets and does the OpenGl work, limited to a time budget per frame.
+'''
+import functools
+import multiprocessing
+import multiprocessing.pool
+import sys
+import time
+
+import util.MeshCache
+import util.ObjLoader
+import util.SceneObject
+
+# Default time in seconds the render thread may spend per frame on handling loaded assets
+DEFAULT_UPLOAD_BUDGET = 0.004
+
+
+def _warmOBJ(filename, swapyz, weld, useCache, workers):
+    '''
+    Worker function: parses the OBJ file into the mesh cache.
+    The result is pickled back to the render thread, so the arrays are only returned when they are not in the
+    cache, otherwise the render thread memory maps the cache entry (util.MeshCache) without copying.
+    :return: None when the arrays are in the mesh cache, otherwise the vertex arrays
+    '''
+    if useCache:
+        return util.MeshCache.getDefaultCache().warmOBJ(filename, swapyz, weld, workers)
+    return util.ObjLoader.loadVertexArrays(filename, swapyz, weld, workers)
+
+
+def _objReady(filename, swapyz, weld, useCache, workers, onReady, arrays):
+    '''
+    Builds the OBJ scene object on the render thread, from the arrays of the worker or the mesh cache.
+    '''
+    onReady(util.SceneObject.OBJ(filename, swapyz, weld, useCache, workers, arrays))
+
+
+class AssetLoader(object):
+
+    @property
+    def pendingCount(self):
+        '''
+        Number of assets that are still loading or waiting to be handled by the render thread
+        '''
+        return len(self._pending)
+
+    def __init__(self, workers=2, useProcesses=True, uploadBudget=DEFAULT_UPLOAD_BUDGET):
+        '''
+        Constructor, starts the worker pool.
+        Create the loader before an OpenGl context exists, worker processes should not inherit it.
+        :param workers: Number of workers in the pool
+        :param useProcesses: Use worker processes, otherwise threads (which share the GIL with the render thread)
+        :param uploadBudget: Seconds per frame the render thread may spend on handling loaded assets
+        '''
+        if useProcesses:
+            self._pool = multiprocessing.Pool(workers)
+        else:
+            self._pool = multiprocessing.pool.ThreadPool(workers)
+        self.uploadBudget = uploadBudget
+        # List of (future, onReady) in submission order
+        self._pending = []
+        # Number of assets of which the load failed
+        self.failedCount = 0
+
+    def load(self, function, args=(), onReady=None):
+        '''
+        Runs function(*args) in the worker pool.
+        :param onReady: Called with the result on the render thread, from processReady()
+        :return: Future (multiprocessing AsyncResult) with ready(), wait() and get()
+        '''
+        future = self._pool.apply_async(function, args)
+        self._pending.append((future, onReady))
+        return future
+
+    def loadOBJ(self, filename, onReady=None, swapyz=False, weld=True, useCache=True, workers=1):
+        '''
+        Parses an OBJ file in the worker pool, onReady gets the util.SceneObject.OBJ scene object.
+        The scene object is built on the render thread, its arrays are memory mapped from the mesh cache.
+        :return: Future of the vertex arrays, None when they are in the mesh cache
+        '''
+        if onReady is not None:
+            onReady = functools.partial(_objReady, filename, swapyz, weld, useCache, workers, onReady)
+        return self.load(_warmOBJ, (filename, swapyz, weld, useCache, workers), onReady)
+
+    def processReady(self, budget=None):
+        '''
+        Hands the finished assets to their onReady callback, to be called once per frame by the render thread.
+        Stops when the time budget is used up, the remaining assets are handled in later frames.
+        At least one asset is handled per call so a single large asset can not block forever.
+        An asset of which the load failed is reported and dropped, onReady is not called for it.
+        :param budget: Seconds that may be spent, defaults to uploadBudget
+        :return: Number of handled assets
+        '''
+        budget = self.uploadBudget if budget is None else budget
+        start = time.time()
+        handled = 0
+        for item in list(self._pending):
+            future, onReady = item
+            if not future.ready():
+                continue
+            if handled > 0 and time.time() - start >= budget:
+                break
+            self._pending.remove(item)
+            try:
+                # get() raises the exception of a failed load on the render thread
+                asset = future.get()
+            except Exception as error:
+                print >> sys.stderr, 'Asset not loaded: %s: %s' % (type(error).__name__, error)
+                self.failedCount += 1
+                continue
+            if onReady is not None:
+                onReady(asset)
+            handled += 1
+        return handled
+
+    def close(self):
+        '''
+        Stops the worker pool, assets that are still loading are abandoned.
+        '''
+        self._pool.terminate()
+        self._pool.join()
+        self._pending = []
@@ -0,0 +1,200 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Frustum culling of the scene objects on the CPU.
+Every SceneObject keeps an axis aligned bounding box and a bounding sphere in object space, including all
+its instances (SceneObject.bounds). The culling pass transforms the bounds of all objects with their world
+matrices and tests them against the six planes of the view frustum in one batched NumPy pass: first the
+spheres, then the boxes, an object is drawn when both intersect the frustum.
+With the fog of war on, the shader turns every vertex further than fogDistance from the player black. The same
+pass then also skips the objects whose bounds lie entirely beyond that distance, and the chunks of the level mesh
+(FrustumCuller.cullChunks), they would only be drawn black.
+The matrices follow the NumPy row vector convention of og_util: a point is transformed with v . M, so the
+frustum of the shader's perspectiveMatrix * cameraMatrix is cameraMatrix.dot(perspectiveMatrix) here.
+'''
+import numpy as np
+
+# Column of the clip coordinates and its sign for every frustum plane: w + x, w - x, w + y, ...
+PLANE_COLUMNS = np.array((0, 0, 1, 1, 2, 2))
+PLANE_SIGNS = np.array((1.0, -1.0, 1.0, -1.0, 1.0, -1.0))[:, np.newaxis]
+
+
+def frustumPlanes(viewProjection):
+    '''
+    The planes of the view frustum of a combined camera and projection matrix (clip = v . viewProjection).
+    :return: (6, 4) array with the planes (a, b, c, d) left, right, bottom, top, near and far.
+             The normals (a, b, c) have unit length and point inside: a*x + b*y + c*z + d >= 0 inside.
+    '''
+    columns = np.asarray(viewProjection, dtype=np.float64).T
+    planes = columns[3] + PLANE_SIGNS * columns[PLANE_COLUMNS]
+    planes /= np.sqrt(np.einsum('ij,ij->i', planes[:, :3], planes[:, :3]))[:, np.newaxis]
+    return planes
+
+
+def worldBounds(boxCenters, boxExtents, sphereCenters, sphereRadii, matrices):
+    '''
+    Transforms the object space bounds of n objects with their world matrices, batched.
+    The world box is the box around the transformed object box, the sphere radius grows with the largest scale.
+    :param boxCenters: (n, 3) centers of the boxes
+    :param boxExtents: (n, 3) half sizes of the boxes
+    :param sphereCenters: (n, 3) centers of the spheres
+    :param sphereRadii: (n,) radii of the spheres
+    :param matrices: (n, 4, 4) world matrices
+    :return: (boxCenters, boxExtents, sphereCenters, sphereRadii) in world space
+    '''
+    linear = matrices[:, :3, :3]
+    translation = matrices[:, 3, :3]
+    # Both centers in one batched multiplication, (n, 2, 3) . (n, 3, 3)
+    centers = np.matmul(np.stack((boxCenters, sphereCenters), axis=1), linear) + translation[:, np.newaxis]
+    worldBoxExtents = np.matmul(boxExtents[:, np.newaxis], np.abs(linear))[:, 0]
+    # A row of the matrix is the image of an axis, the longest row is the largest scale
+    scales = np.sqrt(np.einsum('nij,nij->ni', linear, linear).max(axis=1))
+    return centers[:, 0], worldBoxExtents, centers[:, 1], sphereRadii * scales
+
+
+def intersectFrustum(planes, boxCenters, boxExtents, sphereCenters, sphereRadii):
+    '''
+    Tests world space bounds against the frustum planes, batched.
+    :return: (n,) boolean array, True for the objects that are (partly) inside the frustum
+    '''
+    normals = planes[:, :3]
+    # Signed distance of every sphere center to every plane, (n, 6)
+    sphereDistances = sphereCenters.dot(normals.T) + planes[:, 3]
+    visible = (sphereDistances >= -sphereRadii[:, np.newaxis]).all(axis=1)
+    # The box corner furthest along the plane normal, outside when even that corner is behind the plane
+    boxDistances = boxCenters.dot(normals.T) + planes[:, 3] + boxExtents.dot(np.abs(normals).T)
+    visible &= (boxDistances >= 0).all(axis=1)
+    return visible
+
+
+def beyondDistance(position, distance, boxCenters, boxExtents, sphereCenters, sphereRadii):
+    '''
+    Tests world space bounds against the fog of war, batched. The distance is the one of the vertex shader,
+    distance(playerPosition, worldPosition): an object is fogged when even the point of its box or sphere
+    closest to the position is further away than the distance, then all its vertices are.
+    :param position: (x, y, z, ...) position of the player
+    :return: (n,) boolean array, True for the objects that lie entirely beyond the distance
+    '''
+    position = np.asarray(position, dtype=np.float64)[:3]
+    sphereDistances = np.sqrt(((sphereCenters - position) ** 2).sum(axis=1)) - sphereRadii
+    # Closest point of the box: per axis the distance outside the box, 0 inside
+    outside = np.maximum(np.abs(boxCenters - position) - boxExtents, 0)
+    boxDistances = np.sqrt((outside ** 2).sum(axis=1))
+    return (sphereDistances > distance) | (boxDistances > distance)
+
+
+class FrustumCuller(object):
+    '''
+    Culls the scene objects of a frame and keeps statistics of the culled objects and triangles.
+    '''
+
+    def __init__(self):
+        # Culled objects and triangles of the last frame, the objects and chunks culled by the fog of war
+        self.culledObjects = 0
+        self.culledTriangles = 0
+        self.fogCulledObjects = 0
+        self.fogCulledChunks = 0
+        # Object space bounds of the objects as arrays and the bounds they were stacked from
+        self._bounds = []
+        self._boxCenters = self._boxExtents = self._sphereCenters = self._sphereRadii = self._triangles = None
+        # Inputs and result of the last pass, reused while nothing moved
+        self._key = None
+        self._visible = None
+        self._fogged = None
+        # Statistics
+        self.frames = 0
+        self.totalCulledObjects = 0
+        self.totalCulledTriangles = 0
+        self.totalTriangles = 0
+        self.totalFogCulledObjects = 0
+        self.totalFogCulledChunks = 0
+
+    def cull(self, objects, matrices, viewProjection, fog=None):
+        '''
+        Tests the objects against the view frustum, and against the fog of war when it is on.
+        :param objects: SceneObjects
+        :param matrices: (n, 4, 4) world matrices of the objects
+        :param viewProjection: Combined camera and projection matrix, cameraMatrix.dot(perspectiveMatrix)
+        :param fog: (player position, fog distance) when the fog of war is on
+        :return: (n,) boolean array, True for the objects that have to be drawn
+        '''
+        count = len(objects)
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+        # The bounds of an object are the same tuple until it changes
+        bounds = [obj.bounds for obj in objects]
+        boundsChanged = len(bounds) != len(self._bounds) or any(a is not b for a, b in zip(bounds, self._bounds))
+        if boundsChanged:
+            self._stackBounds(objects, bounds)
+
+        matrices = np.asarray(matrices, dtype=np.float32)
+        viewProjection = np.asarray(viewProjection, dtype=np.float32)
+        fog = None if fog is None else (tuple(fog[0][:3]), fog[1])
+        key = (matrices.tostring(), viewProjection.tostring(), fog)
+        if boundsChanged or key != self._key:
+            world = worldBounds(self._boxCenters, self._boxExtents, self._sphereCenters, self._sphereRadii,
+                                matrices.astype(np.float64))
+            self._visible = intersectFrustum(frustumPlanes(viewProjection), *world)
+            self._fogged = np.zeros(count, dtype=bool) if fog is None else beyondDistance(fog[0], fog[1], *world)
+            self._visible &= ~self._fogged
+            self._key = key
+        visible = self._visible
+
+        self.fogCulledObjects = int(self._fogged.sum())
+        # Counted by cullChunks, after this pass
+        self.fogCulledChunks = 0
+        self.totalFogCulledObjects += self.fogCulledObjects
+        self.culledObjects = int(count - visible.sum())
+        self.culledTriangles = int(self._triangles[~visible].sum())
+        self.frames += 1
+        self.totalCulledObjects += self.culledObjects
+        self.totalCulledTriangles += self.culledTriangles
+        self.totalTriangles += int(self._triangles.sum())
+        return visible
+
+    def cullChunks(self, obj, matrix, fog):
+        '''
+        Tests the chunks of a level mesh (util.LevelMesh) against the fog of war, so the fogged parts of the level
+        are not drawn even when the level as a whole is visible.
+        :param obj: LevelSceneObject
+        :param matrix: World matrix of the level
+        :param fog: (player position, fog distance)
+        :return: List of (first element, element count) of the chunks to draw, relative to the object
+        '''
+        chunks, low, high = obj.chunkBounds()
+        if len(chunks) == 0:
+            return []
+        centers = (low + high) / 2
+        extents = (high - low) / 2
+        radii = np.sqrt((extents ** 2).sum(axis=1))
+        world = worldBounds(centers, extents, centers, radii, np.repeat(matrix[np.newaxis], len(chunks), axis=0))
+        fogged = beyondDistance(fog[0], fog[1], *world)
+        self.fogCulledChunks = int(fogged.sum())
+        self.totalFogCulledChunks += self.fogCulledChunks
+        return obj.elementRanges([chunk for chunk, isFogged in zip(chunks, fogged) if not isFogged])
+
+    def _stackBounds(self, objects, bounds):
+        '''
+        Stacks the object space bounds of the objects into arrays for the batched pass.
+        '''
+        low = np.array([b[0] for b in bounds], dtype=np.float64)
+        high = np.array([b[1] for b in bounds], dtype=np.float64)
+        self._boxCenters = (low + high) / 2
+        self._boxExtents = (high - low) / 2
+        self._sphereCenters = np.array([b[2] for b in bounds], dtype=np.float64)
+        self._sphereRadii = np.array([b[3] for b in bounds], dtype=np.float64)
+        # The triangle count changes with the vertices and instances, like the bounds
+        self._triangles = np.array([len(obj.triangleIndices) / 3 * obj.instanceCount for obj in objects])
+        self._bounds = bounds
+
+    def report(self):
+        '''
+        :return: Text with the average number of culled objects and triangles per frame
+        '''
+        frames = float(max(self.frames, 1))
+        return ('Culled per frame: %.1f objects (%.1f by the fog of war), %.0f of %.0f triangles, '
+                '%.1f fogged level chunks' % (self.totalCulledObjects / frames, self.totalFogCulledObjects / frames,
+                                              self.totalCulledTriangles / frames, self.totalTriangles / frames,
+                                              self.totalFogCulledChunks / frames))
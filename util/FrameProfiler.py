@@ -0,0 +1,139 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Per phase timing of the frames in the main loop.
+The times of the last frames are kept in a fixed size ring buffer, reported as percentiles and
+dumped to JSON or CSV for offline analysis.
+'''
+import csv
+import json
+import timeit
+
+import numpy as np
+
+# Default number of frames kept in the ring buffer
+DEFAULT_FRAMES = 1024
+
+# Reported percentiles
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler(object):
+    '''
+    Measures how long each phase of a frame takes.
+    Call beginFrame() at the start of a frame, mark(phase) at the end of every phase and endFrame() at the end.
+    A phase is the time since the previous mark (or beginFrame), phases that are not marked in a frame count as 0.
+    The hot path only reads the clock and adds to a Python list, the NumPy work happens in endFrame().
+    '''
+
+    @property
+    def frameCount(self):
+        '''
+        Number of frames in the ring buffer
+        '''
+        return min(self._frames, len(self._times))
+
+    @property
+    def times(self):
+        '''
+        Array (frames, phases) with the phase times in seconds, oldest frame first
+        '''
+        if self._frames <= len(self._times):
+            return self._times[:self._frames]
+        return np.roll(self._times, -self._index, axis=0)
+
+    def __init__(self, phases, size=DEFAULT_FRAMES):
+        '''
+        Constructor
+        :param phases: Names of the phases, mark() takes the index in this sequence
+        :param size: Number of frames kept in the ring buffer
+        '''
+        self.phases = tuple(phases)
+        self._times = np.zeros((size, len(self.phases)))
+        # Next row to write in the ring buffer and the total number of frames
+        self._index = 0
+        self._frames = 0
+        self._row = [0.0] * len(self.phases)
+        self._last = 0.0
+        self._clock = timeit.default_timer
+
+    def beginFrame(self):
+        self._row = [0.0] * len(self.phases)
+        self._last = self._clock()
+
+    def mark(self, phase):
+        '''
+        Ends a phase, the time since the previous mark is added to it.
+        :param phase: Index of the phase
+        '''
+        now = self._clock()
+        self._row[phase] += now - self._last
+        self._last = now
+
+    def endFrame(self):
+        self._times[self._index] = self._row
+        self._index = (self._index + 1) % len(self._times)
+        self._frames += 1
+
+    def reset(self):
+        self._index = 0
+        self._frames = 0
+
+    def percentiles(self, percentiles=PERCENTILES):
+        '''
+        Percentiles of every phase and of the complete frame ('frame') over the frames in the ring buffer.
+        :return: Dictionary {phase: {'p50': seconds, ...}}
+        '''
+        times = self.times
+        if len(times) == 0:
+            return {}
+        columns = list(self.phases) + ['frame']
+        values = np.percentile(np.column_stack((times, times.sum(axis=1))), percentiles, axis=0)
+        result = {}
+        for column, name in enumerate(columns):
+            result[name] = dict(('p%d' % p, float(values[row, column])) for row, p in enumerate(percentiles))
+        return result
+
+    def report(self):
+        '''
+        Text table with the percentiles in milliseconds.
+        '''
+        percentiles = self.percentiles()
+        lines = ['%-16s %9s %9s %9s  (%d frames)' % (('phase',) + tuple('p%d ms' % p for p in PERCENTILES) +
+                                                   (self.frameCount,))]
+        for name in list(self.phases) + ['frame']:
+            if name in percentiles:
+                lines.append('%-16s %9.3f %9.3f %9.3f' % ((name,) + tuple(1000 * percentiles[name]['p%d' % p]
+                                                                          for p in PERCENTILES)))
+        return '\n'.join(lines)
+
+    def dumpJSON(self, filename):
+        '''
+        Writes the percentiles and the per frame times (in seconds) to a JSON file.
+        '''
+        with open(filename, 'w') as f:
+            json.dump({'phases': list(self.phases),
+                       'frames': self.frameCount,
+                       'percentiles': self.percentiles(),
+                       'times': self.times.tolist()}, f, indent=1)
+
+    def dumpCSV(self, filename):
+        '''
+        Writes one row per frame with the phase times in milliseconds to a CSV file.
+        '''
+        with open(filename, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + ['%s_ms' % phase for phase in self.phases] + ['total_ms'])
+            for frame, row in enumerate(self.times * 1000):
+                writer.writerow([frame] + ['%.4f' % value for value in row] + ['%.4f' % row.sum()])
+
+    def dump(self, filename):
+        '''
+        Writes a CSV file when the name ends with .csv, JSON otherwise.
+        '''
+        if filename.lower().endswith('.csv'):
+            self.dumpCSV(filename)
+        else:
+            self.dumpJSON(filename)
@@ -0,0 +1,190 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Pluggable OpenGl backend.
+The modules of the application use the GL, compileShader and compileProgram of this module instead of
+importing PyOpenGL directly. By default they are the PyOpenGL ones. With the environment variable
+PYTHONOPENGL_GL set to "recording" they are a RecordingGL, which needs no OpenGl at all: it counts the calls
+per function, the bytes uploaded into buffers and the draw calls per frame, so the CPU side of the render
+pipeline can be benchmarked and checked against call count budgets.
+The backend is chosen when this module is first imported, so the variable has to be set before the
+application modules are imported, e.g. os.environ["PYTHONOPENGL_GL"] = "recording" at the top of a script.
+'''
+import collections
+import os
+
+# Environment variable with the backend name
+BACKEND_VARIABLE = 'PYTHONOPENGL_GL'
+BACKENDS = ('opengl', 'recording')
+
+# Functions that draw, counted as draw calls
+DRAW_FUNCTIONS = ('glDrawArrays', 'glDrawElements', 'glDrawArraysInstanced', 'glDrawElementsInstanced',
+                  'glDrawElementsInstancedBaseInstance', 'glMultiDrawArrays', 'glMultiDrawElements')
+# OpenGl version RecordingGL reports, the application uses the functions of the version
+VERSION = (4, 5)
+
+
+class FrameRecord(object):
+    '''
+    The GL calls of one frame as recorded by RecordingGL.
+    '''
+
+    def __init__(self, calls, bytesUploaded, drawCalls):
+        # Number of calls per function name
+        self.calls = calls
+        self.bytesUploaded = bytesUploaded
+        self.drawCalls = drawCalls
+
+    @property
+    def callCount(self):
+        return sum(self.calls.values())
+
+
+class RecordingGL(object):
+    '''
+    Stand in for the PyOpenGL GL module that records the calls instead of making them.
+    Constants (GL_*) get a unique number per name, functions return plausible values: new names for
+    the glGen* and glCreate* functions, a location per uniform name, VERSION for the version and 0 for other
+    queries. Every function that is not known returns None. Rendering results can not be checked, only the calls
+    that were made.
+    '''
+
+    GL_FALSE = 0
+    GL_TRUE = 1
+
+    def __init__(self):
+        self._constants = {}
+        self._names = 0
+        self._uniformLocations = {}
+        # Current frame and the frames that were ended
+        self._calls = collections.Counter()
+        self._bytesUploaded = 0
+        self._drawCalls = 0
+        self.frames = []
+        # Totals
+        self.totalCalls = collections.Counter()
+        self.totalBytesUploaded = 0
+        self.totalDrawCalls = 0
+
+    def __getattr__(self, name):
+        '''
+        Creates missing constants and recording functions on first use, they are cached as attributes.
+        '''
+        if name.startswith('GL_'):
+            value = self._constants.setdefault(name, 0x10000 + len(self._constants))
+        elif name.startswith('gl'):
+            value = self._recorder(name, getattr(self, '_' + name, None))
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+    def _recorder(self, name, implementation):
+        draw = name in DRAW_FUNCTIONS
+
+        def record(*args):
+            self._calls[name] += 1
+            if draw:
+                self._drawCalls += 1
+            if implementation is not None:
+                return implementation(*args)
+            return None
+        record.__name__ = name
+        return record
+
+    def _newName(self):
+        self._names += 1
+        return self._names
+
+    def _newNames(self, count):
+        if count == 1:
+            return self._newName()
+        return [self._newName() for i in range(count)]
+
+    # Return values of the functions that are used by the application
+
+    def _glGenBuffers(self, count):
+        return self._newNames(count)
+
+    _glGenVertexArrays = _glGenTextures = _glGenFramebuffers = _glGenRenderbuffers = _glGenBuffers
+
+    def _glCreateShader(self, shaderType):
+        return self._newName()
+
+    def _glCreateProgram(self):
+        return self._newName()
+
+    def _glGetUniformLocation(self, program, name):
+        return self._uniformLocations.setdefault((program, name), len(self._uniformLocations))
+
+    def _glGetUniformBlockIndex(self, program, name):
+        return 0
+
+    def _glGetIntegerv(self, name):
+        if name == self.GL_MAJOR_VERSION:
+            return VERSION[0]
+        if name == self.GL_MINOR_VERSION:
+            return VERSION[1]
+        return 0
+
+    def _glIsEnabled(self, capability):
+        return False
+
+    def _glGetString(self, name):
+        return 'RecordingGL'
+
+    def _glBufferData(self, target, size, data, usage):
+        if data is not None:
+            self._bytesUploaded += size
+
+    def _glBufferSubData(self, target, offset, size, data):
+        self._bytesUploaded += size
+
+    def GLvoidp(self, value):
+        return value
+
+    def compileShader(self, source, shaderType):
+        return self.glCreateShader(shaderType)
+
+    def compileProgram(self, *shaders):
+        return self.glCreateProgram()
+
+    def endFrame(self):
+        '''
+        Ends the current frame, the calls recorded since the previous endFrame are kept in frames.
+        :return: FrameRecord of the frame
+        '''
+        frame = FrameRecord(self._calls, self._bytesUploaded, self._drawCalls)
+        self.frames.append(frame)
+        self.totalCalls.update(self._calls)
+        self.totalBytesUploaded += self._bytesUploaded
+        self.totalDrawCalls += self._drawCalls
+        self._calls = collections.Counter()
+        self._bytesUploaded = 0
+        self._drawCalls = 0
+        return frame
+
+    def reset(self):
+        '''
+        Forgets the recorded calls, the names and constants stay valid.
+        '''
+        self._calls = collections.Counter()
+        self._bytesUploaded = 0
+        self._drawCalls = 0
+        self.frames = []
+        self.totalCalls = collections.Counter()
+        self.totalBytesUploaded = 0
+        self.totalDrawCalls = 0
+
+
+backend = os.environ.get(BACKEND_VARIABLE, 'opengl')
+assert backend in BACKENDS, "Unknown GL backend %s=%s, use one of %s" % (BACKEND_VARIABLE, backend, BACKENDS)
+if backend == 'recording':
+    GL = RecordingGL()
+    compileShader = GL.compileShader
+    compileProgram = GL.compileProgram
+else:
+    from OpenGL import GL
+    from OpenGL.GL.shaders import compileShader, compileProgram
@@ -0,0 +1,186 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Thin state tracking layer over the OpenGl binding calls.
+Remembers the current program, vertex array object and buffer bindings and drops calls that would not
+change them, so the render loop can bind what it needs without unbinding afterwards.
+The element array buffer binding is part of the vertex array object, it is remembered per VAO.
+All binding calls of the application should go through this module, after other code changed bindings
+directly invalidate() has to be called.
+In debug mode the redundant calls are counted per frame (see endFrame and report) and every dropped call
+is checked against the real OpenGl state.
+'''
+import collections
+
+from util.GlBackend import GL
+
+# Number of frames kept for the debug report
+DEBUG_FRAMES = 1024
+
+# Query for the binding of every buffer target
+BINDING_QUERIES = {
+    GL.GL_ARRAY_BUFFER: GL.GL_ARRAY_BUFFER_BINDING,
+    GL.GL_ELEMENT_ARRAY_BUFFER: GL.GL_ELEMENT_ARRAY_BUFFER_BINDING,
+    GL.GL_UNIFORM_BUFFER: GL.GL_UNIFORM_BUFFER_BINDING,
+}
+
+# Current state, None while unknown (the call is always passed on then)
+_program = None
+_vertexArray = None
+# Buffer per target, except GL_ELEMENT_ARRAY_BUFFER
+_buffers = {}
+# Element array buffer per vertex array object
+_elementBuffers = {}
+
+# Statistics: calls passed on to OpenGl and no-op calls that were dropped
+calls = 0
+dropped = 0
+
+# Debug mode: redundant calls per kind in the current frame and in the previous frames
+debug = False
+_frameRedundant = collections.Counter()
+_frames = collections.deque(maxlen=DEBUG_FRAMES)
+
+
+def setDebug(enabled):
+    '''
+    Switches the debug mode, which counts the redundant calls per frame and checks the tracked state.
+    '''
+    global debug
+    debug = enabled
+    _frameRedundant.clear()
+    _frames.clear()
+
+
+def invalidate():
+    '''
+    Forgets the tracked state, e.g. after a new context was created or code outside this module changed bindings.
+    '''
+    global _program, _vertexArray
+    _program = None
+    _vertexArray = None
+    _buffers.clear()
+    _elementBuffers.clear()
+
+
+def _redundant(kind, query, tracked):
+    '''
+    Records a dropped call, in debug mode the tracked value is checked against the OpenGl state.
+    '''
+    global dropped
+    dropped += 1
+    if debug:
+        _frameRedundant[kind] += 1
+        actual = GL.glGetIntegerv(query)
+        assert actual == tracked, "%s: tracked %s but OpenGl has %s bound" % (kind, tracked, actual)
+
+
+def useProgram(program):
+    global _program, calls
+    if program == _program:
+        _redundant('useProgram', GL.GL_CURRENT_PROGRAM, program)
+        return
+    GL.glUseProgram(program)
+    _program = program
+    calls += 1
+
+
+def bindVertexArray(vertexArray):
+    global _vertexArray, calls
+    if vertexArray == _vertexArray:
+        _redundant('bindVertexArray', GL.GL_VERTEX_ARRAY_BINDING, vertexArray)
+        return
+    GL.glBindVertexArray(vertexArray)
+    _vertexArray = vertexArray
+    calls += 1
+
+
+def bindBuffer(target, buffer):
+    global calls
+    if target == GL.GL_ELEMENT_ARRAY_BUFFER:
+        # Only known when the bound vertex array object is known
+        bindings = _elementBuffers
+        key = _vertexArray
+    else:
+        bindings = _buffers
+        key = target
+    if key is not None and bindings.get(key) == buffer:
+        _redundant('bindBuffer', BINDING_QUERIES[target], buffer)
+        return
+    GL.glBindBuffer(target, buffer)
+    if key is not None:
+        bindings[key] = buffer
+    calls += 1
+
+
+def bindBufferBase(target, index, buffer):
+    '''
+    Binds a buffer to an indexed binding point, this also binds it to the generic target.
+    '''
+    global calls
+    GL.glBindBufferBase(target, index, buffer)
+    _buffers[target] = buffer
+    calls += 1
+
+
+def bufferDeleted(buffer):
+    '''
+    Updates the tracked state for a deleted buffer, OpenGl unbinds it from the current bindings.
+    Other vertex array objects keep the old name, which could be reused for a new buffer.
+    '''
+    for target, bound in _buffers.items():
+        if bound == buffer:
+            _buffers[target] = 0
+    for vertexArray, bound in _elementBuffers.items():
+        if bound == buffer:
+            _elementBuffers[vertexArray] = 0 if vertexArray == _vertexArray else None
+
+
+def programDeleted(program):
+    '''
+    Updates the tracked state for a deleted program. A deleted program stays in use until another one is
+    made current, and its name could be reused for a new program, so the next useProgram always calls OpenGl.
+    '''
+    global _program
+    if program == _program:
+        _program = None
+
+
+def vertexArrayDeleted(vertexArray):
+    '''
+    Updates the tracked state for a deleted vertex array object, the name could be reused for a new one.
+    '''
+    global _vertexArray
+    _elementBuffers.pop(vertexArray, None)
+    if vertexArray == _vertexArray:
+        _vertexArray = 0
+
+
+def endFrame():
+    '''
+    Ends a frame of the debug statistics.
+    :return: The redundant calls per kind of the frame, None when debug mode is off
+    '''
+    if not debug:
+        return None
+    frame = dict(_frameRedundant)
+    _frames.append(frame)
+    _frameRedundant.clear()
+    return frame
+
+
+def report():
+    '''
+    :return: Text with the average number of redundant calls per frame per kind (debug mode)
+    '''
+    lines = ['GL state: %d calls made, %d no-op calls dropped' % (calls, dropped)]
+    if len(_frames) > 0:
+        total = collections.Counter()
+        for frame in _frames:
+            total.update(frame)
+        lines.append('Redundant calls per frame (%d frames):' % len(_frames))
+        for kind in sorted(total):
+            lines.append('  %-16s %8.1f' % (kind, float(total[kind]) / len(_frames)))
+    return '\n'.join(lines)
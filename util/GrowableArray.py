@@ -0,0 +1,186 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Growable, contiguous NumPy storage for vertex data.
+'''
+import numpy as np
+
+# Smallest number of elements that is allocated
+MINIMUM_CAPACITY = 16
+
+
+class GrowableArray(object):
+    '''
+    Flat array of scalars (e.g. float32 vertex components or uint32 indices) that grows like a Python list.
+    The capacity doubles when it runs out so appending is amortized O(1).
+    The data is stored in one contiguous NumPy buffer that can be handed to OpenGl without copying.
+    It supports the list operations used on the scene object data: append, extend, len, iteration and indexing.
+    '''
+
+    @property
+    def array(self):
+        '''
+        View on the used part of the buffer
+        '''
+        return self._data[:self._size]
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def version(self):
+        '''
+        Counter that increases on every modification, used to detect changed data without comparing it
+        '''
+        return self._version
+
+    @property
+    def dirtyRange(self):
+        '''
+        (start, end) element range that was modified since markClean(), only counting elements that existed then.
+        None when nothing was modified.
+        '''
+        if self._dirtyStart >= self._dirtyEnd:
+            return None
+        return self._dirtyStart, self._dirtyEnd
+
+    @property
+    def appendedRange(self):
+        '''
+        (start, end) element range that was appended since markClean(), None when nothing was appended.
+        '''
+        if self._size <= self._cleanSize:
+            return None
+        return self._cleanSize, self._size
+
+    @property
+    def nbytes(self):
+        '''
+        Size in bytes of the used part of the buffer
+        '''
+        return self._size * self._data.itemsize
+
+    def __init__(self, dtype=np.float32, data=None):
+        '''
+        Constructor
+        :param dtype: NumPy type of the elements
+        :param data: Optional initial content, a NumPy array of the right type is used without copying
+        '''
+        if data is None:
+            self._data = np.empty(MINIMUM_CAPACITY, dtype=dtype)
+            self._size = 0
+        else:
+            self._data = np.asarray(data, dtype=dtype).ravel()
+            self._size = len(self._data)
+        # Data from the mesh cache is a read only memory map, it is copied on the first write
+        self._readOnly = not self._data.flags.writeable
+        self._version = 0
+        # Change tracking since the last markClean(), see dirtyRange and appendedRange
+        self._cleanSize = 0
+        self._dirtyStart = 0
+        self._dirtyEnd = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._data[:self._size])
+
+    def __getitem__(self, index):
+        return self._data[:self._size][index]
+
+    def __setitem__(self, index, value):
+        self._ensureWritable()
+        self._data[:self._size][index] = value
+        self._version += 1
+        self._markDirty(index)
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
+
+    def __repr__(self):
+        return 'GrowableArray(%r)' % self.array
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+        self._version += 1
+
+    def extend(self, values):
+        # Small tuples (a vertex, a color) are assigned directly, converting them to an array first is slower
+        if not isinstance(values, (tuple, list)):
+            if isinstance(values, (np.ndarray, GrowableArray)):
+                values = np.asarray(values).ravel()
+            else:
+                values = list(values)
+        end = self._size + len(values)
+        self._reserve(end)
+        self._data[self._size:end] = values
+        self._size = end
+        self._version += 1
+
+    def clear(self):
+        self._size = 0
+        self._version += 1
+        self._cleanSize = 0
+        self._dirtyStart = self._dirtyEnd = 0
+
+    def markClean(self):
+        '''
+        Forgets the tracked changes, e.g. after the data has been uploaded to the GPU.
+        '''
+        self._cleanSize = self._size
+        self._dirtyStart = self._dirtyEnd = 0
+
+    def _markDirty(self, index):
+        '''
+        Extends the dirty range with the elements written through index.
+        '''
+        if isinstance(index, (int, long, np.integer)):
+            start = index + self._size if index < 0 else index
+            end = start + 1
+        elif isinstance(index, slice):
+            start, end, step = index.indices(self._size)
+            if step < 0:
+                start, end = end + 1, start + 1
+        else:
+            # Fancy indexing, assume everything changed
+            start, end = 0, self._size
+        # Appended elements are already covered by appendedRange
+        end = min(end, self._cleanSize)
+        if start >= end:
+            return
+        if self._dirtyStart >= self._dirtyEnd:
+            self._dirtyStart, self._dirtyEnd = start, end
+        else:
+            self._dirtyStart = min(self._dirtyStart, start)
+            self._dirtyEnd = max(self._dirtyEnd, end)
+
+    def _reserve(self, size):
+        '''
+        Makes sure the buffer can hold size elements, the capacity is doubled until it is large enough.
+        '''
+        if size <= len(self._data) and not self._readOnly:
+            return
+        capacity = max(len(self._data), MINIMUM_CAPACITY)
+        while capacity < size:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+        self._readOnly = False
+
+    def _ensureWritable(self):
+        if self._readOnly:
+            self._data = self._data[:self._size].copy()
+            self._readOnly = False
@@ -0,0 +1,613 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Mesh of a tile level.
+A tile is either blocked (a wall, one tile high) or open (floor). Drawing a box per tile hides most of its faces
+inside the walls and floor around it, instead the level is meshed per chunk of CHUNK_SIZE x CHUNK_SIZE tiles
+with only the visible faces: the top of every tile (floor or wall top) and the wall sides between a blocked
+and an open tile (or the edge of the map). Coplanar faces with the same color are merged greedily: first into
+runs along a row of tiles, then runs with the same start, length and color in consecutive rows into rectangles.
+Merging stops at the chunk borders, so every chunk can be meshed on its own.
+The whole level is one scene object (one draw call), every chunk has its own slot (a range of quads) in it.
+Editing a tile meshes the chunk again and rewrites its slot in place, only that slot is uploaded. A slot has
+some room to spare, a chunk that outgrows it moves to a free slot or to the end. Unused quads of a slot are
+degenerate triangles, which are not drawn.
+StreamingLevelSceneObject meshes only the chunks around the player, in the background, for large maps.
+'''
+import collections
+import functools
+
+import numpy as np
+
+import util.SceneObject
+
+# Tiles per chunk side
+CHUNK_SIZE = 16
+# Slots are reserved in steps of this many quads, a chunk can grow a little without moving
+SLOT_GRANULARITY = 16
+
+# Two counter clockwise triangles per quad, from its corners origin, origin + u, origin + u + v, origin + v
+QUAD_TRIANGLES = np.array((0, 1, 2, 0, 2, 3), dtype=np.uint32)
+
+# Streaming (StreamingLevelSceneObject): distance in chunks around the player that is meshed, size of the mesh
+# in quads (about 200 bytes each) and the number of chunks that are meshed by the workers at the same time
+STREAMING_RADIUS = 4
+STREAMING_BUDGET = 16384
+STREAMING_PENDING = 8
+
+# Triangles per tile of the original mesh, a box per tile
+BOX_TRIANGLES = 12
+
+# Values per quad of every attribute: 4 corners with x, y, z, w, with R, G, B, A and with a normal, 6 indices
+QUAD_VALUES = {'vertices': 16, 'colors': 16, 'normals': 12, 'triangleIndices': 6}
+
+
+def _runs(present, label, chunkSize, offset):
+    '''
+    Runs of consecutive present cells with the same label along the rows of a grid, broken at chunk borders.
+    :param present: (rows, columns) boolean array
+    :param label: (rows, columns) integer array
+    :param offset: Tile coordinate of the first column, for the chunk borders
+    :return: (row, first column, length, label) arrays, one entry per run
+    '''
+    key = np.where(present, label, -1)
+    border = (np.arange(present.shape[1]) + offset) % chunkSize == 0
+    different = (key[:, 1:] != key[:, :-1]) | border[1:]
+    starts = present.copy()
+    starts[:, 1:] &= different
+    ends = present.copy()
+    ends[:, :-1] &= different
+    rows, first = np.nonzero(starts)
+    last = np.nonzero(ends)[1]
+    return rows, first, last - first + 1, key[rows, first]
+
+
+def _vectors(count, x, y, z):
+    '''
+    :return: (count, 3) array of vectors, the components are arrays or numbers
+    '''
+    return np.column_stack([np.broadcast_to(component, (count,)) for component in (x, y, z)]).astype(np.float32)
+
+
+def _rectangles(present, label, chunkSize, rowOffset, columnOffset):
+    '''
+    Greedy rectangles of present cells with the same label: runs along the rows, runs with the same first column,
+    length and label in consecutive rows are merged. Neither crosses a chunk border.
+    :return: (first row, first column, rows, columns, label) arrays, one entry per rectangle
+    '''
+    rows, first, length, label = _runs(present, label, chunkSize, columnOffset)
+    order = np.lexsort((rows, label, length, first))
+    rows, first, length, label = rows[order], first[order], length[order], label[order]
+    # A run continues the rectangle of the run before it in this order
+    continues = np.zeros(len(rows), dtype=bool)
+    continues[1:] = ((first[1:] == first[:-1]) & (length[1:] == length[:-1]) & (label[1:] == label[:-1]) &
+                     (rows[1:] == rows[:-1] + 1) & ((rows[1:] + rowOffset) % chunkSize != 0))
+    starts = ~continues
+    heights = np.bincount(np.cumsum(starts) - 1)
+    return rows[starts], first[starts], heights, length[starts], label[starts]
+
+
+def meshRegion(tileBlocked, tileColors, x0, y0, x1, y1, tileSize, chunkSize, offset=(0, 0)):
+    '''
+    Meshes the tiles x0 .. x1, y0 .. y1 (a region of whole chunks) of a tile map, or of a window of it.
+    This is a plain function of arrays so it can run in a worker process (see StreamingLevelSceneObject).
+    :param tileBlocked: (width, height) boolean array, the map or a window of it; the tiles around the region that
+                        are outside the array are outside the map
+    :param tileColors: (width, height, 4) RGBA array
+    :param offset: Tile coordinates of element [0, 0] of the arrays, for a window of the map
+    :return: (chunk x, chunk y, vertices, colors, normals) per quad sorted by chunk, vertices (n, 4, 4),
+             colors (n, 4, 4) and normals (n, 4, 3) for the 4 corners of every quad
+    '''
+    # Tile coordinates in the map of the first tile of the region
+    mapX, mapY = x0 + offset[0], y0 + offset[1]
+    blocked = tileBlocked[x0:x1, y0:y1]
+    # Tiles outside the map are open, so the walls at the edge of the map are closed
+    padded = np.zeros((x1 - x0 + 2, y1 - y0 + 2), dtype=bool)
+    padded[1:-1, 1:-1] = blocked
+    padded[0, 1:-1] = tileBlocked[x0 - 1, y0:y1] if x0 > 0 else False
+    padded[-1, 1:-1] = tileBlocked[x1, y0:y1] if x1 < tileBlocked.shape[0] else False
+    padded[1:-1, 0] = tileBlocked[x0:x1, y0 - 1] if y0 > 0 else False
+    padded[1:-1, -1] = tileBlocked[x0:x1, y1] if y1 < tileBlocked.shape[1] else False
+    palette, colorIds = np.unique(tileColors[x0:x1, y0:y1].reshape(-1, 4), axis=0, return_inverse=True)
+    colorIds = colorIds.reshape(blocked.shape)
+
+    # Every face: (first tile x, y, color, origin, u, v, normal) in tiles, the corners are origin,
+    # origin + u, origin + u + v and origin + v (counter clockwise seen from the front: u x v = normal)
+    faces = []
+    # Floor and wall tops, the label keeps floor and wall apart: color * 2 + blocked
+    x, y, nx, ny, label = _rectangles(np.ones_like(blocked), colorIds * 2 + blocked, chunkSize, mapX, mapY)
+    count = len(x)
+    faces.append((x, y, label / 2, _vectors(count, x + mapX, y + mapY, label % 2), _vectors(count, nx, 0, 0),
+                  _vectors(count, 0, ny, 0), (0.0, 0.0, 1.0)))
+    # Wall sides facing +x and -x, merged along y
+    for step in (1, -1):
+        present = blocked & ~padded[1 + step:padded.shape[0] - 1 + step, 1:-1]
+        x, y, length, colorId = _runs(present, colorIds, chunkSize, mapY)
+        count = len(x)
+        origin = _vectors(count, x + mapX + (step > 0), y + mapY, 0)
+        along, up = _vectors(count, 0, length, 0), _vectors(count, 0, 0, 1)
+        faces.append((x, y, colorId, origin, along if step > 0 else up, up if step > 0 else along,
+                      (float(step), 0.0, 0.0)))
+    # Wall sides facing +y and -y, merged along x
+    for step in (1, -1):
+        present = blocked & ~padded[1:-1, 1 + step:padded.shape[1] - 1 + step]
+        y, x, length, colorId = _runs(present.T, colorIds.T, chunkSize, mapX)
+        count = len(x)
+        origin = _vectors(count, x + mapX, y + mapY + (step > 0), 0)
+        along, up = _vectors(count, length, 0, 0), _vectors(count, 0, 0, 1)
+        faces.append((x, y, colorId, origin, up if step > 0 else along, along if step > 0 else up,
+                      (0.0, float(step), 0.0)))
+
+    chunksX, chunksY, vertices, colors, normals = [], [], [], [], []
+    for x, y, colorId, origin, u, v, normal in faces:
+        count = len(x)
+        corners = np.stack((origin, origin + u, origin + u + v, origin + v), axis=1) * tileSize
+        quadVertices = np.ones((count, 4, 4), dtype=np.float32)
+        quadVertices[..., :3] = corners
+        vertices.append(quadVertices)
+        colors.append(np.repeat(palette[colorId][:, np.newaxis], 4, axis=1))
+        normals.append(np.tile(np.array(normal, dtype=np.float32), (count, 4, 1)))
+        chunksX.append((x + mapX) // chunkSize)
+        chunksY.append((y + mapY) // chunkSize)
+    chunksX, chunksY = np.concatenate(chunksX), np.concatenate(chunksY)
+    order = np.lexsort((chunksY, chunksX))
+    return (chunksX[order], chunksY[order], np.concatenate(vertices)[order], np.concatenate(colors)[order],
+            np.concatenate(normals)[order])
+
+
+class LevelSceneObject(util.SceneObject.SceneObject):
+    '''
+    The mesh of a tile map, see the module documentation.
+    The tiles are indexed [x, y], tile (x, y) covers x * tileSize .. (x + 1) * tileSize (and y alike),
+    walls are tileSize high.
+    '''
+
+    @property
+    def width(self):
+        return self.tileBlocked.shape[0]
+
+    @property
+    def height(self):
+        return self.tileBlocked.shape[1]
+
+    @property
+    def chunkCount(self):
+        return len(self._slots)
+
+    @property
+    def quadCount(self):
+        '''
+        Number of faces in the mesh, after merging
+        '''
+        return sum(self._quads.values())
+
+    @property
+    def boxTriangleCount(self):
+        '''
+        Number of triangles of a box per tile, like the original level mesh
+        '''
+        return self.width * self.height * BOX_TRIANGLES
+
+    def __init__(self, blocked, colors, tileSize, chunkSize=CHUNK_SIZE):
+        '''
+        :param blocked: (width, height) boolean array, True for the walls
+        :param colors: (width, height, 3) RGB or (width, height, 4) RGBA array with the colors of the tiles
+        :param tileSize: Size of a tile in model space
+        :param chunkSize: Tiles per chunk side
+        '''
+        super(LevelSceneObject, self).__init__()
+        self.tileBlocked = np.array(blocked, dtype=bool)
+        self.tileColors = np.ones(self.tileBlocked.shape + (4,), dtype=np.float32)
+        colors = np.asarray(colors, dtype=np.float32)
+        self.tileColors[..., :colors.shape[-1]] = colors
+        self.tileSize = float(tileSize)
+        self.chunkSize = chunkSize
+        # Chunk (cx, cy) -> (first quad, quads) of its slot, and the quads it uses
+        self._slots = {}
+        self._quads = {}
+        # Free slots (first quad, quads), sorted
+        self._free = []
+        # Slots (first quad, quads) written since markClean()
+        self._written = []
+        # Statistics
+        self.remeshedChunks = 0
+        self._build()
+
+    @classmethod
+    def fromTiles(cls, tiles, tileSize, normalizeColor, chunkSize=CHUNK_SIZE):
+        '''
+        Meshes the tiles of a level map.
+        :param tiles: Rows of tiles with x, y, blocked and color (0 - 250 RGB)
+        :param normalizeColor: Function that converts a tile color to 0 - 1 RGB
+        '''
+        tiles = [tile for row in tiles for tile in row]
+        width = max(tile.x for tile in tiles) + 1
+        height = max(tile.y for tile in tiles) + 1
+        blocked = np.zeros((width, height), dtype=bool)
+        colors = np.zeros((width, height, 3), dtype=np.float32)
+        for tile in tiles:
+            blocked[tile.x, tile.y] = tile.blocked
+            colors[tile.x, tile.y] = normalizeColor(tile.color)
+        return cls(blocked, colors, tileSize, chunkSize)
+
+    def changedRanges(self, attribute):
+        '''
+        The slots written since markClean() one by one, instead of one range from the first to the last.
+        '''
+        data = getattr(self, attribute)
+        values = QUAD_VALUES.get(attribute)
+        if values is None:
+            return super(LevelSceneObject, self).changedRanges(attribute)
+        # Appended slots are part of the appended range
+        clean = len(data) if data.appendedRange is None else data.appendedRange[0]
+        ranges = sorted((start * values, min((start + quads) * values, clean)) for start, quads in self._written
+                        if start * values < clean)
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        if data.appendedRange is not None:
+            merged.append(data.appendedRange)
+        return merged
+
+    def markClean(self):
+        super(LevelSceneObject, self).markClean()
+        self._written = []
+
+    def chunkBounds(self):
+        '''
+        The boxes around the meshed chunks in object space, for culling chunks (see util.Culling).
+        :return: (chunks, low, high): list of the chunks (cx, cy), (n, 3) arrays with the corners of their boxes
+        '''
+        chunks = sorted(self._slots)
+        if len(chunks) == 0:
+            return chunks, np.zeros((0, 3)), np.zeros((0, 3))
+        first = np.array(chunks, dtype=np.float64) * self.chunkSize
+        last = np.minimum(first + self.chunkSize, (self.width, self.height))
+        low = np.column_stack((first, np.zeros(len(chunks)))) * self.tileSize
+        high = np.column_stack((last, np.ones(len(chunks)))) * self.tileSize
+        return chunks, low, high
+
+    def elementRanges(self, chunks):
+        '''
+        The triangle indices of some of the chunks, to draw only those. Chunks in consecutive slots share a range,
+        the unused quads at the end of a slot are degenerate and can be drawn along.
+        :return: List of (first element, element count) in triangleIndices
+        '''
+        ranges = []
+        slotEnd = None
+        for start, capacity, quads in sorted(self._slots[chunk] + (self._quads[chunk],) for chunk in chunks):
+            if start == slotEnd:
+                ranges[-1][1] = 6 * (start + quads)
+            else:
+                ranges.append([6 * start, 6 * (start + quads)])
+            slotEnd = start + capacity
+        return [(first, end - first) for first, end in ranges if end > first]
+
+    def chunkOf(self, x, y):
+        return x // self.chunkSize, y // self.chunkSize
+
+    def setTile(self, x, y, blocked=None, color=None):
+        '''
+        Changes a tile and meshes the chunks that show it again: its own chunk, and when a wall appeared or
+        disappeared at a chunk border also the chunk next to it (its wall sides face this tile).
+        :param color: RGB or RGBA 0 - 1
+        :return: List of the chunks that were meshed again
+        '''
+        chunks = set([self.chunkOf(x, y)])
+        if color is not None:
+            self.tileColors[x, y, :len(color)] = color
+        if blocked is not None and bool(blocked) != self.tileBlocked[x, y]:
+            self.tileBlocked[x, y] = blocked
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    chunks.add(self.chunkOf(nx, ny))
+        chunks = sorted(chunks)
+        for chunk in chunks:
+            self._remesh(chunk)
+        return chunks
+
+    def _chunkBounds(self, chunk):
+        '''
+        :return: (x0, y0, x1, y1) tiles of a chunk, the chunks at the far edges can be smaller
+        '''
+        size = self.chunkSize
+        x0, y0 = chunk[0] * size, chunk[1] * size
+        return x0, y0, min(x0 + size, self.width), min(y0 + size, self.height)
+
+    def _meshRegion(self, x0, y0, x1, y1):
+        '''
+        Meshes the tiles x0 .. x1, y0 .. y1, a region of whole chunks.
+        :return: (chunk numbers, vertices, colors, normals) per quad, the chunk number is cx * chunksY + cy
+        '''
+        cx, cy, vertices, colors, normals = meshRegion(self.tileBlocked, self.tileColors, x0, y0, x1, y1,
+                                                       self.tileSize, self.chunkSize)
+        return cx * self._chunksY + cy, vertices, colors, normals
+
+    def _build(self):
+        '''
+        Meshes the whole level, the slots of the chunks are laid out one after the other.
+        '''
+        size = self.chunkSize
+        self._chunksY = (self.height + size - 1) // size
+        chunkCount = ((self.width + size - 1) // size) * self._chunksY
+        chunks, vertices, colors, normals = self._meshRegion(0, 0, self.width, self.height)
+        quads = np.bincount(chunks, minlength=chunkCount)
+        capacities = self._capacity(quads)
+        starts = np.cumsum(capacities) - capacities
+        # Slot position of every quad: the start of its slot plus its position among the quads of the chunk
+        firstQuad = np.cumsum(quads) - quads
+        positions = starts[chunks] + np.arange(len(chunks)) - firstQuad[chunks]
+        total = int(capacities.sum())
+        data = {}
+        for name, values, components in (('vertices', vertices, 4), ('colors', colors, 4), ('normals', normals, 3)):
+            array = np.zeros((total, 4, components), dtype=np.float32)
+            array[positions] = values
+            data[name] = array
+        indices = np.repeat(4 * starts, capacities)[:, np.newaxis] + np.zeros(6, dtype=np.uint32)
+        indices[positions] = 4 * positions[:, np.newaxis] + QUAD_TRIANGLES
+
+        for name in ('vertices', 'colors', 'normals', 'triangleIndices'):
+            getattr(self, name).clear()
+        self._vertices.extend(data['vertices'])
+        self._colors.extend(data['colors'])
+        self._normals.extend(data['normals'])
+        self._triangleIndices.extend(indices.astype(np.uint32))
+        self._slots = {}
+        self._quads = {}
+        self._free = []
+        self._written = []
+        for number in range(chunkCount):
+            chunk = (number // self._chunksY, number % self._chunksY)
+            self._slots[chunk] = (int(starts[number]), int(capacities[number]))
+            self._quads[chunk] = int(quads[number])
+
+    def _capacity(self, quads):
+        return (quads + SLOT_GRANULARITY - 1) // SLOT_GRANULARITY * SLOT_GRANULARITY
+
+    def _remesh(self, chunk):
+        '''
+        Meshes one chunk again and writes it into its slot, or a new slot when it does not fit.
+        '''
+        chunks, vertices, colors, normals = self._meshRegion(*self._chunkBounds(chunk))
+        self._writeChunk(chunk, vertices, colors, normals)
+
+    def _writeChunk(self, chunk, vertices, colors, normals):
+        '''
+        Writes the quads of a chunk into its slot, first finds a slot for a new chunk or one that outgrew its slot.
+        '''
+        quads = len(vertices)
+        slot = self._slots.get(chunk)
+        if slot is None or quads > slot[1]:
+            if slot is not None:
+                self._release(*slot)
+            slot = self._allocate(quads)
+            self._slots[chunk] = slot
+        start, capacity = slot
+        self._quads[chunk] = quads
+        self._vertices[16 * start:16 * (start + quads)] = vertices.ravel()
+        self._colors[16 * start:16 * (start + quads)] = colors.ravel()
+        self._normals[12 * start:12 * (start + quads)] = normals.ravel()
+        # The quads of the chunk, the rest of the slot is degenerate
+        indices = np.empty((capacity, 6), dtype=np.uint32)
+        indices[:] = 4 * start
+        indices[:quads] = 4 * (start + np.arange(quads))[:, np.newaxis] + QUAD_TRIANGLES
+        self._triangleIndices[6 * start:6 * (start + capacity)] = indices.ravel()
+        self._written.append((start, capacity))
+        self.remeshedChunks += 1
+
+    def _allocate(self, quads):
+        '''
+        Finds room for a slot: the first free slot that is large enough, otherwise at the end of the mesh.
+        :return: (first quad, quads) of the slot
+        '''
+        capacity = int(self._capacity(quads))
+        for index, (start, free) in enumerate(self._free):
+            if free >= capacity:
+                if free > capacity:
+                    self._free[index] = (start + capacity, free - capacity)
+                else:
+                    del self._free[index]
+                return start, capacity
+        start = len(self._triangleIndices) / 6
+        self._vertices.extend(np.zeros(16 * capacity, dtype=np.float32))
+        self._colors.extend(np.zeros(16 * capacity, dtype=np.float32))
+        self._normals.extend(np.zeros(12 * capacity, dtype=np.float32))
+        self._triangleIndices.extend(np.zeros(6 * capacity, dtype=np.uint32))
+        return start, capacity
+
+    def _release(self, start, capacity):
+        '''
+        Makes the triangles of a slot degenerate and adds it to the free slots, merged with free neighbours.
+        '''
+        self._triangleIndices[6 * start:6 * (start + capacity)] = 4 * start
+        self._written.append((start, capacity))
+        free = sorted(self._free + [(start, capacity)])
+        self._free = [free[0]]
+        for start, capacity in free[1:]:
+            previousStart, previousCapacity = self._free[-1]
+            if previousStart + previousCapacity == start:
+                self._free[-1] = (previousStart, previousCapacity + capacity)
+            else:
+                self._free.append((start, capacity))
+
+
+class StreamingLevelSceneObject(LevelSceneObject):
+    '''
+    A level mesh that only holds the chunks around a position (the player), for maps that are too large to mesh
+    and keep as a whole. Nothing is meshed up front, stream() is called once per frame and requests the missing
+    chunks within radius of the position from the asset loader: the workers mesh them (meshRegion on a window of
+    the tiles around the chunk) and the render thread only writes the finished chunks into their slots, within
+    the time budget of the asset loader.
+    The mesh has a fixed size of budget quads. A chunk that does not fit evicts the least recently used chunks
+    (the ones that have been outside the radius the longest), so the memory on the CPU and the GPU stays the same
+    however large the map is. Only when the chunks within the radius themselves need more room the mesh grows.
+    '''
+
+    @property
+    def residentChunks(self):
+        '''
+        The meshed chunks, least recently used first
+        '''
+        return list(self._recent)
+
+    @property
+    def pendingChunks(self):
+        '''
+        Number of chunks that are being meshed by the workers
+        '''
+        return len(self._pending)
+
+    def __init__(self, blocked, colors, tileSize, chunkSize=CHUNK_SIZE, radius=STREAMING_RADIUS,
+                 budget=STREAMING_BUDGET, maxPending=STREAMING_PENDING):
+        '''
+        :param radius: Distance in chunks around the position of stream() within which the chunks are meshed
+        :param budget: Size of the mesh in quads
+        :param maxPending: Maximum number of chunks that are being meshed at the same time, new requests wait so
+                           the chunks closest to the latest position come first
+        '''
+        self.radius = radius
+        self.budget = budget
+        self.maxPending = maxPending
+        # Resident chunks in least recently used order, the chunks within the radius of the last stream(),
+        # and chunk -> version of the chunks that are being meshed
+        self._recent = collections.OrderedDict()
+        self._wanted = set()
+        self._pending = {}
+        # Chunk -> number of edits, a chunk meshed before an edit is outdated
+        self._versions = {}
+        # Statistics
+        self.streamedChunks = 0
+        self.evictedChunks = 0
+        self.discardedChunks = 0
+        super(StreamingLevelSceneObject, self).__init__(blocked, colors, tileSize, chunkSize)
+
+    def wantedChunks(self, position):
+        '''
+        The chunks within radius of a position, closest first.
+        :param position: (x, y, ...) in model space
+        '''
+        chunkLength = self.tileSize * self.chunkSize
+        px, py = position[0] / chunkLength, position[1] / chunkLength
+        chunksX = (self.width + self.chunkSize - 1) // self.chunkSize
+        cx = np.arange(max(int(px - self.radius), 0), min(int(px + self.radius) + 1, chunksX))
+        cy = np.arange(max(int(py - self.radius), 0), min(int(py + self.radius) + 1, self._chunksY))
+        cx, cy = [a.ravel() for a in np.meshgrid(cx, cy, indexing='ij')]
+        distances = (cx + 0.5 - px) ** 2 + (cy + 0.5 - py) ** 2
+        inside = distances <= self.radius ** 2
+        order = np.argsort(distances[inside], kind='mergesort')
+        return zip(cx[inside][order].tolist(), cy[inside][order].tolist())
+
+    def stream(self, position, assetLoader):
+        '''
+        Requests the missing chunks around a position, to be called once per frame by the render thread.
+        :param position: (x, y, ...) in model space, e.g. the player position
+        :param assetLoader: util.AssetLoader.AssetLoader that meshes the chunks
+        :return: Number of requested chunks
+        '''
+        wanted = self.wantedChunks(position)
+        self._wanted = set(wanted)
+        # Used in this frame, the closest chunk is the most recently used
+        for chunk in reversed(wanted):
+            if chunk in self._recent:
+                del self._recent[chunk]
+                self._recent[chunk] = True
+        requested = 0
+        for chunk in wanted:
+            if len(self._pending) >= self.maxPending:
+                break
+            if chunk in self._slots or chunk in self._pending:
+                continue
+            self._request(chunk, assetLoader)
+            requested += 1
+        return requested
+
+    def _request(self, chunk, assetLoader):
+        '''
+        Meshes a chunk in the worker pool, from a copy of the tiles of the chunk and the tiles around it.
+        '''
+        x0, y0, x1, y1 = self._chunkBounds(chunk)
+        windowX, windowY = max(x0 - 1, 0), max(y0 - 1, 0)
+        window = (slice(windowX, min(x1 + 1, self.width)), slice(windowY, min(y1 + 1, self.height)))
+        version = self._versions.get(chunk, 0)
+        self._pending[chunk] = version
+        assetLoader.load(meshRegion, (self.tileBlocked[window].copy(), self.tileColors[window].copy(),
+                                      x0 - windowX, y0 - windowY, x1 - windowX, y1 - windowY,
+                                      self.tileSize, self.chunkSize, (windowX, windowY)),
+                         onReady=functools.partial(self._chunkReady, chunk, version))
+
+    def _chunkReady(self, chunk, version, mesh):
+        '''
+        Writes a chunk meshed by a worker into the mesh, on the render thread. A chunk that is no longer within
+        the radius or that was edited since it was requested is dropped, stream() requests it again if needed.
+        '''
+        del self._pending[chunk]
+        if version != self._versions.get(chunk, 0) or chunk not in self._wanted:
+            self.discardedChunks += 1
+            return
+        chunksX, chunksY, vertices, colors, normals = mesh
+        self._writeChunk(chunk, vertices, colors, normals)
+        self.streamedChunks += 1
+
+    def _build(self):
+        '''
+        Reserves the mesh, all quads free and degenerate.
+        '''
+        size = self.chunkSize
+        self._chunksY = (self.height + size - 1) // size
+        for name in ('vertices', 'colors', 'normals', 'triangleIndices'):
+            getattr(self, name).clear()
+        self._vertices.extend(np.zeros(16 * self.budget, dtype=np.float32))
+        self._colors.extend(np.zeros(16 * self.budget, dtype=np.float32))
+        self._normals.extend(np.zeros(12 * self.budget, dtype=np.float32))
+        self._triangleIndices.extend(np.zeros(6 * self.budget, dtype=np.uint32))
+        self._slots = {}
+        self._quads = {}
+        self._free = [(0, self.budget)] if self.budget > 0 else []
+        self._written = []
+
+    def _calculateBounds(self):
+        '''
+        The bounds of the whole map, they do not change when chunks come and go.
+        '''
+        low = np.zeros(3, dtype=np.float32)
+        high = np.array((self.width, self.height, 1), dtype=np.float32) * self.tileSize
+        center = (low + high) / 2
+        return low, high, center, float(np.sqrt(((high - center) ** 2).sum()))
+
+    def _remesh(self, chunk):
+        '''
+        An edited chunk that is resident is meshed again right away, the others are meshed when they are streamed.
+        '''
+        self._versions[chunk] = self._versions.get(chunk, 0) + 1
+        if chunk in self._slots:
+            super(StreamingLevelSceneObject, self)._remesh(chunk)
+
+    def _writeChunk(self, chunk, vertices, colors, normals):
+        # Out of the least recently used order while it is written, so it does not evict itself
+        self._recent.pop(chunk, None)
+        super(StreamingLevelSceneObject, self)._writeChunk(chunk, vertices, colors, normals)
+        self._recent[chunk] = True
+
+    def _allocate(self, quads):
+        '''
+        Evicts the least recently used chunks outside the radius until there is a free slot that is large enough.
+        '''
+        capacity = self._capacity(quads)
+        while not any(free >= capacity for start, free in self._free):
+            victim = next((chunk for chunk in self._recent if chunk not in self._wanted), None)
+            if victim is None:
+                # Everything is within the radius, the mesh grows beyond the budget
+                break
+            self._evict(victim)
+        return super(StreamingLevelSceneObject, self)._allocate(quads)
+
+    def _evict(self, chunk):
+        del self._recent[chunk]
+        del self._quads[chunk]
+        self._release(*self._slots.pop(chunk))
+        self.evictedChunks += 1
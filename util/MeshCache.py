@@ -0,0 +1,286 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Persistent cache for the vertex arrays of OBJ files.
+
+Every entry is a single binary file: a small prefix, a JSON header and the raw arrays (64 byte aligned).
+Entries are memory mapped on load, the arrays are read straight from the page cache without copying.
+
+Invalidation rules, checked on every load:
+- The entry is ignored when the magic, format version, source path or load options do not match.
+- The entry is valid when the size and modification time of the source file match the header.
+- When only the modification time differs the content hash of the source decides,
+  a matching hash refreshes the modification time in the header.
+- Any other change rebuilds the entry.
+
+Usage:
+python -m util.MeshCache warm file.obj [...]
+python -m util.MeshCache list
+python -m util.MeshCache clear
+'''
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+import util.ObjLoader
+
+MAGIC = 'PYOGLMSH'
+# Increase whenever the file layout or the output of the OBJ loader changes
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<8sII')
+ALIGNMENT = 64
+ENTRY_EXTENSION = '.mesh'
+
+# Names of the cached arrays, in the order returned by util.ObjLoader.loadVertexArrays
+ARRAY_NAMES = ('vertices', 'normals', 'texCoords', 'triangleIndices')
+
+
+def defaultCacheDirectory():
+    '''
+    The cache directory can be set with the PYTHONOPENGL_CACHE environment variable.
+    '''
+    root = os.environ.get('PYTHONOPENGL_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'pythonOpenGl'))
+    return os.path.join(root, 'meshes')
+
+
+def fileHash(filename, blockSize=1 << 20):
+    '''
+    Returns the SHA1 hex digest of the content of a file.
+    '''
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        block = f.read(blockSize)
+        while block:
+            sha.update(block)
+            block = f.read(blockSize)
+    return sha.hexdigest()
+
+
+class MeshCache(object):
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def __init__(self, directory=None):
+        self._directory = directory or defaultCacheDirectory()
+        # Statistics of this cache instance
+        self.hits = 0
+        self.misses = 0
+
+    def entryPath(self, filename, swapyz=False, weld=True):
+        '''
+        Returns the path of the cache entry for an OBJ file and its load options.
+        '''
+        key = '%s|%d|%d' % (os.path.abspath(filename), swapyz, weld)
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + ENTRY_EXTENSION)
+
+    def loadOBJ(self, filename, swapyz=False, weld=True, workers=1):
+        '''
+        Returns the vertex arrays of an OBJ file, from the cache when possible.
+        A missing or stale entry is (re)built, parsing the file with the given number of processes.
+        :return: Tuple (vertices, normals, texCoords, triangleIndices)
+        '''
+        arrays = self.load(filename, swapyz, weld)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+        self.misses += 1
+        arrays = util.ObjLoader.loadVertexArrays(filename, swapyz, weld, workers)
+        try:
+            self.store(filename, swapyz, weld, arrays)
+        except (IOError, OSError):
+            # A read only or full disk should never prevent loading the mesh
+            pass
+        return arrays
+
+    def warmOBJ(self, filename, swapyz=False, weld=True, workers=1):
+        '''
+        Makes sure the cache has a valid entry for an OBJ file, parsing the file when needed.
+        Used by worker processes, so the process that uses the mesh memory maps the entry instead of
+        receiving a copy of the arrays.
+        :return: None when the entry is valid, otherwise the parsed arrays (the entry could not be written)
+        '''
+        if self.load(filename, swapyz, weld) is not None:
+            self.hits += 1
+            return None
+        self.misses += 1
+        arrays = util.ObjLoader.loadVertexArrays(filename, swapyz, weld, workers)
+        try:
+            self.store(filename, swapyz, weld, arrays)
+        except (IOError, OSError):
+            return arrays
+        return None
+
+    def load(self, filename, swapyz=False, weld=True):
+        '''
+        Memory maps the cache entry for an OBJ file.
+        :return: Tuple of read only arrays or None when there is no valid entry
+        '''
+        path = self.entryPath(filename, swapyz, weld)
+        header = self._readHeader(path)
+        if header is None:
+            return None
+        if header['source'] != os.path.abspath(filename) or header['swapyz'] != swapyz or header['weld'] != weld:
+            return None
+
+        stat = os.stat(filename)
+        if header['size'] != stat.st_size:
+            return None
+        if header['mtime'] != stat.st_mtime:
+            if header['sha1'] != fileHash(filename):
+                return None
+            # Same content, only touched: remember the new modification time
+            header['mtime'] = stat.st_mtime
+            self._writeHeader(path, header)
+
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+        arrays = []
+        for name in ARRAY_NAMES:
+            dtype, shape, offset = header['arrays'][name]
+            count = int(np.prod(shape))
+            array = np.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+            arrays.append(array.reshape(shape))
+        return tuple(arrays)
+
+    def store(self, filename, swapyz, weld, arrays):
+        '''
+        Writes the cache entry for an OBJ file.
+        The entry is written to a temporary file first so readers never see a partial entry.
+        '''
+        stat = os.stat(filename)
+        header = {'source': os.path.abspath(filename),
+                  'swapyz': swapyz,
+                  'weld': weld,
+                  'size': stat.st_size,
+                  'mtime': stat.st_mtime,
+                  'sha1': fileHash(filename),
+                  'arrays': {}}
+
+        headerText = json.dumps(header)
+        # Leave room in the header for the array table and later modification time updates
+        capacity = _align(PREFIX.size + len(headerText) + 256 * len(ARRAY_NAMES) + 256, ALIGNMENT)
+        offset = capacity
+        for name, array in zip(ARRAY_NAMES, arrays):
+            header['arrays'][name] = (array.dtype.str, array.shape, offset)
+            offset = _align(offset + array.nbytes, ALIGNMENT)
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        path = self.entryPath(filename, swapyz, weld)
+        handle, temporaryPath = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(self._packHeader(header, capacity))
+                for name, array in zip(ARRAY_NAMES, arrays):
+                    f.seek(header['arrays'][name][2])
+                    f.write(np.ascontiguousarray(array).tostring())
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temporaryPath, path)
+        except:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+
+    def entries(self):
+        '''
+        Returns the (path, header) of every entry in the cache directory.
+        '''
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(ENTRY_EXTENSION):
+                path = os.path.join(self.directory, name)
+                result.append((path, self._readHeader(path)))
+        return result
+
+    def clear(self):
+        '''
+        Removes all entries (and left over temporary files) from the cache directory.
+        :return: Number of removed entries
+        '''
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_EXTENSION) or name.endswith('.tmp'):
+                os.remove(os.path.join(self.directory, name))
+                removed += name.endswith(ENTRY_EXTENSION)
+        return removed
+
+    def _readHeader(self, path):
+        try:
+            with open(path, 'rb') as f:
+                magic, version, capacity = PREFIX.unpack(f.read(PREFIX.size))
+                if magic != MAGIC or version != FORMAT_VERSION:
+                    return None
+                header = json.loads(f.read(capacity - PREFIX.size))
+        except (IOError, OSError, struct.error, ValueError):
+            return None
+        header['capacity'] = capacity
+        return header
+
+    def _writeHeader(self, path, header):
+        capacity = header.pop('capacity')
+        try:
+            packed = self._packHeader(header, capacity)
+        except ValueError:
+            return
+        try:
+            with open(path, 'r+b') as f:
+                f.write(packed)
+        except (IOError, OSError):
+            pass
+
+    def _packHeader(self, header, capacity):
+        headerText = json.dumps(header)
+        if PREFIX.size + len(headerText) > capacity:
+            raise ValueError('Mesh cache header does not fit in %d bytes' % capacity)
+        return PREFIX.pack(MAGIC, FORMAT_VERSION, capacity) + headerText.ljust(capacity - PREFIX.size)
+
+
+def _align(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+_defaultCache = None
+
+
+def getDefaultCache():
+    '''
+    Returns the MeshCache instance in the default cache directory.
+    '''
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = MeshCache()
+    return _defaultCache
+
+
+if __name__ == '__main__':
+    cache = getDefaultCache()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'warm':
+        for filename in sys.argv[2:]:
+            arrays = cache.warmOBJ(filename)
+            print '%s: %s' % (filename, 'cached' if cache.hits else 'not stored' if arrays else 'parsed and stored')
+            cache.hits = cache.misses = 0
+    elif command == 'clear':
+        print 'Removed %d entries from %s' % (cache.clear(), cache.directory)
+    elif command == 'list':
+        for path, header in cache.entries():
+            if header is None:
+                print '%s: invalid entry' % path
+            else:
+                print '%s: %s (%d bytes)' % (path, header['source'], os.path.getsize(path))
+    else:
+        print 'Usage: python -m util.MeshCache [warm file.obj ... | list | clear]'
+        sys.exit(1)
@@ -0,0 +1,556 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Vectorized Wavefront OBJ parser.
+The file is read in bulk, the records are grouped by tag and every group is converted in one go
+into contiguous NumPy arrays. Only the rare corner cases (mixed face formats, relative indices)
+fall back to per line Python work.
+'''
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Sentinel used in the corner arrays for a missing texture coordinate or normal
+MISSING = -1
+
+# Files are parsed in chunks of this many bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+MINIMUM_CHUNK_SIZE = 64 * 1024
+# Peak memory of the parser per byte of OBJ text in a chunk (copies of the text, line tables and results)
+PARSE_MEMORY_FACTOR = 8
+# Smallest byte range worth a separate worker process
+MINIMUM_PARALLEL_RANGE = 1024 * 1024
+# Workers hand their arrays to the parent through memory mapped files in this (RAM backed) directory
+SHARED_MEMORY_DIRECTORY = '/dev/shm'
+
+
+class ObjMesh(object):
+    '''
+    Raw content of an OBJ file.
+    positions: (N, 3) float32 array of 'v' records
+    normals: (N, 3) float32 array of 'vn' records
+    texCoords: (N, 2) float32 array of 'vt' records
+    corners: (T * 3, 3) int32 array, one row (vertex, texcoord, normal) per triangle corner.
+             Indices are 0 based, a missing texcoord or normal is stored as MISSING.
+    '''
+
+    @property
+    def triangleCount(self):
+        return len(self.corners) // 3
+
+    def __init__(self, positions, normals, texCoords, corners):
+        self.positions = positions
+        self.normals = normals
+        self.texCoords = texCoords
+        self.corners = corners
+        # Global index of the first records, only different from 0 for a chunk of a file
+        self.positionStart = 0
+        self.texCoordStart = 0
+        self.normalStart = 0
+        # Mask of the corner indices that were relative in the file, None when there were none
+        self.relative = None
+
+
+def parseOBJ(filename, swapyz=False, chunkSize=DEFAULT_CHUNK_SIZE, workers=1):
+    '''
+    Parses an OBJ file into an ObjMesh.
+    Files larger than chunkSize are parsed chunk by chunk so the temporary memory of the parser
+    does not grow with the file size.
+    :param filename: Path to the OBJ file
+    :param swapyz: Swap the y and z components of positions and normals
+    :param chunkSize: Number of bytes parsed at once
+    :param workers: Number of processes, more than 1 parses byte ranges of the file in parallel
+    :return: ObjMesh
+    '''
+    if workers != 1:
+        return parseOBJParallel(filename, swapyz, workers, chunkSize)
+
+    if os.path.getsize(filename) <= chunkSize:
+        with open(filename, 'rb') as f:
+            data = f.read()
+        return parseBlock(data, swapyz)
+
+    chunks = list(iterOBJChunks(filename, swapyz, chunkSize))
+    return ObjMesh(np.concatenate([c.positions for c in chunks]),
+                   np.concatenate([c.normals for c in chunks]),
+                   np.concatenate([c.texCoords for c in chunks]),
+                   np.concatenate([c.corners for c in chunks]))
+
+
+def parseOBJParallel(filename, swapyz=False, workers=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    '''
+    Parses an OBJ file with a pool of worker processes.
+    The file is split in line aligned byte ranges, one per worker. Every worker parses its range and
+    writes the arrays to memory mapped files in shared memory. The parent collects the arrays and
+    converts the relative indices of every range to global indices.
+    :param filename: Path to the OBJ file
+    :param swapyz: Swap the y and z components of positions and normals
+    :param workers: Number of processes, None for one per CPU
+    :param chunkSize: Number of bytes parsed at once by a worker
+    :return: ObjMesh
+    '''
+    size = os.path.getsize(filename)
+    workers = workers or multiprocessing.cpu_count()
+    workers = max(1, min(workers, size // MINIMUM_PARALLEL_RANGE))
+    ranges = _splitRanges(filename, size, workers)
+
+    directory = SHARED_MEMORY_DIRECTORY if os.path.isdir(SHARED_MEMORY_DIRECTORY) else None
+    sharedDirectory = tempfile.mkdtemp(prefix='ObjLoader', dir=directory)
+    try:
+        tasks = [(filename, start, end, swapyz, chunkSize, os.path.join(sharedDirectory, str(i)))
+                 for i, (start, end) in enumerate(ranges)]
+        if len(tasks) == 1:
+            parts = [_parseRange(tasks[0])]
+        else:
+            pool = multiprocessing.Pool(len(tasks))
+            try:
+                parts = pool.map(_parseRange, tasks)
+            finally:
+                pool.terminate()
+                pool.join()
+        return _joinParts(parts)
+    finally:
+        shutil.rmtree(sharedDirectory, ignore_errors=True)
+
+
+def _splitRanges(filename, size, count):
+    '''
+    Splits a file in count byte ranges that start at the beginning of a line.
+    '''
+    boundaries = [0]
+    with open(filename, 'rb') as f:
+        for i in range(1, count):
+            f.seek(max(size * i // count - 1, boundaries[-1]))
+            position = f.tell()
+            while True:
+                window = f.read(64 * 1024)
+                if not window:
+                    position = size
+                    break
+                lineEnd = window.find('\n')
+                if lineEnd >= 0:
+                    position += lineEnd + 1
+                    break
+                position += len(window)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return zip(boundaries[:-1], boundaries[1:])
+
+
+def _parseRange(task):
+    '''
+    Worker: parses a byte range of an OBJ file and stores the resulting arrays as .npy files.
+    Relative indices are resolved against the start of the range.
+    :return: Dictionary with the path of every array
+    '''
+    filename, start, end, swapyz, chunkSize, path = task
+    base = np.zeros(3, dtype=np.int64)
+    chunks = [_startChunk(parseBlock(block, swapyz, base), base) for block in _readBlocks(filename, start, end, chunkSize)]
+
+    part = {}
+    for name in ('positions', 'normals', 'texCoords', 'corners', 'relative'):
+        arrays = [getattr(c, name) for c in chunks]
+        if name == 'relative':
+            if all(a is None for a in arrays):
+                continue
+            arrays = [np.zeros(c.corners.shape, dtype=bool) if a is None else a for a, c in zip(arrays, chunks)]
+        first = arrays[0] if arrays else np.zeros((0, 3))
+        shape = (sum(len(a) for a in arrays),) + first.shape[1:]
+        part[name] = '%s_%s.npy' % (path, name)
+        shared = np.lib.format.open_memmap(part[name], mode='w+', dtype=first.dtype, shape=shape)
+        offset = 0
+        for a in arrays:
+            shared[offset:offset + len(a)] = a
+            offset += len(a)
+        shared.flush()
+        del shared
+    return part
+
+
+def _joinParts(parts):
+    '''
+    Combines the arrays of the parsed ranges into one ObjMesh.
+    '''
+    arrays = [dict((name, np.load(path, mmap_mode='r')) for name, path in part.items()) for part in parts]
+    positions = np.concatenate([a['positions'] for a in arrays])
+    normals = np.concatenate([a['normals'] for a in arrays])
+    texCoords = np.concatenate([a['texCoords'] for a in arrays])
+    corners = np.concatenate([a['corners'] for a in arrays])
+
+    # Relative indices were resolved against the start of their range, add the records of the earlier ranges
+    offset = 0
+    base = np.zeros(3, dtype=np.int32)
+    for a in arrays:
+        count = len(a['corners'])
+        if 'relative' in a:
+            part = corners[offset:offset + count]
+            relative = np.asarray(a['relative'])
+            part += relative * base
+        offset += count
+        base += (len(a['positions']), len(a['texCoords']), len(a['normals']))
+    return ObjMesh(positions, normals, texCoords, corners)
+
+
+def iterOBJChunks(filename, swapyz=False, chunkSize=DEFAULT_CHUNK_SIZE, memoryLimit=None):
+    '''
+    Generator that parses an OBJ file in chunks of about chunkSize bytes, a chunk always ends at a line end.
+    Every chunk is an ObjMesh with the records of that part of the file, its corners use the global
+    (file wide) 0 based indices. The start attributes of a chunk hold the global index of its first records.
+    Consumers can build buffers or caches incrementally, only one chunk is in memory at a time.
+    :param filename: Path to the OBJ file
+    :param swapyz: Swap the y and z components of positions and normals
+    :param chunkSize: Number of bytes parsed at once
+    :param memoryLimit: Optional ceiling in bytes for the memory used by the parser, reduces the chunk size
+    :return: Generator of ObjMesh
+    '''
+    if memoryLimit is not None:
+        chunkSize = min(chunkSize, max(memoryLimit // PARSE_MEMORY_FACTOR, MINIMUM_CHUNK_SIZE))
+    base = np.zeros(3, dtype=np.int64)
+    for block in _readBlocks(filename, 0, os.path.getsize(filename), chunkSize):
+        yield _startChunk(parseBlock(block, swapyz, base), base)
+
+
+def _readBlocks(filename, start, end, chunkSize):
+    '''
+    Generator that reads the byte range [start, end) of a file in blocks of about chunkSize bytes.
+    Every block ends at a line end (or at the end of the range).
+    '''
+    remainder = ''
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            block = f.read(min(chunkSize, end - position))
+            if not block:
+                break
+            position += len(block)
+            lineEnd = block.rfind('\n') + 1
+            if lineEnd == 0:
+                # No line end in this block, keep reading until the line is complete
+                remainder += block
+                continue
+            yield remainder + block[:lineEnd]
+            remainder = block[lineEnd:]
+    if remainder:
+        yield remainder
+
+
+def _startChunk(chunk, base):
+    '''
+    Stores the global index of the first records in a chunk and advances the base record counts.
+    '''
+    chunk.positionStart, chunk.texCoordStart, chunk.normalStart = [int(b) for b in base]
+    base += (len(chunk.positions), len(chunk.texCoords), len(chunk.normals))
+    return chunk
+
+
+def parseBlock(data, swapyz=False, base=(0, 0, 0)):
+    '''
+    Parses a block of OBJ text into an ObjMesh.
+    :param data: String with complete OBJ lines
+    :param swapyz: Swap the y and z components of positions and normals
+    :param base: Number of (v, vt, vn) records in the file before this block, needed to resolve relative indices
+    :return: ObjMesh
+    '''
+    # Tabs separate the words of a line like spaces
+    if '\t' in data:
+        data = data.replace('\t', ' ')
+
+    # Writable copy of the text, padded so the tag of the last line can always be read
+    buf = np.zeros(len(data) + 3, dtype=np.uint8)
+    buf[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+    lineEnds = np.flatnonzero(buf[:len(data)] == ord('\n'))
+    lineStarts = np.concatenate(([0], lineEnds + 1))
+    lineEnds = np.concatenate((lineEnds, [len(data)]))
+
+    # The tag is the first word of a line, skip the blanks in front of it
+    tagStarts = lineStarts.copy()
+    indented = np.flatnonzero(buf[tagStarts] == ord(' '))
+    while len(indented) > 0:
+        tagStarts[indented] += 1
+        indented = indented[(buf[tagStarts[indented]] == ord(' ')) & (tagStarts[indented] < lineEnds[indented])]
+
+    # Group the records by tag
+    c0 = buf[tagStarts]
+    c1 = buf[tagStarts + 1]
+    c2 = buf[tagStarts + 2]
+    isV = (c0 == ord('v')) & (c1 == ord(' '))
+    isVn = (c0 == ord('v')) & (c1 == ord('n')) & (c2 == ord(' '))
+    isVt = (c0 == ord('v')) & (c1 == ord('t')) & (c2 == ord(' '))
+    isF = (c0 == ord('f')) & (c1 == ord(' '))
+
+    # Blank out the tags so every group can be converted as one whitespace separated sequence of numbers
+    buf[tagStarts[isV | isVn | isVt | isF]] = ord(' ')
+    buf[tagStarts[isVn | isVt] + 1] = ord(' ')
+
+    positions = _parseFloats(_groupText(buf, lineStarts, lineEnds, isV), isV.sum(), 3)
+    normals = _parseFloats(_groupText(buf, lineStarts, lineEnds, isVn), isVn.sum(), 3)
+    texCoords = _parseFloats(_groupText(buf, lineStarts, lineEnds, isVt), isVt.sum(), 2)
+    if swapyz:
+        positions = np.ascontiguousarray(positions[:, (0, 2, 1)])
+        normals = np.ascontiguousarray(normals[:, (0, 2, 1)])
+
+    faceCorners, faceSizes = _parseFaces(_groupText(buf, lineStarts, lineEnds, isF), isF.sum())
+
+    # Convert from 1 based to 0 based indices, relative (negative) indices need the record counts
+    # that precede every face so they are only calculated when needed.
+    if (faceCorners < 0).any():
+        counts = np.column_stack((np.cumsum(isV), np.cumsum(isVt), np.cumsum(isVn)))[isF] + base
+        bases = np.repeat(counts.astype(np.int32), faceSizes, axis=0)
+        relative = faceCorners < 0
+        faceCorners[relative] += bases[relative]
+        faceCorners[~relative] -= 1
+    else:
+        relative = None
+        faceCorners -= 1
+
+    mesh = ObjMesh(positions, normals, texCoords, _triangulate(faceCorners, faceSizes))
+    if relative is not None:
+        # Remember which corners were relative, only needed when the block is parsed without knowing its base
+        mesh.relative = _triangulate(relative, faceSizes)
+    return mesh
+
+
+def loadVertexArrays(filename, swapyz=False, weld=True, workers=1):
+    '''
+    Parses an OBJ file straight into the arrays that can be loaded in a vertex buffer.
+    :param filename: Path to the OBJ file
+    :param swapyz: Swap the y and z components of positions and normals
+    :param weld: Share the vertices of identical triangle corners
+    :param workers: Number of processes used to parse the file
+    :return: Tuple (vertices (K, 4), normals (K, 3), texCoords (K, 2), triangleIndices)
+    '''
+    mesh = parseOBJ(filename, swapyz, workers=workers)
+    if weld:
+        return weldVertices(mesh)
+    return buildVertexArrays(mesh)
+
+
+def buildVertexArrays(mesh):
+    '''
+    Expands an ObjMesh into flat per vertex arrays that can be loaded in a vertex buffer.
+    Every triangle corner becomes a separate vertex.
+    Corners without a normal get the normal of their triangle.
+    :param mesh: ObjMesh
+    :return: Tuple (vertices (K, 4), normals (K, 3), texCoords (K, 2), triangleIndices (K,))
+    '''
+    count = len(mesh.corners)
+
+    vertices = np.ones((count, 4), dtype=np.float32)
+    vertices[:, :3] = mesh.positions[mesh.corners[:, 0]]
+
+    normals = np.empty((count, 3), dtype=np.float32)
+    hasNormal = mesh.corners[:, 2] != MISSING
+    normals[hasNormal] = mesh.normals[mesh.corners[hasNormal, 2]]
+    if not hasNormal.all():
+        normals[~hasNormal] = np.repeat(faceNormals(vertices[:, :3]), 3, axis=0)[~hasNormal]
+
+    texCoords = np.zeros((count, 2), dtype=np.float32)
+    hasTexCoord = mesh.corners[:, 1] != MISSING
+    texCoords[hasTexCoord] = mesh.texCoords[mesh.corners[hasTexCoord, 1]]
+
+    triangleIndices = np.arange(count, dtype=np.uint32)
+    return vertices, normals, texCoords, triangleIndices
+
+
+def weldVertices(mesh):
+    '''
+    Builds indexed vertex arrays for an ObjMesh in which identical (position, normal, texcoord) corners
+    share one vertex.
+    Corners are first collapsed on their (vertex, texcoord, normal) record indices, the remaining
+    vertices are then collapsed on their values to catch duplicate records in the file.
+    Corners without a normal get the normal of their triangle.
+    :param mesh: ObjMesh
+    :return: Tuple (vertices (U, 4), normals (U, 3), texCoords (U, 2), triangleIndices (K,))
+    '''
+    keys = mesh.corners.copy()
+    missingNormal = keys[:, 2] == MISSING
+    if missingNormal.any():
+        # Every triangle has its own face normal
+        keys[missingNormal, 2] = len(mesh.normals) + np.flatnonzero(missingNormal) // 3
+    first, inverse = uniqueRows(keys)
+    keys = keys[first]
+
+    positions = mesh.positions[keys[:, 0]]
+
+    normals = np.empty((len(keys), 3), dtype=np.float32)
+    hasNormal = keys[:, 2] < len(mesh.normals)
+    normals[hasNormal] = mesh.normals[keys[hasNormal, 2]]
+    if not hasNormal.all():
+        triangles = keys[~hasNormal, 2] - len(mesh.normals)
+        corners = (triangles[:, None] * 3 + np.arange(3)).ravel()
+        normals[~hasNormal] = faceNormals(mesh.positions[mesh.corners[corners, 0]])
+
+    texCoords = np.zeros((len(keys), 2), dtype=np.float32)
+    hasTexCoord = keys[:, 1] != MISSING
+    texCoords[hasTexCoord] = mesh.texCoords[keys[hasTexCoord, 1]]
+
+    # Collapse the vertices with identical values, adding 0.0 turns -0.0 into 0.0
+    values = np.hstack((positions, normals, texCoords)) + np.float32(0.0)
+    valueFirst, valueInverse = uniqueRows(values)
+
+    vertices = np.ones((len(valueFirst), 4), dtype=np.float32)
+    vertices[:, :3] = positions[valueFirst]
+    triangleIndices = valueInverse[inverse].astype(np.uint32)
+    return vertices, normals[valueFirst], texCoords[valueFirst], triangleIndices
+
+
+def uniqueRows(rows):
+    '''
+    Finds the unique rows of a 2D array.
+    The unique rows keep the order of their first occurrence so vertices that are used together
+    stay close together in the vertex buffer.
+    :param rows: (N, M) array
+    :return: Tuple (index of the first occurrence of every unique row, index of the unique row for every row)
+    '''
+    rows = np.ascontiguousarray(rows)
+    if len(rows) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    unused, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    return first[order], rank[inverse]
+
+
+def faceNormals(trianglePositions):
+    '''
+    Calculates the unit normal of every counter clockwise triangle.
+    :param trianglePositions: (T * 3, 3) array, 3 consecutive rows per triangle
+    :return: (T, 3) float32 array
+    '''
+    p = trianglePositions.reshape(-1, 3, 3)
+    n = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    length = np.sqrt((n * n).sum(axis=1))
+    length[length == 0] = 1.0
+    return (n / length[:, None]).astype(np.float32)
+
+
+def _groupText(buf, lineStarts, lineEnds, mask):
+    '''
+    Returns the text of the selected lines. Consecutive selected lines are copied as one slice,
+    in a typical OBJ file all records of a group are consecutive.
+    '''
+    lines = np.flatnonzero(mask)
+    if len(lines) == 0:
+        return ''
+    breaks = np.flatnonzero(np.diff(lines) != 1)
+    firstLines = lines[np.concatenate(([0], breaks + 1))]
+    lastLines = lines[np.concatenate((breaks, [len(lines) - 1]))]
+    return '\n'.join(buf[lineStarts[first]:lineEnds[last]].tostring()
+                     for first, last in zip(firstLines, lastLines))
+
+
+def _parseFloats(text, count, components):
+    '''
+    Converts the text of a group of records into a (count, components) float32 array.
+    Extra components (e.g. the optional w of a vertex) are dropped, missing optional ones
+    (e.g. the v of a texture coordinate) are 0.
+    '''
+    if count == 0:
+        return np.zeros((0, components), dtype=np.float32)
+    values = np.fromstring(text, dtype=np.float32, sep=' ')
+    tokens = _tokenCounts(text, count)
+    if (tokens == tokens[0]).all() and values.size == count * tokens[0] and tokens[0] >= components:
+        # Every record has the same number of components
+        return np.ascontiguousarray(values.reshape(count, -1)[:, :components])
+    # Records of different lengths, convert line by line
+    return np.array([(l.split() + ['0'] * components)[:components] for l in text.split('\n')], dtype=np.float32)
+
+
+def _tokenCounts(text, count):
+    '''
+    Counts the whitespace separated tokens of every line of the text of a group of records.
+    :return: (count,) array
+    '''
+    chars = np.frombuffer(text, dtype=np.uint8)
+    blank = chars <= ord(' ')
+    # A token starts at a non blank character after a blank one
+    tokenStarts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1
+    if len(chars) > 0 and not blank[0]:
+        tokenStarts = np.concatenate(([0], tokenStarts))
+    lineEnds = np.concatenate((np.flatnonzero(chars == ord('\n')), [len(chars)]))
+    return np.diff(np.concatenate(([0], np.searchsorted(tokenStarts, lineEnds))))
+
+
+def _parseFaces(text, count):
+    '''
+    Converts the text of the face records into a (C, 3) int32 array of 1 based (vertex, texcoord, normal)
+    indices, 0 for a missing index, and the number of corners of every face.
+    '''
+    if count == 0:
+        return np.zeros((0, 3), dtype=np.int32), np.zeros(0, dtype=np.int32)
+
+    # The format of the first corner decides the format of the whole group: v, v/vt, v//vn or v/vt/vn
+    firstCorner = text.split(None, 1)[0]
+    components = firstCorner.count('/') + 1
+
+    if '//' in text:
+        values = np.fromstring(text.replace('//', '/0/').replace('/', ' '), dtype=np.int32, sep=' ')
+    else:
+        values = np.fromstring(text.replace('/', ' '), dtype=np.int32, sep=' ')
+
+    if values.size == count * 3 * components:
+        # Only triangles
+        faceSizes = np.empty(count, dtype=np.int32)
+        faceSizes.fill(3)
+    else:
+        lines = text.split('\n')
+        faceSizes = np.array([len(l.split()) for l in lines], dtype=np.int32)
+        if values.size != faceSizes.sum() * components:
+            # Mixed corner formats, convert corner by corner
+            return _parseFacesSlow(lines)
+
+    faceCorners = np.zeros((values.size // components, 3), dtype=np.int32)
+    faceCorners[:, :components] = values.reshape(-1, components)
+    return faceCorners, faceSizes
+
+
+def _parseFacesSlow(lines):
+    corners = []
+    faceSizes = []
+    for line in lines:
+        tokens = line.split()
+        faceSizes.append(len(tokens))
+        for token in tokens:
+            w = token.split('/')
+            corners.append((int(w[0]),
+                            int(w[1]) if len(w) >= 2 and w[1] else 0,
+                            int(w[2]) if len(w) >= 3 and w[2] else 0))
+    return np.array(corners, dtype=np.int32).reshape(-1, 3), np.array(faceSizes, dtype=np.int32)
+
+
+def _triangulate(faceCorners, faceSizes):
+    '''
+    Fan triangulates the faces, the corners of a face with n corners become n - 2 triangles.
+    '''
+    if len(faceSizes) == 0 or (faceSizes == 3).all():
+        return faceCorners
+    faceStarts = np.cumsum(faceSizes) - faceSizes
+    trianglesPerFace = faceSizes - 2
+    faceOfTriangle = np.repeat(np.arange(len(faceSizes)), trianglesPerFace)
+    firstTriangle = np.cumsum(trianglesPerFace) - trianglesPerFace
+    fanIndex = np.arange(len(faceOfTriangle)) - firstTriangle[faceOfTriangle] + 1
+    a = faceStarts[faceOfTriangle]
+    b = a + fanIndex
+    c = b + 1
+    return faceCorners[np.column_stack((a, b, c)).ravel()]
+
+
+if __name__ == '__main__':
+    # Report the effect of vertex welding for the given OBJ files
+    import sys
+    for filename in sys.argv[1:]:
+        mesh = parseOBJ(filename)
+        vertices, normals, texCoords, triangleIndices = weldVertices(mesh)
+        print '%s: %d triangles, %d corners -> %d vertices, compaction ratio %.2f' % (
+            filename, mesh.triangleCount, len(mesh.corners), len(vertices),
+            float(len(mesh.corners)) / max(len(vertices), 1))
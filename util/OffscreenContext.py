@@ -0,0 +1,182 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Offscreen OpenGl rendering without a display or GPU, e.g. on CI machines with Mesa llvmpipe.
+The context is created through EGL (surfaceless) or OSMesa, rendering goes to a framebuffer object.
+
+PyOpenGl chooses its platform when it is first imported, so call selectPlatform() before
+anything imports OpenGL.
+'''
+import ctypes
+import os
+import sys
+
+import numpy as np
+
+# Offscreen platforms, in order of preference
+PLATFORMS = ('egl', 'osmesa')
+
+
+def selectPlatform(platform='egl'):
+    '''
+    Makes PyOpenGl use an offscreen platform, this has to be called before OpenGL is imported.
+    :param platform: 'egl' (surfaceless, Mesa) or 'osmesa'
+    '''
+    if platform not in PLATFORMS:
+        raise ValueError('Unknown offscreen platform %r, use one of %s' % (platform, ', '.join(PLATFORMS)))
+    if 'OpenGL.platform' in sys.modules and os.environ.get('PYOPENGL_PLATFORM') != platform:
+        raise RuntimeError('OpenGL is already imported, select the offscreen platform before importing it')
+    os.environ['PYOPENGL_PLATFORM'] = platform
+    if platform == 'egl':
+        # Mesa: render without any window system
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+
+class OffscreenContext(object):
+    '''
+    An OpenGl 3.3 core profile context without a window.
+    The context has no default framebuffer (EGL) or a small unused one (OSMesa), render into a Framebuffer.
+    '''
+
+    def __init__(self, platform=None, compatibility=False):
+        '''
+        Constructor, creates the context and makes it current.
+        :param platform: 'egl' or 'osmesa', defaults to the platform chosen with selectPlatform
+        :param compatibility: Create a compatibility profile context, for fixed function calls
+                              (e.g. the immediate mode HUD of benchmarks/HudBenchmark.py)
+        '''
+        self.compatibility = compatibility
+        self.platform = platform or os.environ.get('PYOPENGL_PLATFORM')
+        if self.platform not in PLATFORMS:
+            raise RuntimeError('No offscreen platform selected, call util.OffscreenContext.selectPlatform() '
+                               'before importing OpenGL')
+        if self.platform == 'egl':
+            self._createEGL()
+        else:
+            self._createOSMesa()
+
+    def _createEGL(self):
+        from OpenGL import EGL
+        self._display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if not EGL.eglInitialize(self._display, None, None):
+            raise RuntimeError('Could not initialize the EGL display')
+        configAttributes = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                                            EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        configCount = EGL.EGLint()
+        EGL.eglChooseConfig(self._display, configAttributes, ctypes.pointer(config), 1, ctypes.pointer(configCount))
+        if configCount.value < 1:
+            raise RuntimeError('No EGL configuration for desktop OpenGl')
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        if self.compatibility:
+            profile = EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT
+        else:
+            profile = EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT
+        contextAttributes = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+                                             EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+                                             EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, profile,
+                                             EGL.EGL_NONE)
+        self._context = EGL.eglCreateContext(self._display, config, EGL.EGL_NO_CONTEXT, contextAttributes)
+        if not self._context:
+            raise RuntimeError('Could not create the EGL context')
+        if not EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, self._context):
+            raise RuntimeError('Could not make the EGL context current, surfaceless contexts need Mesa')
+
+    def _createOSMesa(self):
+        from OpenGL import GL, osmesa
+        profile = osmesa.OSMESA_COMPAT_PROFILE if self.compatibility else osmesa.OSMESA_CORE_PROFILE
+        contextAttributes = (ctypes.c_int * 11)(osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+                                                osmesa.OSMESA_DEPTH_BITS, 24,
+                                                osmesa.OSMESA_PROFILE, profile,
+                                                osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3,
+                                                osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3, 0)
+        self._context = osmesa.OSMesaCreateContextAttribs(contextAttributes, None)
+        if not self._context:
+            raise RuntimeError('Could not create the OSMesa context')
+        # OSMesa always needs a buffer to be current, rendering still goes to a Framebuffer
+        self._buffer = (GL.GLubyte * (4 * 4 * 4))()
+        if not osmesa.OSMesaMakeCurrent(self._context, self._buffer, GL.GL_UNSIGNED_BYTE, 4, 4):
+            raise RuntimeError('Could not make the OSMesa context current')
+
+    def destroy(self):
+        if self.platform == 'egl':
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self._display, self._context)
+            EGL.eglTerminate(self._display)
+        else:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._context)
+        self._context = None
+
+
+class Framebuffer(object):
+    '''
+    Framebuffer object with an RGBA color and a depth renderbuffer, the render target in headless mode.
+    '''
+
+    def __init__(self, width, height):
+        from OpenGL import GL
+        self._fbo = GL.glGenFramebuffers(1)
+        self._color = GL.glGenRenderbuffers(1)
+        self._depth = GL.glGenRenderbuffers(1)
+        self.width = 0
+        self.height = 0
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        '''
+        (Re)allocates the renderbuffers, the framebuffer is bound afterwards.
+        '''
+        from OpenGL import GL
+        self.width = width
+        self.height = height
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self._color)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, width, height)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self._depth)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_DEPTH_COMPONENT24, width, height)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, 0)
+        self.bind()
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_RENDERBUFFER, self._color)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_DEPTH_ATTACHMENT, GL.GL_RENDERBUFFER, self._depth)
+        status = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER)
+        if status != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError('Framebuffer incomplete: 0x%x' % status)
+
+    def bind(self):
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self._fbo)
+        GL.glDrawBuffer(GL.GL_COLOR_ATTACHMENT0)
+        GL.glReadBuffer(GL.GL_COLOR_ATTACHMENT0)
+
+    def readPixels(self):
+        '''
+        Reads the rendered image back from the GPU.
+        :return: uint8 array of shape (height, width, 4), the first row is the top of the image
+        '''
+        from OpenGL import GL
+        self.bind()
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        data = GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)
+        # OpenGl rows start at the bottom
+        return pixels[::-1]
+
+    def delete(self):
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, 0)
+        GL.glDeleteFramebuffers(1, [self._fbo])
+        GL.glDeleteRenderbuffers(2, [self._color, self._depth])
+
+
+def saveImage(filename, pixels):
+    '''
+    Saves pixels from Framebuffer.readPixels as an image file, the format follows from the extension (png, bmp, ...).
+    '''
+    import pygame
+    height, width = pixels.shape[:2]
+    surface = pygame.image.frombuffer(np.ascontiguousarray(pixels).tostring(), (width, height), 'RGBA')
+    pygame.image.save(surface, filename)
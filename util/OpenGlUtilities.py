@@ -1,5 +1,9 @@
 import numpy as np
 
+from util.GlBackend import GL
+
+import util.GlState as gl_state
+
 # For performance use the math functions, numpy also has these for multi dimensional arrays.
 # For single values the math variants are faster
 from math import sin, cos
@@ -113,6 +117,37 @@ def lookAtMatrix44(eye, center, up):
     return M1.dot(M2)
 
 
+# Handles of the buffers created with genBuffer that have not been deleted yet
+_liveBuffers = set()
+
+
+def genBuffer():
+    """
+    Creates a buffer object on the GPU, the handle is tracked until deleteBuffer is called.
+    :return: Buffer handle
+    """
+    bufferId = int(GL.glGenBuffers(1))
+    _liveBuffers.add(bufferId)
+    return bufferId
+
+
+def deleteBuffer(bufferId):
+    """
+    Deletes a buffer object created with genBuffer.
+    :param bufferId: Buffer handle
+    """
+    GL.glDeleteBuffers(1, [bufferId])
+    _liveBuffers.discard(bufferId)
+    gl_state.bufferDeleted(bufferId)
+
+
+def liveBufferCount():
+    """
+    Number of buffers created with genBuffer that are not deleted, this should not grow while rendering frames.
+    """
+    return len(_liveBuffers)
+
+
 if __name__ == '__main__':
     pass
     from util.vec3 import vec3
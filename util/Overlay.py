@@ -0,0 +1,300 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Retained mode 2D overlay for the HUD.
+Rectangles, bars and text are created once and kept in one vertex buffer, which is drawn with a single
+draw call. When the value of an element changes only its vertices are rewritten and uploaded.
+'''
+import numpy as np
+
+from util.GlBackend import GL, compileShader, compileProgram
+
+import util.GlState as gl_state
+import util.TextRenderer
+import util.VertexBuffer
+from util.GrowableArray import GrowableArray
+
+# Floats per vertex: anchor x, y (normalized device coordinates), offset x, y (pixels), u, v, r, g, b, a
+VERTEX_FLOATS = 10
+SIZE_OF_FLOAT = 4
+
+# Two triangles per quad
+VERTICES_PER_QUAD = 6
+
+# Smallest number of characters reserved for a text element
+MINIMUM_TEXT_CAPACITY = 8
+
+
+def normalizedColor(color):
+    '''
+    Converts an RGB or RGBA color with components 0-255 (like the pygame colors) to RGBA 0.0-1.0.
+    '''
+    if len(color) == 3:
+        color = tuple(color) + (255,)
+    return np.array(color, dtype=np.float32) / 255.0
+
+
+class Element(object):
+    '''
+    Part of the overlay, it owns a range of vertices in the overlay vertex buffer.
+    '''
+
+    def __init__(self, overlay, vertexCount):
+        self.overlay = overlay
+        self.start = overlay._allocate(vertexCount)
+        self.count = vertexCount
+
+    def remove(self):
+        '''
+        Hides the element, its vertices are collapsed to a point.
+        '''
+        self.overlay._write(self.start, np.zeros((self.count, VERTEX_FLOATS), dtype=np.float32))
+
+
+class Rectangle(Element):
+    '''
+    Solid colored rectangle.
+    '''
+
+    def __init__(self, overlay, position, size, color):
+        super(Rectangle, self).__init__(overlay, VERTICES_PER_QUAD)
+        self.position = tuple(position)
+        self.size = tuple(size)
+        self.color = normalizedColor(color)
+        self._update()
+
+    def setRectangle(self, position, size):
+        '''
+        :param position: (x, y) of the bottom left corner in normalized device coordinates
+        :param size: (width, height) in normalized device coordinates
+        '''
+        position = tuple(position)
+        size = tuple(size)
+        if position != self.position or size != self.size:
+            self.position = position
+            self.size = size
+            self._update()
+
+    def setColor(self, color):
+        color = normalizedColor(color)
+        if not np.array_equal(color, self.color):
+            self.color = color
+            self._update()
+
+    def _update(self):
+        x, y = self.position
+        width, height = self.size
+        vertices = np.zeros((VERTICES_PER_QUAD, VERTEX_FLOATS), dtype=np.float32)
+        vertices[:, 0] = x + util.TextRenderer.QUAD_CORNERS_X * width
+        vertices[:, 1] = y + util.TextRenderer.QUAD_CORNERS_Y * height
+        vertices[:, 4:6] = self.overlay.textureAtlas.whiteTexCoord
+        vertices[:, 6:10] = self.color
+        self.overlay._write(self.start, vertices)
+
+
+class Bar(object):
+    '''
+    Horizontal bar (e.g. health or experience): a background rectangle and a fill rectangle.
+    '''
+
+    def __init__(self, overlay, position, size, color, backgroundColor, current=0, maximum=1):
+        '''
+        :param position: (x, y) of the bottom left corner in normalized device coordinates
+        :param size: (width, height) of the full bar in normalized device coordinates
+        '''
+        self.position = tuple(position)
+        self.size = tuple(size)
+        self.fraction = None
+        self.background = Rectangle(overlay, position, size, backgroundColor)
+        self.fill = Rectangle(overlay, position, (0.0, size[1]), color)
+        self.setValue(current, maximum)
+
+    def setValue(self, current, maximum):
+        '''
+        Sets the filled part of the bar, only the fill rectangle is updated and only when the fraction changed.
+        '''
+        fraction = min(max(float(current) / maximum, 0.0), 1.0) if maximum > 0 else 0.0
+        if fraction != self.fraction:
+            self.fraction = fraction
+            self.fill.setRectangle(self.position, (self.size[0] * fraction, self.size[1]))
+
+    def remove(self):
+        self.background.remove()
+        self.fill.remove()
+
+
+class Text(Element):
+    '''
+    A string, its glyph quads are stored with room for capacity characters.
+    '''
+
+    def __init__(self, overlay, position, text, size, color, capacity=None):
+        '''
+        :param position: (x, y) of the bottom left corner in normalized device coordinates
+        :param size: Font size
+        :param color: RGB(A) color, components 0-255
+        :param capacity: Number of characters to reserve, text that gets longer is moved to new vertices
+        '''
+        capacity = max(capacity or len(text), MINIMUM_TEXT_CAPACITY)
+        super(Text, self).__init__(overlay, capacity * VERTICES_PER_QUAD)
+        self.position = tuple(position)
+        self.font = overlay.font(size)
+        self.color = normalizedColor(color)
+        self.text = None
+        self.setText(text)
+
+    def setText(self, text):
+        if text == self.text:
+            return
+        self.text = text
+        layout = self.font.layout(text)
+        if len(layout) > self.count:
+            # Does not fit anymore: hide the old vertices and continue at the end of the buffer
+            self.remove()
+            self.count = max(len(layout), 2 * self.count)
+            self.start = self.overlay._allocate(self.count)
+        vertices = np.zeros((self.count, VERTEX_FLOATS), dtype=np.float32)
+        vertices[:len(layout), 0:2] = self.position
+        vertices[:len(layout), 2:6] = layout
+        vertices[:len(layout), 6:10] = self.color
+        self.overlay._write(self.start, vertices)
+
+
+class Overlay(object):
+    '''
+    Retained 2D layer drawn on top of the 3D view.
+    All elements share one vertex buffer and one texture atlas (glyphs plus a white block for solid shapes),
+    so the whole overlay is drawn with a single draw call. Positions are in normalized device coordinates,
+    so nothing has to be rebuilt when the window is resized.
+    '''
+
+    @property
+    def vertexCount(self):
+        return len(self._vertices) / VERTEX_FLOATS
+
+    @property
+    def bytesUploaded(self):
+        return self._vertexBuffer.bytesUploaded
+
+    def __init__(self, fontName=None, shaderDirectory="shaders"):
+        '''
+        Constructor, compiles the overlay shaders, a current OpenGl context and pygame.font are required.
+        :param fontName: Font file, None for the pygame default font
+        :param shaderDirectory: Directory with OverlayVertexShader.glsl and OverlayFragmentShader.glsl
+        '''
+        self.fontName = fontName
+        self.textureAtlas = util.TextRenderer.TextureAtlas()
+        self._fonts = {}
+        # Vertex data of all elements, the change tracking of the array tells which part to upload
+        self._vertices = GrowableArray(np.float32)
+        # Statistics
+        self.drawCalls = 0
+
+        vertexShader = open(shaderDirectory + "/OverlayVertexShader.glsl").read()
+        fragmentShader = open(shaderDirectory + "/OverlayFragmentShader.glsl").read()
+        self._program = compileProgram(
+            compileShader(vertexShader, GL.GL_VERTEX_SHADER),
+            compileShader(fragmentShader, GL.GL_FRAGMENT_SHADER)
+        )
+        self._screenSizeUnif = GL.glGetUniformLocation(self._program, "screenSize")
+        self._atlasUnif = GL.glGetUniformLocation(self._program, "atlas")
+
+        self._vao = GL.glGenVertexArrays(1)
+        self._vertexBuffer = util.VertexBuffer.VertexBuffer(GL.GL_ARRAY_BUFFER, GL.GL_DYNAMIC_DRAW, orphan=False)
+        gl_state.bindVertexArray(self._vao)
+        self._vertexBuffer.bind()
+        stride = VERTEX_FLOATS * SIZE_OF_FLOAT
+        # Anchor, offset, texture coordinate and color inputs
+        for location, components, offset in ((0, 2, 0), (1, 2, 2), (2, 2, 4), (3, 4, 6)):
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribPointer(location, components, GL.GL_FLOAT, False, stride,
+                                     GL.GLvoidp(offset * SIZE_OF_FLOAT))
+
+    def font(self, size):
+        '''
+        Returns the glyphs for a font size, the font is loaded and rasterized on first use.
+        '''
+        font = self._fonts.get(size)
+        if font is None:
+            font = util.TextRenderer.GlyphAtlas(size, self.textureAtlas, self.fontName)
+            self._fonts[size] = font
+        return font
+
+    def addRectangle(self, position, size, color):
+        return Rectangle(self, position, size, color)
+
+    def addBar(self, position, size, color, backgroundColor, current=0, maximum=1):
+        return Bar(self, position, size, color, backgroundColor, current, maximum)
+
+    def addText(self, position, text, size, color=(255, 255, 255), capacity=None):
+        return Text(self, position, text, size, color, capacity)
+
+    def _allocate(self, vertexCount):
+        '''
+        Appends vertices for an element.
+        :return: Index of the first vertex
+        '''
+        start = self.vertexCount
+        self._vertices.extend(np.zeros(vertexCount * VERTEX_FLOATS, dtype=np.float32))
+        return start
+
+    def _write(self, start, vertices):
+        '''
+        Replaces vertices of an element, starting at vertex index start.
+        '''
+        vertices = np.asarray(vertices, dtype=np.float32).ravel()
+        first = start * VERTEX_FLOATS
+        self._vertices[first:first + len(vertices)] = vertices
+
+    def _upload(self):
+        '''
+        Uploads the vertices that changed since the previous draw.
+        '''
+        data = self._vertices
+        ranges = [r for r in (data.dirtyRange, data.appendedRange) if r is not None]
+        if len(ranges) == 0:
+            return
+        if self._vertexBuffer.reserve(data.nbytes):
+            # The buffer was reallocated, its content is lost
+            ranges = [(0, len(data))]
+        for start, end in ranges:
+            self._vertexBuffer.uploadRange(start * SIZE_OF_FLOAT, data.array[start:end])
+        data.markClean()
+
+    def draw(self, displaySize):
+        '''
+        Draws the overlay on top of the current frame.
+        :param displaySize: (width, height) of the viewport in pixels
+        '''
+        self._upload()
+        if self.vertexCount == 0:
+            return
+
+        gl_state.useProgram(self._program)
+        GL.glUniform2f(self._screenSizeUnif, float(displaySize[0]), float(displaySize[1]))
+        GL.glUniform1i(self._atlasUnif, 0)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.textureAtlas.texture)
+        gl_state.bindVertexArray(self._vao)
+        depthTest = GL.glIsEnabled(GL.GL_DEPTH_TEST)
+        GL.glDisable(GL.GL_DEPTH_TEST)
+        # Blend the anti aliased glyph edges instead of cutting them off
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, self.vertexCount)
+        self.drawCalls += 1
+
+        GL.glDisable(GL.GL_BLEND)
+        if depthTest:
+            GL.glEnable(GL.GL_DEPTH_TEST)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+
+    def delete(self):
+        self.textureAtlas.delete()
+        self._vertexBuffer.delete()
+        GL.glDeleteVertexArrays(1, [self._vao])
+        gl_state.vertexArrayDeleted(self._vao)
+        GL.glDeleteProgram(self._program)
@@ -0,0 +1,443 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Selecting scene objects with the mouse.
+A TriangleBvh is a bounding volume hierarchy over the triangles of one scene object in object space (all
+instances included). It is built top down with binned SAH splits, all nodes of a depth at once: the
+triangles of every node are sorted into bins along the longest axis of their centroids and each node is split
+between the bins where the surface area heuristic is lowest. A ray is traversed through the hierarchy the same
+way, one depth per step, and only the triangles of the leaves it hits are intersected, so a pick on a mesh with
+millions of triangles takes a few NumPy calls per depth instead of a Python loop over the triangles.
+The Picker keeps a hierarchy per object: it is refitted (only the node bounds are recalculated) when the
+vertices or instances of an object change and rebuilt when its triangles change. Moving an object changes its
+world matrix, not its hierarchy: the ray is transformed into object space. The objects themselves are tested
+against the ray with their world bounds in one batched pass (see util.Culling.worldBounds).
+'''
+import collections
+
+import numpy as np
+
+import util.Culling
+import util.SceneObject
+
+# Maximum number of triangles in a leaf
+LEAF_SIZE = 8
+# Number of bins per node and split
+BINS = 16
+
+# Triangles closer to parallel to the ray are not hit
+EPSILON = 1e-9
+
+# Result of a pick: the object, the triangle (index into obj.triangleIndices / 3) and the instance record that
+# were hit, the distance along the ray and the world position of the hit
+PickResult = collections.namedtuple('PickResult', 'obj triangle instance distance position')
+
+
+def unproject(viewProjection, position, displaySize):
+    '''
+    The ray through a window position, from the near to the far plane of the view frustum.
+    :param viewProjection: Combined camera and projection matrix, cameraMatrix.dot(perspectiveMatrix)
+    :param position: (x, y) in pixels, from the top left corner of the window like pygame mouse positions
+    :param displaySize: (width, height) of the window
+    :return: (origin, direction) of the ray in world space, the direction has unit length
+    '''
+    width, height = displaySize
+    x = 2.0 * (position[0] + 0.5) / width - 1
+    y = 1 - 2.0 * (position[1] + 0.5) / height
+    # Clip coordinates of the window position on the near and far plane, clip = v . viewProjection
+    points = np.array(((x, y, -1.0, 1.0), (x, y, 1.0, 1.0))).dot(np.linalg.inv(viewProjection))
+    near, far = points[:, :3] / points[:, 3:]
+    direction = far - near
+    return near, direction / np.sqrt(direction.dot(direction))
+
+
+def triangleCorners(obj):
+    '''
+    :return: (n, 3, 3) float32 array with the corners of the triangles of obj in object space, every instance
+             record repeats all triangles: triangle i of instance j is at j * len(triangleIndices) / 3 + i
+    '''
+    vertices = obj.vertices.array.reshape(-1, 4)[:, :3]
+    corners = vertices[obj.triangleIndices.array.reshape(-1, 3)]
+    if len(obj.instances) == 0:
+        return corners
+    records = obj.instances.array.reshape(-1, util.SceneObject.INSTANCE_COMPONENTS)
+    offsets = records[:, np.newaxis, np.newaxis, :3]
+    scales = records[:, np.newaxis, np.newaxis, 3:4]
+    return (corners * scales + offsets).reshape(-1, 3, 3)
+
+
+def _ranges(starts, counts):
+    '''
+    :return: Concatenation of the index ranges [start, start + count)
+    '''
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - ends + counts, counts)
+
+
+def _reduceRanges(function, rows, starts, counts):
+    '''
+    Reduces ranges of the columns of rows, e.g. the bounds of the triangles of nodes.
+    :param function: np.minimum or np.maximum
+    :param rows: (k, n) array
+    :return: (ranges, k) array, one result per range
+    '''
+    # reduceat reduces between consecutive indices, the ranges are every other reduction
+    indices = np.empty(2 * len(starts), dtype=np.intp)
+    indices[0::2] = starts
+    indices[1::2] = starts + counts
+    # The end of the last range can be the end of rows, reduceat needs an index inside the array
+    padded = np.concatenate((rows, rows[:, :1]), axis=1)
+    return function.reduceat(padded, indices, axis=1)[:, 0::2].T
+
+
+def _triangleBounds(triangles):
+    '''
+    :return: (3, n) rows with the low x, y and z and (3, n) rows with the high x, y and z of the triangles
+    '''
+    # Rows, reduceat is slow along a short axis
+    corners = triangles.transpose(2, 1, 0)
+    low = np.minimum(np.minimum(corners[:, 0], corners[:, 1]), corners[:, 2])
+    high = np.maximum(np.maximum(corners[:, 0], corners[:, 1]), corners[:, 2])
+    return low, high
+
+
+def _surfaceArea(low, high):
+    extent = np.maximum(high - low, 0)
+    return extent[..., 0] * extent[..., 1] + extent[..., 1] * extent[..., 2] + extent[..., 2] * extent[..., 0]
+
+
+def intersectTriangles(triangles, origin, direction):
+    '''
+    Moeller-Trumbore intersection of a ray with triangles, batched. Both sides of a triangle are hit.
+    :param triangles: (n, 3, 3) corners
+    :return: (n,) distances along the ray, infinite where the ray misses
+    '''
+    v0 = triangles[:, 0]
+    edge1 = triangles[:, 1] - v0
+    edge2 = triangles[:, 2] - v0
+    p = np.cross(direction, edge2)
+    determinant = np.einsum('ij,ij->i', edge1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / determinant
+        s = origin - v0
+        u = np.einsum('ij,ij->i', s, p) * inverse
+        q = np.cross(s, edge1)
+        v = q.dot(direction) * inverse
+        t = np.einsum('ij,ij->i', edge2, q) * inverse
+        hit = (np.abs(determinant) > EPSILON) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > EPSILON)
+    return np.where(hit, t, np.inf)
+
+
+def intersectBoxes(low, high, origin, direction):
+    '''
+    Slab test of a ray with axis aligned boxes, batched.
+    :return: (n,) distances along the ray where it enters the boxes (0 when the origin is inside), infinite
+             where the ray misses
+    '''
+    # Zero direction components would give 0 * inf, a tiny component keeps the slabs of that axis intact
+    direction = np.where(np.abs(direction) < 1e-30, 1e-30, direction)
+    inverse = 1.0 / direction
+    t1 = (low - origin) * inverse
+    t2 = (high - origin) * inverse
+    near = np.maximum(np.minimum(t1, t2).max(axis=1), 0)
+    far = np.maximum(t1, t2).min(axis=1)
+    return np.where(near <= far, near, np.inf)
+
+
+class TriangleBvh(object):
+    '''
+    Bounding volume hierarchy over triangles. The nodes are stored in flat arrays, breadth first: the nodes of a
+    depth are one range of node indices and the two children of a node are next to each other. Every node covers
+    a range of the triangles in leaf order (first, count).
+    '''
+
+    @property
+    def nodeCount(self):
+        return len(self.child)
+
+    @property
+    def triangleCount(self):
+        return len(self.order)
+
+    def __init__(self, triangles, leafSize=LEAF_SIZE, bins=BINS):
+        '''
+        :param triangles: (n, 3, 3) corners of the triangles
+        '''
+        self.leafSize = leafSize
+        self.bins = bins
+        self._build(np.asarray(triangles, dtype=np.float32))
+
+    def _build(self, triangles):
+        count = len(triangles)
+        # Bounds of every triangle, rows low x, y, z and high x, y, z, kept in the order of the nodes as it develops
+        low, high = _triangleBounds(triangles)
+        boxes = np.concatenate((low, high))
+        order = np.arange(count)
+
+        lowers, uppers, firsts, counts, children = [], [], [], [], []
+        # The (start, end) node indices of every depth
+        self.depths = []
+        levelFirst = np.zeros(min(count, 1), dtype=np.intp)
+        levelCount = np.full(min(count, 1), count, dtype=np.intp)
+        levelLow = low.T[:1].copy()
+        levelHigh = high.T[:1].copy()
+        if count > 0:
+            levelLow[0] = low.min(axis=1)
+            levelHigh[0] = high.max(axis=1)
+        nodes = 0
+        while True:
+            self.depths.append((nodes, nodes + len(levelFirst)))
+            lowers.append(levelLow)
+            uppers.append(levelHigh)
+            firsts.append(levelFirst)
+            counts.append(levelCount)
+            child = np.full(len(levelFirst), -1, dtype=np.intp)
+            children.append(child)
+
+            split = np.flatnonzero(levelCount > self.leafSize)
+            if len(split) == 0:
+                break
+            leftCount, levelLow, levelHigh = self._split(levelFirst[split], levelCount[split], boxes, order)
+            # The children of the split nodes are the next depth, in the same order
+            nextNodes = nodes + len(levelFirst)
+            child[split] = nextNodes + 2 * np.arange(len(split))
+            nextFirst = np.empty(2 * len(split), dtype=np.intp)
+            nextCount = np.empty(2 * len(split), dtype=np.intp)
+            nextFirst[0::2] = levelFirst[split]
+            nextCount[0::2] = leftCount
+            nextFirst[1::2] = levelFirst[split] + leftCount
+            nextCount[1::2] = levelCount[split] - leftCount
+            nodes = nextNodes
+            levelFirst, levelCount = nextFirst, nextCount
+
+        self.lower = np.concatenate(lowers)
+        self.upper = np.concatenate(uppers)
+        self.first = np.concatenate(firsts)
+        self.count = np.concatenate(counts)
+        self.child = np.concatenate(children)
+        # Triangle index per position in leaf order, the triangles are stored in leaf order
+        self.order = order
+        self.triangles = triangles[order]
+
+    def _split(self, first, count, boxes, order):
+        '''
+        Sorts the triangles of the nodes into bins and partitions every node at its best SAH split.
+        The triangles of the nodes are reordered in place (boxes and order).
+        :return: (number of triangles in the left child per node, low and high bounds of the children), the
+                 children are interleaved: left and right child of the first node, of the second node, ...
+        '''
+        bins = self.bins
+        nodeCount = len(first)
+        nodes = np.arange(nodeCount)
+        positions = _ranges(first, count)
+        active = boxes[:, positions]
+        # Start of every node in the active triangles
+        start = np.cumsum(count) - count
+        node = np.repeat(nodes, count)
+
+        # Bin along the longest axis of the centroid bounds of every node (the centroids are doubled)
+        centroids = active[:3] + active[3:]
+        centroidLow = np.minimum.reduceat(centroids, start, axis=1).T
+        centroidHigh = np.maximum.reduceat(centroids, start, axis=1).T
+        axis = (centroidHigh - centroidLow).argmax(axis=1)
+        axisLow = centroidLow[nodes, axis]
+        axisExtent = centroidHigh[nodes, axis] - axisLow
+        scale = np.where(axisExtent > 0, bins / np.maximum(axisExtent, 1e-30), 0)
+        values = centroids[axis[node], np.arange(len(node))]
+        binIndex = np.minimum(((values - axisLow[node]) * scale[node]).astype(np.intp), bins - 1)
+
+        # Sorting by node and bin keeps the nodes in place and orders their triangles by bin,
+        # every split between two bins is then a partition of the range of the node.
+        # The order within a bin does not matter, an unstable sort will do
+        key = node * bins + binIndex
+        sort = np.argsort(key)
+        key = key[sort]
+        active = active[:, sort]
+        boxes[:, positions] = active
+        order[positions] = order[positions[sort]]
+
+        # Bounds and number of triangles per bin
+        binCount = np.bincount(key, minlength=nodeCount * bins).reshape(nodeCount, bins)
+        groups = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        binLow = np.full((nodeCount * bins, 3), np.inf, dtype=np.float32)
+        binHigh = np.full((nodeCount * bins, 3), -np.inf, dtype=np.float32)
+        binLow[key[groups]] = np.minimum.reduceat(active[:3], groups, axis=1).T
+        binHigh[key[groups]] = np.maximum.reduceat(active[3:], groups, axis=1).T
+        binLow = binLow.reshape(nodeCount, bins, 3)
+        binHigh = binHigh.reshape(nodeCount, bins, 3)
+
+        # SAH cost of splitting after every bin: area times triangles on both sides
+        leftCount = np.cumsum(binCount, axis=1)
+        leftLow = np.minimum.accumulate(binLow, axis=1)
+        leftHigh = np.maximum.accumulate(binHigh, axis=1)
+        rightLow = np.minimum.accumulate(binLow[:, ::-1], axis=1)[:, ::-1]
+        rightHigh = np.maximum.accumulate(binHigh[:, ::-1], axis=1)[:, ::-1]
+        cost = (_surfaceArea(leftLow[:, :-1], leftHigh[:, :-1]) * leftCount[:, :-1] +
+                _surfaceArea(rightLow[:, 1:], rightHigh[:, 1:]) * (count[:, np.newaxis] - leftCount[:, :-1]))
+        best = cost.argmin(axis=1)
+        leftCount = leftCount[nodes, best]
+        childLow = np.empty((2 * nodeCount, 3), dtype=np.float32)
+        childHigh = np.empty((2 * nodeCount, 3), dtype=np.float32)
+        childLow[0::2] = leftLow[nodes, best]
+        childHigh[0::2] = leftHigh[nodes, best]
+        childLow[1::2] = rightLow[nodes, best + 1]
+        childHigh[1::2] = rightHigh[nodes, best + 1]
+
+        # All centroids in one bin (e.g. identical triangles), split the range in the middle
+        middle = np.flatnonzero((leftCount == 0) | (leftCount == count))
+        if len(middle) > 0:
+            leftCount[middle] = count[middle] / 2
+            children = np.repeat(2 * middle, 2) + np.tile((0, 1), len(middle))
+            childFirst = np.repeat(start[middle], 2)
+            childFirst[1::2] += leftCount[middle]
+            childCount = np.empty(2 * len(middle), dtype=np.intp)
+            childCount[0::2] = leftCount[middle]
+            childCount[1::2] = count[middle] - leftCount[middle]
+            childLow[children] = _reduceRanges(np.minimum, active[:3], childFirst, childCount)
+            childHigh[children] = _reduceRanges(np.maximum, active[3:], childFirst, childCount)
+        return leftCount, childLow, childHigh
+
+    def refit(self, triangles):
+        '''
+        Recalculates the node bounds for moved triangles, the tree is kept.
+        Cheaper than a rebuild, but the tree gets worse when the triangles move far.
+        :param triangles: (n, 3, 3) corners, the same triangles as the hierarchy was built for
+        '''
+        triangles = np.asarray(triangles, dtype=np.float32)
+        assert len(triangles) == len(self.order), "refit needs the same triangles, rebuild instead"
+        self.triangles = triangles[self.order]
+        low, high = _triangleBounds(self.triangles)
+        leaves = np.flatnonzero(self.child < 0)
+        self.lower[leaves] = _reduceRanges(np.minimum, low, self.first[leaves], self.count[leaves])
+        self.upper[leaves] = _reduceRanges(np.maximum, high, self.first[leaves], self.count[leaves])
+        # Bottom up, a depth at a time, the children are one depth deeper
+        for start, end in reversed(self.depths[:-1]):
+            nodes = start + np.flatnonzero(self.child[start:end] >= 0)
+            left = self.child[nodes]
+            self.lower[nodes] = np.minimum(self.lower[left], self.lower[left + 1])
+            self.upper[nodes] = np.maximum(self.upper[left], self.upper[left + 1])
+
+    def intersect(self, origin, direction, maxDistance=np.inf):
+        '''
+        The nearest triangle hit by a ray, the nodes of a depth are tested at once.
+        :param maxDistance: Hits further along the ray are ignored
+        :return: (distance, triangle index) or None
+        '''
+        best = maxDistance
+        bestTriangle = -1
+        frontier = np.zeros(min(len(self.child), 1), dtype=np.intp)
+        while len(frontier) > 0:
+            distances = intersectBoxes(self.lower[frontier], self.upper[frontier], origin, direction)
+            frontier = frontier[distances < best]
+            child = self.child[frontier]
+            leaves = frontier[child < 0]
+            if len(leaves) > 0:
+                positions = _ranges(self.first[leaves], self.count[leaves])
+                t = intersectTriangles(self.triangles[positions], origin, direction)
+                nearest = t.argmin()
+                if t[nearest] < best:
+                    best = t[nearest]
+                    bestTriangle = self.order[positions[nearest]]
+            inner = child[child >= 0]
+            frontier = np.concatenate((inner, inner + 1))
+        if bestTriangle < 0:
+            return None
+        return float(best), int(bestTriangle)
+
+
+class Picker(object):
+    '''
+    Finds the scene object and triangle hit by a ray, keeps a TriangleBvh per object.
+    '''
+
+    def __init__(self, leafSize=LEAF_SIZE):
+        self.leafSize = leafSize
+        # obj -> (triangles key, geometry key, TriangleBvh)
+        self._hierarchies = {}
+        # Statistics
+        self.builds = 0
+        self.refits = 0
+
+    def _keys(self, obj):
+        '''
+        :return: (triangles key, geometry key), the hierarchy is rebuilt when the first changes and refitted
+                 when the second changes
+        '''
+        return ((obj.triangleIndices.version, len(obj.triangleIndices), obj.instanceCount),
+                (obj.vertices.version, obj.instances.version))
+
+    def buildLater(self, obj, assetLoader):
+        '''
+        Builds the hierarchy of obj in the worker pool of an util.AssetLoader, for large meshes where building
+        it on the first pick would stall the frame. A pick before it is ready builds it on the render thread.
+        :return: Future of the TriangleBvh
+        '''
+        keys = self._keys(obj)
+
+        def onReady(bvh):
+            if obj not in self._hierarchies:
+                self._hierarchies[obj] = keys + (bvh,)
+
+        return assetLoader.load(TriangleBvh, (triangleCorners(obj), self.leafSize), onReady)
+
+    def hierarchy(self, obj):
+        '''
+        :return: The TriangleBvh of obj, rebuilt when its triangles changed and refitted when they moved
+        '''
+        triangles, geometry = self._keys(obj)
+        entry = self._hierarchies.get(obj)
+        if entry is None or entry[0] != triangles:
+            entry = (triangles, geometry, TriangleBvh(triangleCorners(obj), self.leafSize))
+            self.builds += 1
+        elif entry[1] != geometry:
+            entry[2].refit(triangleCorners(obj))
+            entry = (triangles, geometry, entry[2])
+            self.refits += 1
+        self._hierarchies[obj] = entry
+        return entry[2]
+
+    def pick(self, objects, matrices, origin, direction):
+        '''
+        The nearest triangle of the objects hit by a ray.
+        :param objects: SceneObjects
+        :param matrices: (n, 4, 4) world matrices of the objects
+        :param origin: Origin of the ray in world space
+        :param direction: Direction of the ray in world space
+        :return: PickResult or None
+        '''
+        # Hierarchies of objects that are gone are dropped
+        for obj in set(self._hierarchies) - set(objects):
+            del self._hierarchies[obj]
+        if len(objects) == 0:
+            return None
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        matrices = np.asarray(matrices, dtype=np.float64)
+
+        # The world boxes of all objects against the ray, nearest first
+        bounds = [obj.bounds for obj in objects]
+        low = np.array([b[0] for b in bounds], dtype=np.float64)
+        high = np.array([b[1] for b in bounds], dtype=np.float64)
+        boxCenters, boxExtents = util.Culling.worldBounds((low + high) / 2, (high - low) / 2,
+                                                          (low + high) / 2, np.zeros(len(objects)), matrices)[:2]
+        entries = intersectBoxes(boxCenters - boxExtents, boxCenters + boxExtents, origin, direction)
+
+        best = np.inf
+        result = None
+        for index in np.argsort(entries):
+            if entries[index] >= best:
+                break
+            obj = objects[index]
+            if len(obj.triangleIndices) == 0:
+                continue
+            # The ray in object space, the distances along it stay the same
+            inverse = np.linalg.inv(matrices[index])
+            hit = self.hierarchy(obj).intersect(np.append(origin, 1.0).dot(inverse)[:3],
+                                                np.append(direction, 0.0).dot(inverse)[:3], best)
+            if hit is not None:
+                best, triangle = hit
+                triangles = len(obj.triangleIndices) / 3
+                result = PickResult(obj, triangle % triangles, triangle / triangles, best, origin + best * direction)
+        return result
@@ -0,0 +1,208 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Transform hierarchy of the scene objects.
+Every SceneObject has a local matrix relative to its parent (SceneObject.addChild), the world matrix of an
+object is its local matrix times the world matrix of its parent. The SceneGraph keeps the matrices of all
+objects in flat NumPy arrays, one slot per object, in breadth first order: parents come before their children
+and all objects at the same depth are one contiguous range of slots. The world matrices of a whole depth are
+calculated with one batched matrix multiplication, so updating the hierarchy takes one NumPy call per depth
+instead of a Python call per object. That only pays off from about BATCH_NODES objects, a smaller hierarchy
+walks the subtrees of the moved objects object by object (see benchmarks/SceneGraphBenchmark.py).
+update() returns the slots whose world matrix changed, the application uploads only those into the model
+matrix uniform block (util.Uniforms.MatrixBlock): moving an object uploads 64 bytes, not its mesh.
+'''
+import numpy as np
+
+# Initial number of slots, the model matrices of all slots fill the minimal uniform block size of 16 kB
+# The vertex shader declares the same number by default (MAX_MODEL_MATRICES)
+MAX_NODES = 256
+# Hierarchies with fewer objects are updated object by object, the fixed cost of the NumPy calls of the batched
+# pass is larger than the matrix multiplications it saves
+BATCH_NODES = 48
+
+
+def changedRanges(changed):
+    '''
+    Groups slot numbers into ranges of consecutive slots.
+    :param changed: Sorted NumPy array of slot numbers
+    :return: List of (start, end) ranges
+    '''
+    if len(changed) == 0:
+        return []
+    if len(changed) < BATCH_NODES:
+        ranges = []
+        for slot in changed:
+            if len(ranges) > 0 and ranges[-1][1] == slot:
+                ranges[-1][1] = slot + 1
+            else:
+                ranges.append([slot, slot + 1])
+        return [(int(start), int(end)) for start, end in ranges]
+    breaks = np.flatnonzero(np.diff(changed) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(changed)]))
+    return [(int(changed[start]), int(changed[end - 1]) + 1) for start, end in zip(starts, ends)]
+
+
+class SceneGraph(object):
+    '''
+    The objects tell their scene graph (SceneObject.sceneGraph) when they move or their children change,
+    so a frame without changes costs nothing and a move only copies the moved local matrices before the
+    batched pass. An object can be in one scene graph at a time.
+    '''
+
+    @property
+    def worldMatrices(self):
+        '''
+        (slots, 4, 4) float32 array with the world matrices of the last update, indexed by slot()
+        '''
+        return self._world
+
+    @property
+    def nodes(self):
+        '''
+        Objects of the last update in slot order, with their ancestors and descendants
+        '''
+        return self._nodes
+
+    @property
+    def nodeCount(self):
+        return len(self._nodes)
+
+    def __init__(self, capacity=MAX_NODES):
+        '''
+        :param capacity: Number of slots the model matrix block is sized for, doubled when the hierarchy
+                         outgrows it (the application then reallocates the block, see GlApplication)
+        '''
+        self.capacity = capacity
+        # Objects of the last update, objects in slot order, slot per object
+        self._objects = []
+        self._nodes = []
+        self._slots = {}
+        # Slot of the parent per slot (-1 for roots) and the (start, end) slot range of every depth
+        self._parents = np.empty(0, dtype=np.intp)
+        self._depths = []
+        self._local = np.empty((0, 4, 4), dtype=np.float32)
+        self._world = np.empty((0, 4, 4), dtype=np.float32)
+        # Objects that moved since the last update, the hierarchy is rebuilt when it is invalid
+        self._moved = []
+        self._valid = False
+        # Statistics
+        self.updates = 0
+        self.skipped = 0
+
+    def slot(self, obj):
+        '''
+        :return: Slot of the world matrix of obj
+        '''
+        return self._slots[obj]
+
+    def worldMatrix(self, obj):
+        return self._world[self._slots[obj]]
+
+    def moved(self, obj):
+        '''
+        Called by an object of this graph when its local matrix changed.
+        '''
+        self._moved.append(obj)
+
+    def invalidate(self):
+        '''
+        Called by an object of this graph when its children changed, the slots are assigned again.
+        '''
+        self._valid = False
+
+    def update(self, objects):
+        '''
+        Recalculates the world matrices when an object moved or the hierarchy changed.
+        :param objects: SceneObjects, their ancestors and descendants are included
+        :return: List of (start, end) slot ranges of which the world matrix changed
+        '''
+        if not self._valid or objects != self._objects:
+            self._rebuild(objects)
+            changed = np.arange(len(self._nodes))
+        elif len(self._moved) > 0 and len(self._nodes) < BATCH_NODES:
+            return self._updateMoved()
+        elif len(self._moved) > 0:
+            moved = [self._slots[obj] for obj in self._moved]
+            self._local[moved] = [obj.localMatrix for obj in self._moved]
+            changed = None
+        else:
+            self.skipped += 1
+            return []
+        self._moved = []
+
+        # One batched multiplication per depth, the roots keep their local matrix and the parents of a depth
+        # were calculated by the previous depth
+        world = self._local.copy()
+        for start, end in self._depths[1:]:
+            world[start:end] = np.matmul(world[start:end], world[self._parents[start:end]])
+        if changed is None:
+            changed = np.flatnonzero((world != self._world).reshape(-1, 16).any(axis=1))
+        self._world = world
+        self.updates += 1
+        return changedRanges(changed)
+
+    def _updateMoved(self):
+        '''
+        Recalculates the world matrices of the moved objects and their descendants object by object.
+        :return: List of (start, end) slot ranges of which the world matrix was recalculated
+        '''
+        world = self._world.copy()
+        walked = set()
+        # Breadth first slots, an object moved along with a moved ancestor is walked with the ancestor
+        for slot, obj in sorted((self._slots[obj], obj) for obj in self._moved):
+            self._local[slot] = obj.localMatrix
+            if slot not in walked:
+                parentSlot = self._parents[slot]
+                self._walk(obj, None if parentSlot < 0 else world[parentSlot], world, walked)
+        self._moved = []
+        self._world = world
+        self.updates += 1
+        return changedRanges(sorted(walked))
+
+    def _walk(self, obj, parentMatrix, world, walked):
+        matrix = obj.localMatrix if parentMatrix is None else obj.localMatrix.dot(parentMatrix)
+        slot = self._slots[obj]
+        world[slot] = matrix
+        walked.add(slot)
+        for child in obj.children:
+            self._walk(child, matrix, world, walked)
+
+    def _rebuild(self, objects):
+        '''
+        Assigns the slots breadth first from the roots of objects.
+        The new slots are calculated before the old ones are released, so the graph stays intact when this fails.
+        '''
+        roots = []
+        for obj in objects:
+            while obj.parent is not None:
+                obj = obj.parent
+            if obj not in roots:
+                roots.append(obj)
+        nodes = []
+        depths = []
+        level = roots
+        while len(level) > 0:
+            depths.append((len(nodes), len(nodes) + len(level)))
+            nodes.extend(level)
+            level = [child for obj in level for child in obj.children]
+        capacity = self.capacity
+        while capacity < len(nodes):
+            capacity *= 2
+
+        for obj in self._nodes:
+            obj.sceneGraph = None
+        self.capacity = capacity
+        self._depths = depths
+        self._objects = list(objects)
+        self._nodes = nodes
+        self._slots = dict((obj, slot) for slot, obj in enumerate(nodes))
+        self._parents = np.array([-1 if obj.parent is None else self._slots[obj.parent] for obj in nodes],
+                                 dtype=np.intp)
+        self._local = np.array([obj.localMatrix for obj in nodes], dtype=np.float32).reshape(-1, 4, 4)
+        for obj in nodes:
+            obj.sceneGraph = self
+        self._valid = True
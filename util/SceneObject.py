@@ -1,13 +1,28 @@
 __author__ = 'pi'
 
 import random
+
+import numpy as np
+
+import util.MeshCache
+import util.ObjLoader
+from util.GrowableArray import GrowableArray
 from util.vec3 import vec3
 
+# Floats in an instance record: offset x, y, z, scale, color R, G, B, A
+INSTANCE_COMPONENTS = 8
+# Record of an object without instances, drawn once where it is
+DEFAULT_INSTANCE = np.array((0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0), dtype=np.float32)
+
 class SceneObject(object):
     '''
     SceneObject defines an object that can be rendered in OpenGl
     The number of vertexes = number of normals = number of colors
     The triangleIndices is a list of counter clock wise triangles defined by vertex/normal/color sequence number
+    The data is stored in contiguous float32/uint32 GrowableArrays which support the list operations
+    append, extend, len, iteration and indexing.
+    Repeated geometry is stored once and drawn instanced: every instance record (addInstance) draws the
+    geometry again with its own offset, scale and color, the vertex colors are multiplied by the instance color.
     '''
 
     @property
@@ -25,6 +40,33 @@ class SceneObject(object):
     @property
     def texCoords(self):
         return self._texCoords
+
+    @property
+    def instances(self):
+        return self._instances
+
+    @property
+    def instanceCount(self):
+        '''
+        Number of times the geometry is drawn, an object without instance records is drawn once
+        '''
+        return max(len(self._instances) / INSTANCE_COMPONENTS, 1)
+
+    def instanceData(self):
+        '''
+        :return: float32 array with the instance records, the default record when there are none
+        '''
+        if len(self._instances) == 0:
+            return DEFAULT_INSTANCE
+        return self._instances.array
+
+    def addInstance(self, offset, scale=1.0, color=(1.0, 1.0, 1.0, 1.0)):
+        '''
+        Appends an instance record, the geometry is drawn once more, moved by offset (x, y, z) and scaled.
+        The first record replaces the default instance.
+        '''
+        self._instances.extend((offset[0], offset[1], offset[2], scale, color[0], color[1], color[2], color[3]))
+
     @property
     def triangleIndices(self):
         return self._triangleIndices
@@ -33,12 +75,131 @@ class SceneObject(object):
     def vertexCount(self):
         return len(self._vertices) / 4
 
+    @property
+    def version(self):
+        '''
+        Increases whenever the vertex data of the object changes
+        '''
+        return (self._vertices.version + self._normals.version + self._colors.version +
+                self._texCoords.version + self._triangleIndices.version + self._instances.version)
+
+    def changedRanges(self, attribute):
+        '''
+        Element ranges of an attribute that changed since markClean(), so only these need to be uploaded again.
+        :param attribute: 'vertices', 'normals', 'colors', 'texCoords', 'triangleIndices' or 'instances'
+        :return: List of (start, end) ranges: the modified range and the appended range, when there are any
+        '''
+        data = getattr(self, attribute)
+        return [r for r in (data.dirtyRange, data.appendedRange) if r is not None]
+
+    def markClean(self):
+        '''
+        Forgets the changes of all attributes, called once the data is uploaded to the GPU.
+        '''
+        for data in (self._vertices, self._normals, self._colors, self._texCoords, self._triangleIndices,
+                     self._instances):
+            data.markClean()
+
+    @property
+    def bounds(self):
+        '''
+        Bounding volumes in object space including all instances, recalculated when the vertices or the
+        instances changed (see util.Culling).
+        :return: (low, high, center, radius): the corners of the axis aligned bounding box (x, y, z arrays),
+                 the center and radius of the bounding sphere
+        '''
+        version = (self._vertices.version, self._instances.version)
+        if version != self._boundsVersion:
+            self._bounds = self._calculateBounds()
+            self._boundsVersion = version
+        return self._bounds
+
+    def _calculateBounds(self):
+        vertices = self._vertices.array.reshape(-1, 4)[:, :3]
+        if len(vertices) == 0:
+            zero = np.zeros(3, dtype=np.float32)
+            return zero, zero, zero, 0.0
+        low = vertices.min(axis=0)
+        high = vertices.max(axis=0)
+        center = (low + high) / 2
+        radius = np.sqrt(((vertices - center) ** 2).sum(axis=1).max())
+        if len(self._instances) == 0:
+            return low, high, center, float(radius)
+
+        # Every instance moves and scales the geometry bounds, a negative scale swaps the box corners
+        records = self._instances.array.reshape(-1, INSTANCE_COMPONENTS)
+        offsets = records[:, :3]
+        scales = records[:, 3:4]
+        lows = offsets + np.minimum(scales * low, scales * high)
+        highs = offsets + np.maximum(scales * low, scales * high)
+        low = lows.min(axis=0)
+        high = highs.max(axis=0)
+        centers = offsets + scales * center
+        radii = np.abs(scales[:, 0]) * radius
+        center = (low + high) / 2
+        radius = (np.sqrt(((centers - center) ** 2).sum(axis=1)) + radii).max()
+        return low, high, center, float(radius)
+
+    @property
+    def localMatrix(self):
+        '''
+        Transform of the object relative to its parent (NumPy row vector convention), identity by default.
+        The world matrix is calculated by util.SceneGraph, moving an object does not change its vertex data.
+        '''
+        return self._localMatrix
+
+    @localMatrix.setter
+    def localMatrix(self, matrix):
+        self._localMatrix = np.asarray(matrix, dtype=np.float32).reshape(4, 4)
+        self.transformVersion += 1
+        if self.sceneGraph is not None:
+            self.sceneGraph.moved(self)
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @property
+    def children(self):
+        return self._children
+
+    def addChild(self, child):
+        '''
+        Attaches child below this object, the local matrix of the child becomes relative to this object.
+        '''
+        if child.parent is not None:
+            child.parent.removeChild(child)
+        child._parent = self
+        self._children.append(child)
+        self._hierarchyChanged()
+
+    def removeChild(self, child):
+        self._children.remove(child)
+        child._parent = None
+        self._hierarchyChanged()
+
+    def _hierarchyChanged(self):
+        if self.sceneGraph is not None:
+            self.sceneGraph.invalidate()
+
     def __init__(self):
-        self._vertices = []
-        self._normals = []
-        self._colors = []
-        self._texCoords = []
-        self._triangleIndices = []
+        self._vertices = GrowableArray(np.float32)
+        self._normals = GrowableArray(np.float32)
+        self._colors = GrowableArray(np.float32)
+        self._texCoords = GrowableArray(np.float32)
+        self._triangleIndices = GrowableArray(np.uint32)
+        self._instances = GrowableArray(np.float32)
+        # Bounding volumes and the versions of the vertices and instances they were calculated for
+        self._bounds = None
+        self._boundsVersion = None
+        # Transform hierarchy
+        self._localMatrix = np.identity(4, dtype=np.float32)
+        self._parent = None
+        self._children = []
+        # Increases whenever the local matrix changes
+        self.transformVersion = 0
+        # The util.SceneGraph that holds the world matrix, it is told about moves and hierarchy changes
+        self.sceneGraph = None
 
 class AxisSceneObject(SceneObject):
 
@@ -131,86 +292,49 @@ class AxisSceneObject(SceneObject):
 
 class OBJ(SceneObject):
 
-    def __init__(self, filename, swapyz=False):
+    @property
+    def compactionRatio(self):
+        """
+        Number of triangle corners per unique vertex, 1.0 when the vertices are not welded
+        """
+        return float(len(self._triangleIndices)) / max(self.vertexCount, 1)
+
+    def __init__(self, filename, swapyz=False, weld=True, useCache=True, workers=1, arrays=None):
+        """
+        :param arrays: Vertex arrays of the file parsed before (util.ObjLoader.loadVertexArrays), None to load them
+        """
         super(OBJ, self).__init__()
 
-        OBJvertices = []
-        OBJnormals = []
-        OBJtexCoords = []
-
-        self.faces = []
-        material = None
-
-        #Parse OBJ file
-        for line in open(filename, "r"):
-            if line.startswith('#'): continue
-            values = line.split()
-            if not values: continue
-            if values[0] == 'v':
-                v = map(float, values[1:4])
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                OBJvertices.append(v)
-            elif values[0] == 'vn':
-                v = map(float, values[1:4])
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                OBJnormals.append(v)
-            elif values[0] == 'vt':
-                OBJtexCoords.append(map(float, values[1:3]))
-            elif values[0] in ('usemtl', 'usemat'):
-                material = values[1]
-            elif values[0] == 'mtllib':
-                #Pieter
-                #self.mtl = MTL(values[1])
-                pass
-            elif values[0] == 'f':
-                face = []
-                texcoords = []
-                norms = []
-                for v in values[1:]:
-                    w = v.split('/')
-                    face.append(int(w[0]))
-                    if len(w) >= 2 and len(w[1]) > 0:
-                        texcoords.append(int(w[1]))
-                    else:
-                        texcoords.append(0)
-                    if len(w) >= 3 and len(w[2]) > 0:
-                        norms.append(int(w[2]))
-                    else:
-                        norms.append(0)
-                self.faces.append((face, norms, texcoords, material))
+        # Parse OBJ file, or load the result of an earlier parse from the mesh cache
+        # Welding shares the vertex, normal and color data of identical triangle corners
+        if arrays is None and useCache:
+            arrays = util.MeshCache.getDefaultCache().loadOBJ(filename, swapyz, weld, workers)
+        elif arrays is None:
+            arrays = util.ObjLoader.loadVertexArrays(filename, swapyz, weld, workers)
+        vertices, normals, texCoords, triangleIndices = arrays
 
         # Hard code color
         color = (0.3, 0.3, 0.3, 0.7)
+        colors = np.empty((len(vertices), 4), dtype=np.float32)
+        colors[:] = color
 
-        # Parse the faces of the OBJ object to come to one element index
         # The number of vertices = the number of colors = the number of normals
-        ind = 0
-        for f in self.faces:
-            # Every face should be a counter clockwise triangle
-            faceVerts, faceNorms, faceTexCoords, faceMaterial = f
-            for i in range (0,3):
-                self.vertices.extend(OBJvertices[faceVerts[i] - 1])
-                self.vertices.append(1.0) #add W coord
-                self.normals.extend(OBJnormals[faceNorms[i] - 1])
-                self.colors.extend(color)
-                # TODO: very unefficient currently all vertex, normals and color data is duplicated for each face.
-                self.triangleIndices.append(ind)
-                ind += 1
-            # print len(self.vertices)
-            # print len(self.normals)
-            # print len(self.colors)
-            # print len(self.triangleIndex)
+        # The arrays are used without copying, cached (read only) arrays are copied on the first write
+        self._vertices = GrowableArray(np.float32, vertices)
+        self._normals = GrowableArray(np.float32, normals)
+        self._colors = GrowableArray(np.float32, colors)
+        self._texCoords = GrowableArray(np.float32, texCoords)
+        self._triangleIndices = GrowableArray(np.uint32, triangleIndices)
 
     def __str__(self):
-        output = str(len(self._vertices)) + ' Vertices\n'
-        output += str(self._vertices) + '\n'
-        output += str(len(self._normals)) + ' Normals\n'
-        output += str(self._normals) + '\n'
-        output += str(len(self.faces)) + ' Faces (Triangles), expected to be counter clockwise\n'
-        output += '(face vertices, normal for every vertex, texcoords for every vertex, material for the face)\n'
-        output += str(self.faces) + '\n'
+        output = str(self.vertexCount) + ' Vertices\n'
+        output += str(self._vertices.array.reshape(-1, 4).tolist()) + '\n'
+        output += str(self.vertexCount) + ' Normals\n'
+        output += str(self._normals.array.reshape(-1, 3).tolist()) + '\n'
+        output += str(len(self._triangleIndices) / 3) + ' Faces (Triangles), expected to be counter clockwise\n'
+        output += '(vertex index for every corner)\n'
+        output += str(self._triangleIndices.array.reshape(-1, 3).tolist()) + '\n'
+        output += 'Compaction ratio %.2f\n' % self.compactionRatio
         return output
 
 class Cube(SceneObject):
@@ -249,7 +373,8 @@ class Cube(SceneObject):
         self._vertices.extend((-0.5, 0.5, 0.5, 1.0))
         self._vertices.extend((-0.5, 0.5, 0.5, 1.0))
         # Store the vertex color: 4 components per color: R, G, B, A
-        color = (1.0, 1.0, 0.0)
+        # White, the color of a cube is in its instance record
+        color = (1.0, 1.0, 1.0)
         self._colors.extend((color[0], color[1], color[2], 1.0))
         self._colors.extend((color[0], color[1], color[2], 1.0))
         self._colors.extend((color[0], color[1], color[2], 1.0))
@@ -313,19 +438,55 @@ class Cube(SceneObject):
         self._triangleIndices.extend((14 + elemOffset, 17 + elemOffset, 20 + elemOffset))
         self._triangleIndices.extend((14 + elemOffset, 20 + elemOffset, 23 + elemOffset))
 
+        # One yellow cube, more cubes share the geometry through addInstance
+        self.addInstance((0.0, 0.0, 0.0), 1.0, (1.0, 1.0, 0.0, 1.0))
+
 class PlantSceneObject(SceneObject):
+    '''
+    A plant grows by adding parts on top of the existing parts. All parts have the same geometry, it is stored
+    once and every part is an instance record with the root of the part as offset.
+    '''
+
     def __init__(self,partSize):
         super(PlantSceneObject, self).__init__()
         self.parts = []
         self.futureRoots = []
         self.partSize = partSize
+
+        offset = partSize / 3
+        height = partSize * 3
+
+        # Geometry of a part with its root at the origin
+        # Store the vertex coordinates: 4 components per vertex: x, y, z, w
+        self.vertices.extend((offset, 0.0, height, 1.0))
+        self.vertices.extend((offset, offset, height, 1.0))
+        self.vertices.extend((0.0, offset, height, 1.0))
+        self.vertices.extend((0.0, 0.0, 0.0, 1.0))
+
+        # Store the vertex color: 4 components per color: R, G, B, A
+        # White, the color of a part is in its instance record
+        for i in range(4):
+            self.colors.extend((1.0, 1.0, 1.0, 1.0))
+
+        # Store the vertex normals: 3 components per normal: x, y, z
+        self.normals.extend((-1.0, 1.0, -0.2))
+        self.normals.extend((1.0, 1.0, -0.2))
+        self.normals.extend((1.0, -1.0, -0.2))
+        self.normals.extend((0.0, 0.0, 1.0))
+
+        # Store the indices for the element drawing (triangles, clockwise from front)
+        self.triangleIndices.extend((1, 2, 0))
+        self.triangleIndices.extend((2, 3, 0))
+        self.triangleIndices.extend((0, 3, 1))
+        self.triangleIndices.extend((1, 3, 2))
+
         root = vec3(0.0, 0.0, 0.0)
         self.parts.append(PlantSceneObject.PlantPart(self, partSize, root))
 
     def grow(self):
         if len(self.futureRoots) > 0:
-            root = self.futureRoots[random.randrange(0, len(self.futureRoots))]
-            self.futureRoots.remove(root)
+            # pop by index, list.remove() compares every vec3 element which makes growing quadratic
+            root = self.futureRoots.pop(random.randrange(0, len(self.futureRoots)))
             self.parts.append(PlantSceneObject.PlantPart(self, self.partSize, root))
 
     class PlantPart():
@@ -337,32 +498,9 @@ class PlantSceneObject(SceneObject):
             offset = partSize / 3
             height = partSize * 3
 
-            elemOffset = parentPlant.vertexCount
-
-            # Store the vertex coordinates: 4 components per vertex: x, y, z, w
-            parentPlant.vertices.extend((root.x + offset, root.y, root.z + height, 1.0))
-            parentPlant.vertices.extend((root.x + offset, root.y + offset, root.z + height, 1.0))
-            parentPlant.vertices.extend((root.x, root.y + offset, root.z + height, 1.0))
-            parentPlant.vertices.extend((root.x, root.y, root.z, 1.0))
-
-            # Store the vertex color: 4 components per color: R, G, B, A
+            # One instance record of the plant geometry: root, scale and color
             color = (1.0, 0.5, 0.3)
-            parentPlant.colors.extend((color[0], color[1], color[2], 1.0))
-            parentPlant.colors.extend((color[0], color[1], color[2], 1.0))
-            parentPlant.colors.extend((color[0], color[1], color[2], 1.0))
-            parentPlant.colors.extend((color[0], color[1], color[2], 1.0))
-
-            # Store the vertex normals: 3 components per normal: x, y, z
-            parentPlant.normals.extend((-1.0, 1.0, -0.2))
-            parentPlant.normals.extend((1.0, 1.0, -0.2))
-            parentPlant.normals.extend((1.0, -1.0, -0.2))
-            parentPlant.normals.extend((0.0, 0.0, 1.0))
-
-            # Store the indices for the element drawing (triangles, clockwise from front)
-            parentPlant.triangleIndices.extend((1 + elemOffset, 2 + elemOffset, 0 + elemOffset))
-            parentPlant.triangleIndices.extend((2 + elemOffset, 3 + elemOffset, 0 + elemOffset))
-            parentPlant.triangleIndices.extend((0 + elemOffset, 3 + elemOffset, 1 + elemOffset))
-            parentPlant.triangleIndices.extend((1 + elemOffset, 3 + elemOffset, 2 + elemOffset))
+            parentPlant.addInstance((root.x, root.y, root.z), 1.0, (color[0], color[1], color[2], 1.0))
 
             # Store future roots for the parent plant
             parentPlant.futureRoots.append(vec3(root.x + offset, root.y, root.z + height))
@@ -0,0 +1,247 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Shader program variants and a persistent cache for the linked programs.
+
+A variant is a shader source with #define lines inserted after the #version line, so features can be
+switched with #ifdef instead of branching on a uniform in every vertex. The linked program of every variant
+is stored with glGetProgramBinary and loaded with glProgramBinary on the next start, which skips compiling
+and linking.
+
+Every entry is a single binary file: a small prefix (magic, format version, binary format) followed by the
+program binary. The file name is the SHA1 of the driver string (vendor, renderer, version) and both variant
+sources, so a changed source or driver never finds an old entry. The driver can still reject a binary
+(e.g. after an update with the same version string), the variant is compiled and stored again then.
+Without program binary support (or with the recording GL backend) the variants are compiled on every start.
+
+Usage:
+python -m util.ShaderCache list
+python -m util.ShaderCache clear
+'''
+import ctypes
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from util.GlBackend import GL, compileShader, compileProgram
+
+MAGIC = 'PYOGLSHD'
+# Increase whenever the file layout changes
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<8sII')
+ENTRY_EXTENSION = '.program'
+
+
+def defaultCacheDirectory():
+    '''
+    The cache directory can be set with the PYTHONOPENGL_CACHE environment variable.
+    '''
+    root = os.environ.get('PYTHONOPENGL_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'pythonOpenGl'))
+    return os.path.join(root, 'shaders')
+
+
+def variantSource(source, defines):
+    '''
+    Inserts a #define line per define after the #version line (which has to stay the first line).
+    :param defines: Dictionary name: value, a value of None defines the name without a value
+    '''
+    lines = ['#define %s' % name if defines[name] is None else '#define %s %s' % (name, defines[name])
+             for name in sorted(defines)]
+    if len(lines) == 0:
+        return source
+    first, newline, rest = source.partition('\n')
+    if not first.startswith('#version'):
+        return '\n'.join(lines) + '\n' + source
+    return first + '\n' + '\n'.join(lines) + '\n' + rest
+
+
+class ShaderCache(object):
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def binarySupported(self):
+        '''
+        True when the driver can return program binaries, queried once.
+        '''
+        if self._binarySupported is None:
+            self._binarySupported = bool(GL.glGetIntegerv(GL.GL_NUM_PROGRAM_BINARY_FORMATS))
+        return self._binarySupported
+
+    @property
+    def driver(self):
+        '''
+        Vendor, renderer and version of the OpenGl driver, part of the cache key.
+        '''
+        if self._driver is None:
+            self._driver = '|'.join(str(GL.glGetString(name)) for name in
+                                    (GL.GL_VENDOR, GL.GL_RENDERER, GL.GL_VERSION))
+        return self._driver
+
+    def __init__(self, directory=None):
+        '''
+        Constructor, a current OpenGl context is required to build programs.
+        '''
+        self._directory = directory or defaultCacheDirectory()
+        self._binarySupported = None
+        self._driver = None
+        # Statistics of this cache instance
+        self.hits = 0
+        self.misses = 0
+
+    def program(self, vertexShaderFile, fragmentShaderFile, defines=None):
+        '''
+        Returns the linked program of a shader variant, from the cache when possible.
+        :param defines: Dictionary name: value of the #defines of the variant, e.g. {"FOG": 1}
+        :return: Program ID
+        '''
+        defines = defines or {}
+        vertexSource = variantSource(open(vertexShaderFile).read(), defines)
+        fragmentSource = variantSource(open(fragmentShaderFile).read(), defines)
+        if not self.binarySupported:
+            self.misses += 1
+            return compileProgram(compileShader(vertexSource, GL.GL_VERTEX_SHADER),
+                                  compileShader(fragmentSource, GL.GL_FRAGMENT_SHADER))
+
+        path = self.entryPath(vertexSource, fragmentSource)
+        program = self.load(path)
+        if program is not None:
+            self.hits += 1
+            return program
+        self.misses += 1
+        program = self._link(vertexSource, fragmentSource)
+        try:
+            self.store(path, program)
+        except (IOError, OSError):
+            # A read only or full disk should never prevent rendering, the program is linked
+            pass
+        return program
+
+    def entryPath(self, vertexSource, fragmentSource):
+        '''
+        Returns the path of the cache entry for the sources of a variant on the current driver.
+        '''
+        sha = hashlib.sha1()
+        for text in (self.driver, vertexSource, fragmentSource):
+            sha.update(text)
+            sha.update('\0')
+        return os.path.join(self.directory, sha.hexdigest() + ENTRY_EXTENSION)
+
+    def load(self, path):
+        '''
+        Creates a program from a cache entry.
+        :return: Program ID, None when there is no valid entry or the driver rejects the binary
+        '''
+        try:
+            with open(path, 'rb') as f:
+                magic, version, binaryFormat = PREFIX.unpack(f.read(PREFIX.size))
+                binary = f.read()
+        except (IOError, OSError, struct.error):
+            return None
+        if magic != MAGIC or version != FORMAT_VERSION or len(binary) == 0:
+            return None
+
+        from OpenGL.error import GLError
+        program = GL.glCreateProgram()
+        try:
+            GL.glProgramBinary(program, binaryFormat, binary, len(binary))
+        except GLError:
+            # Unknown binary format
+            pass
+        if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+            GL.glDeleteProgram(program)
+            return None
+        return program
+
+    def store(self, path, program):
+        '''
+        Writes the binary of a linked program to a cache entry.
+        The entry is written to a temporary file first so readers never see a partial entry.
+        '''
+        length = GL.glGetProgramiv(program, GL.GL_PROGRAM_BINARY_LENGTH)
+        if length <= 0:
+            return
+        binary = np.empty(length, dtype=np.uint8)
+        written = GL.GLsizei()
+        binaryFormat = GL.GLenum()
+        GL.glGetProgramBinary(program, length, ctypes.byref(written), ctypes.byref(binaryFormat),
+                              binary.ctypes.data_as(ctypes.c_void_p))
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        handle, temporaryPath = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, binaryFormat.value))
+                f.write(binary[:written.value].tostring())
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temporaryPath, path)
+        except:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+
+    def _link(self, vertexSource, fragmentSource):
+        '''
+        Compiles and links a program, asking the driver to keep the binary retrievable.
+        '''
+        shaders = (compileShader(vertexSource, GL.GL_VERTEX_SHADER),
+                   compileShader(fragmentSource, GL.GL_FRAGMENT_SHADER))
+        program = GL.glCreateProgram()
+        for shader in shaders:
+            GL.glAttachShader(program, shader)
+        GL.glProgramParameteri(program, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
+        GL.glLinkProgram(program)
+        if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+            log = GL.glGetProgramInfoLog(program)
+            GL.glDeleteProgram(program)
+            raise RuntimeError('Link failure: %s' % log)
+        for shader in shaders:
+            GL.glDetachShader(program, shader)
+            GL.glDeleteShader(shader)
+        return program
+
+    def entries(self):
+        '''
+        Returns the (path, size in bytes) of every entry in the cache directory.
+        '''
+        if not os.path.isdir(self.directory):
+            return []
+        return [(os.path.join(self.directory, name), os.path.getsize(os.path.join(self.directory, name)))
+                for name in sorted(os.listdir(self.directory)) if name.endswith(ENTRY_EXTENSION)]
+
+    def clear(self):
+        '''
+        Removes all entries (and left over temporary files) from the cache directory.
+        :return: Number of removed entries
+        '''
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_EXTENSION) or name.endswith('.tmp'):
+                os.remove(os.path.join(self.directory, name))
+                removed += name.endswith(ENTRY_EXTENSION)
+        return removed
+
+
+if __name__ == '__main__':
+    # Listing and clearing the entries does not need an OpenGl context
+    cache = ShaderCache()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'clear':
+        print 'Removed %d entries from %s' % (cache.clear(), cache.directory)
+    elif command == 'list':
+        for path, size in cache.entries():
+            print '%s: %d bytes' % (path, size)
+    else:
+        print 'Usage: python -m util.ShaderCache list|clear'
@@ -0,0 +1,155 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Text rasterization into a texture atlas.
+Fonts are loaded once and their glyphs are rasterized into a shared texture atlas, strings are laid out
+as textured quads. The quads are drawn by the 2D overlay, see util.Overlay.
+'''
+import numpy as np
+import pygame
+
+from util.GlBackend import GL
+
+# Width and height in pixels of the atlas texture
+ATLAS_SIZE = 512
+
+# Size of the white block in the atlas used to draw solid shapes with the same texture
+WHITE_BLOCK_SIZE = 4
+
+# Glyphs that are rasterized when a font is loaded, other characters are added on first use
+PRELOADED_CHARACTERS = ''.join(chr(code) for code in range(32, 127))
+
+# Corners of the two triangles of a quad (counter clockwise), 1 is the right or top side
+QUAD_CORNERS_X = np.array((0, 1, 1, 0, 1, 0))
+QUAD_CORNERS_Y = np.array((0, 0, 1, 0, 1, 1))
+
+
+class TextureAtlas(object):
+    '''
+    RGBA texture in which images (glyphs) are packed in rows (shelves).
+    The bottom left corner holds a white block, so solid shapes can be drawn with the same texture.
+    '''
+
+    @property
+    def whiteTexCoord(self):
+        '''
+        (u, v) texture coordinate in the middle of the white block
+        '''
+        center = WHITE_BLOCK_SIZE / 2.0 / ATLAS_SIZE
+        return center, center
+
+    def __init__(self):
+        '''
+        Constructor, creates the texture, a current OpenGl context is required.
+        '''
+        # Packing position of the next image and the height of the current row
+        self._x = 0
+        self._y = 0
+        self._rowHeight = 0
+
+        self.texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, ATLAS_SIZE, ATLAS_SIZE, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        np.zeros((ATLAS_SIZE, ATLAS_SIZE, 4), dtype=np.uint8))
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        white = np.empty((WHITE_BLOCK_SIZE, WHITE_BLOCK_SIZE, 4), dtype=np.uint8)
+        white.fill(255)
+        self.add(WHITE_BLOCK_SIZE, WHITE_BLOCK_SIZE, white.tostring())
+
+    def add(self, width, height, data):
+        '''
+        Packs an image into the atlas.
+        :param data: RGBA bytes, rows bottom up
+        :return: Texture coordinates (u0, v0, u1, v1), None when the atlas is full
+        '''
+        if self._x + width > ATLAS_SIZE:
+            self._x = 0
+            self._y += self._rowHeight + 1
+            self._rowHeight = 0
+        if self._y + height > ATLAS_SIZE or width > ATLAS_SIZE:
+            return None
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, self._x, self._y, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, data)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        texCoords = (float(self._x) / ATLAS_SIZE, float(self._y) / ATLAS_SIZE,
+                     float(self._x + width) / ATLAS_SIZE, float(self._y + height) / ATLAS_SIZE)
+        # One pixel gap so neighbouring images do not bleed into each other
+        self._x += width + 1
+        self._rowHeight = max(self._rowHeight, height)
+        return texCoords
+
+    def delete(self):
+        GL.glDeleteTextures([self.texture])
+
+
+class GlyphAtlas(object):
+    '''
+    The glyphs of one font and size in a texture atlas.
+    Characters are single bytes (latin-1), unicode text is encoded and unknown characters become '?'.
+    '''
+
+    def __init__(self, size, textureAtlas, fontName=None):
+        '''
+        Constructor, loads the font and rasterizes the preloaded characters.
+        :param size: Font size as used by pygame.font.Font
+        :param textureAtlas: TextureAtlas the glyphs are packed in
+        :param fontName: Font file, None for the pygame default font
+        '''
+        self.font = pygame.font.Font(fontName, size)
+        self.height = self.font.get_height()
+        self.textureAtlas = textureAtlas
+        # Glyph metrics per character code: width in pixels and texture coordinates (u0, v0, u1, v1)
+        self.widths = np.zeros(256, dtype=np.float32)
+        self.texCoords = np.zeros((256, 4), dtype=np.float32)
+        self._known = np.zeros(256, dtype=bool)
+        for character in PRELOADED_CHARACTERS:
+            self.addGlyph(ord(character))
+
+    def addGlyph(self, code):
+        '''
+        Rasterizes a character into the texture atlas, when the atlas is full the character is shown as '?'.
+        :param code: Character code (0-255)
+        '''
+        self._known[code] = True
+        try:
+            surface = self.font.render(chr(code).decode('latin-1'), True, (255, 255, 255))
+        except pygame.error:
+            # Zero width characters (e.g. control characters) have no glyph
+            return
+        width, height = surface.get_size()
+        # Rows bottom up, like the texture coordinates
+        texCoords = self.textureAtlas.add(width, height, pygame.image.tostring(surface, 'RGBA', True))
+        if texCoords is None:
+            self.widths[code] = self.widths[ord('?')]
+            self.texCoords[code] = self.texCoords[ord('?')]
+        else:
+            self.widths[code] = width
+            self.texCoords[code] = texCoords
+
+    def layout(self, text):
+        '''
+        Builds the quads of a string, starting at the origin (bottom left).
+        :return: float32 array (characters * 6, 4) with x, y in pixels and u, v for every vertex
+        '''
+        if isinstance(text, unicode):
+            text = text.encode('latin-1', 'replace')
+        codes = np.fromstring(text, dtype=np.uint8)
+        for code in np.unique(codes[~self._known[codes]]):
+            self.addGlyph(code)
+
+        widths = self.widths[codes]
+        left = np.cumsum(widths) - widths
+        u0, v0, u1, v1 = self.texCoords[codes].T
+        vertices = np.empty((len(codes), 6, 4), dtype=np.float32)
+        vertices[:, :, 0] = left[:, None] + QUAD_CORNERS_X * widths[:, None]
+        vertices[:, :, 1] = QUAD_CORNERS_Y * self.height
+        vertices[:, :, 2] = np.where(QUAD_CORNERS_X, u1[:, None], u0[:, None])
+        vertices[:, :, 3] = np.where(QUAD_CORNERS_Y, v1[:, None], v0[:, None])
+        return vertices.reshape(-1, 4)
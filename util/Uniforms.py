@@ -0,0 +1,256 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Uniform management for the shader programs.
+UniformCache remembers the last value set for every uniform location of a program and skips the
+glUniform call when the value did not change. UniformBlock packs uniforms that are shared by all draws
+of a frame (camera, projection, lights) into one uniform buffer object with the std140 layout, the
+buffer is bound once and only uploaded when one of its values changed. MatrixBlock is a uniform
+buffer with an array of mat4 (the model matrices of the scene objects) that uploads single matrices.
+Both count the GL calls they make and the calls they save, see callsPerFrame().
+'''
+import numpy as np
+
+from util.GlBackend import GL
+
+import util.GlState as gl_state
+import util.VertexBuffer
+
+# Binding point of the per frame uniform block, shared by all programs that use the block
+FRAME_DATA_BINDING = 0
+# Binding point of the model matrices of the scene objects
+MODEL_DATA_BINDING = 1
+
+# Bytes in a mat4
+MATRIX_SIZE = 64
+
+# std140 layout per GLSL type: (base alignment in bytes, number of columns, floats per column)
+# Every column of a matrix is stored like a vec4, so a mat3 takes 3 * 16 bytes
+STD140_TYPES = {
+    'float': (4, 1, 1),
+    'int': (4, 1, 1),
+    'vec2': (8, 1, 2),
+    'vec3': (16, 1, 3),
+    'vec4': (16, 1, 4),
+    'mat3': (16, 3, 3),
+    'mat4': (16, 4, 4),
+}
+
+
+def callsPerFrame(managers, frames):
+    '''
+    Averages the statistics of uniform managers over a number of frames.
+    :param managers: UniformCache and UniformBlock objects
+    :return: (GL calls made, GL calls saved) per frame
+    '''
+    frames = float(max(frames, 1))
+    return sum(m.calls for m in managers) / frames, sum(m.saved for m in managers) / frames
+
+
+class UniformCache(object):
+    '''
+    The uniform values of one program as last uploaded.
+    Uniform values are state of the program object, so the cache stays valid while other programs are used.
+    Setting a value requires the program to be in use (gl_state.useProgram).
+    Matrices follow the NumPy row vector convention of og_util and are uploaded without transposing,
+    like glUniformMatrix4fv(location, 1, GL_FALSE, matrix).
+    '''
+
+    def __init__(self, program):
+        self.program = program
+        self._locations = {}
+        self._values = {}
+        # Statistics
+        self.calls = 0
+        self.saved = 0
+
+    def location(self, name):
+        '''
+        Returns the location of a uniform, glGetUniformLocation is only called the first time.
+        '''
+        location = self._locations.get(name)
+        if location is None:
+            location = GL.glGetUniformLocation(self.program, name)
+            self._locations[name] = location
+        return location
+
+    def _changed(self, location, value):
+        '''
+        Records value for location.
+        :return: True when the value differs from the last uploaded one and has to be uploaded
+        '''
+        if location < 0 or self._values.get(location) == value:
+            self.saved += 1
+            return False
+        self._values[location] = value
+        self.calls += 1
+        return True
+
+    def set1i(self, location, value):
+        value = int(value)
+        if self._changed(location, value):
+            GL.glUniform1i(location, value)
+
+    def set1f(self, location, value):
+        value = float(value)
+        if self._changed(location, value):
+            GL.glUniform1f(location, value)
+
+    def set3f(self, location, x, y, z):
+        if self._changed(location, (x, y, z)):
+            GL.glUniform3f(location, x, y, z)
+
+    def set4f(self, location, x, y, z, w):
+        if self._changed(location, (x, y, z, w)):
+            GL.glUniform4f(location, x, y, z, w)
+
+    def setMatrix3(self, location, matrix):
+        data = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self._changed(location, data.tostring()):
+            GL.glUniformMatrix3fv(location, 1, GL.GL_FALSE, data)
+
+    def setMatrix4(self, location, matrix):
+        data = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self._changed(location, data.tostring()):
+            GL.glUniformMatrix4fv(location, 1, GL.GL_FALSE, data)
+
+    def clear(self):
+        '''
+        Forgets the uploaded values, e.g. after the program was linked again.
+        '''
+        self._values.clear()
+
+
+class UniformBlock(object):
+    '''
+    A uniform block with the std140 layout in a uniform buffer object.
+    The values are kept in a CPU copy of the buffer, upload() sends the copy in one glBufferSubData call
+    when something changed. The buffer is bound to its binding point once, every program that declares
+    the block (attach) reads from it.
+    '''
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def __init__(self, fields, binding=FRAME_DATA_BINDING):
+        '''
+        Constructor, creates the buffer, a current OpenGl context is required.
+        :param fields: Sequence of (name, GLSL type) in the order of the block declaration in the shader
+        :param binding: Uniform buffer binding point
+        '''
+        self.binding = binding
+        # Float offset, number of columns and floats per column of every field
+        self._fields = {}
+        offset = 0
+        for name, glslType in fields:
+            alignment, columns, floats = STD140_TYPES[glslType]
+            offset = (offset + alignment - 1) // alignment * alignment
+            self._fields[name] = (offset // 4, columns, floats)
+            # Matrices are arrays of columns, the array stride is rounded up to a vec4
+            offset += columns * alignment if columns > 1 else floats * 4
+        # The size of a block is rounded up to the alignment of a vec4
+        self._data = np.zeros((offset + 15) // 16 * 4, dtype=np.float32)
+        self._dirty = True
+        # Statistics
+        self.calls = 0
+        self.saved = 0
+
+        self._buffer = util.VertexBuffer.VertexBuffer(GL.GL_UNIFORM_BUFFER, GL.GL_DYNAMIC_DRAW, orphan=False)
+        self._buffer.reserve(self.nbytes)
+        gl_state.bindBufferBase(GL.GL_UNIFORM_BUFFER, self.binding, self._buffer.id)
+
+    def attach(self, program, blockName):
+        '''
+        Lets program read the block blockName from this buffer.
+        '''
+        index = GL.glGetUniformBlockIndex(program, blockName)
+        GL.glUniformBlockBinding(program, index, self.binding)
+
+    def set(self, name, value):
+        '''
+        Sets a field, scalars, vectors and matrices (NumPy row vector convention, stored untransposed like
+        glUniformMatrix4fv with GL_FALSE). Every set replaces a glUniform call, the value only marks the
+        block for upload when it changed.
+        '''
+        start, columns, floats = self._fields[name]
+        value = np.asarray(value, dtype=np.float32).reshape(columns, floats)
+        if columns > 1:
+            # Columns are 4 floats apart
+            target = self._data[start:start + 4 * columns].reshape(columns, 4)[:, :floats]
+        else:
+            target = self._data[start:start + floats].reshape(1, floats)
+        if np.array_equal(target, value):
+            self.saved += 1
+            return
+        target[...] = value
+        if self._dirty:
+            # Uploaded in the same call as the other changed fields
+            self.saved += 1
+        self._dirty = True
+
+    def upload(self):
+        '''
+        Uploads the block when a field changed since the previous upload.
+        '''
+        if not self._dirty:
+            return
+        self._buffer.uploadRange(0, self._data)
+        self._dirty = False
+        self.calls += 1
+
+    def delete(self):
+        self._buffer.delete()
+
+
+class MatrixBlock(object):
+    '''
+    A uniform block with an array of mat4 in a uniform buffer object, e.g. the model matrices of the
+    scene objects (see util.SceneGraph). Only the changed ranges of the array are uploaded, so changing one
+    matrix uploads 64 bytes. Matrices follow the NumPy row vector convention and are stored untransposed.
+    '''
+
+    @property
+    def nbytes(self):
+        return self.capacity * MATRIX_SIZE
+
+    def __init__(self, capacity, binding=MODEL_DATA_BINDING):
+        '''
+        Constructor, creates the buffer, a current OpenGl context is required.
+        :param capacity: Length of the mat4 array in the block declaration
+        :param binding: Uniform buffer binding point
+        '''
+        self.capacity = capacity
+        self.binding = binding
+        # Statistics
+        self.calls = 0
+        self.saved = 0
+        self.bytesUploaded = 0
+
+        self._buffer = util.VertexBuffer.VertexBuffer(GL.GL_UNIFORM_BUFFER, GL.GL_DYNAMIC_DRAW, orphan=False)
+        self._buffer.reserve(self.nbytes)
+        gl_state.bindBufferBase(GL.GL_UNIFORM_BUFFER, self.binding, self._buffer.id)
+
+    def attach(self, program, blockName):
+        '''
+        Lets program read the block blockName from this buffer.
+        '''
+        index = GL.glGetUniformBlockIndex(program, blockName)
+        GL.glUniformBlockBinding(program, index, self.binding)
+
+    def upload(self, matrices, ranges):
+        '''
+        Uploads ranges of the matrix array, one glBufferSubData call per range.
+        :param matrices: (n, 4, 4) array with all matrices
+        :param ranges: List of (start, end) ranges of matrices to upload
+        '''
+        for start, end in ranges:
+            data = np.asarray(matrices[start:end], dtype=np.float32)
+            self._buffer.uploadRange(start * MATRIX_SIZE, data)
+            self.bytesUploaded += data.nbytes
+            self.calls += 1
+
+    def delete(self):
+        self._buffer.delete()
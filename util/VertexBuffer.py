@@ -0,0 +1,292 @@
+'''
+Created on Oct 18, 2026
+
+@author: pi
+
+Persistent GPU buffers for scene object data.
+The buffers are created once and reused, their content is updated in place instead of
+creating new buffers for every upload.
+'''
+import numpy as np
+
+from util.GlBackend import GL
+
+import util.OpenGlUtilities as og_util
+import util.GlState as gl_state
+import util.SceneObject
+
+# Smallest buffer size in bytes that is allocated
+MINIMUM_CAPACITY = 4096
+
+# Bytes in a float vertex component and in a uint32 element index
+FLOAT_SIZE = 4
+INDEX_SIZE = 4
+# Bytes in an instance record
+INSTANCE_SIZE = util.SceneObject.INSTANCE_COMPONENTS * FLOAT_SIZE
+
+
+class VertexBuffer(object):
+    '''
+    A GPU buffer object that is allocated once and grows geometrically.
+    The content is replaced with glBufferSubData, completely or in ranges. Complete replacements
+    optionally orphan the old storage first so the driver does not have to wait for frames that still use it.
+    '''
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def capacity(self):
+        '''
+        Allocated size in bytes
+        '''
+        return self._capacity
+
+    @property
+    def size(self):
+        '''
+        Size in bytes of the uploaded data
+        '''
+        return self._size
+
+    def __init__(self, target, usage=GL.GL_DYNAMIC_DRAW, orphan=True):
+        '''
+        Constructor, creates the buffer object, a current OpenGl context is required.
+        :param target: Buffer target, e.g. GL_ARRAY_BUFFER or GL_ELEMENT_ARRAY_BUFFER
+        :param usage: Usage hint, GL_DYNAMIC_DRAW for data that changes regularly
+        :param orphan: Orphan the buffer storage before replacing the content
+        '''
+        self.target = target
+        self.usage = usage
+        self.orphan = orphan
+        self._id = og_util.genBuffer()
+        self._capacity = 0
+        self._size = 0
+        # Statistics
+        self.allocations = 0
+        self.uploads = 0
+        self.bytesUploaded = 0
+
+    def bind(self):
+        gl_state.bindBuffer(self.target, self._id)
+
+    def reserve(self, nbytes):
+        '''
+        Makes sure the buffer can hold nbytes, the capacity grows geometrically so a slowly growing
+        object does not reallocate every upload. Reallocating discards the content of the buffer.
+        The buffer is bound to its target afterwards.
+        :return: True when the buffer was reallocated
+        '''
+        self.bind()
+        if nbytes <= self._capacity:
+            return False
+        capacity = max(self._capacity, MINIMUM_CAPACITY)
+        while capacity < nbytes:
+            capacity *= 2
+        GL.glBufferData(self.target, capacity, None, self.usage)
+        self._capacity = capacity
+        self.allocations += 1
+        return True
+
+    def orphanStorage(self):
+        '''
+        Gives the current storage back to the driver and continues in new storage of the same size,
+        so the driver does not have to wait for frames that still use the old content.
+        Only useful when the whole content is replaced.
+        '''
+        self.bind()
+        if self.orphan and self._capacity > 0:
+            GL.glBufferData(self.target, self._capacity, None, self.usage)
+
+    def upload(self, data):
+        '''
+        Replaces the content of the buffer, the buffer is bound to its target afterwards.
+        Element array buffers are bound to the current vertex array object.
+        :param data: NumPy array with the new content
+        '''
+        data = np.ascontiguousarray(data)
+        if not self.reserve(data.nbytes):
+            self.orphanStorage()
+        self.uploadRange(0, data)
+        self._size = data.nbytes
+
+    def uploadRange(self, offset, data):
+        '''
+        Replaces part of the content in place, the rest of the buffer is kept.
+        :param offset: Offset in bytes in the buffer, offset + data.nbytes should fit in the capacity
+        :param data: NumPy array with the new content for the range
+        '''
+        data = np.ascontiguousarray(data)
+        self.bind()
+        if data.nbytes > 0:
+            GL.glBufferSubData(self.target, offset, data.nbytes, data)
+            self.bytesUploaded += data.nbytes
+        self._size = max(self._size, offset + data.nbytes)
+        self.uploads += 1
+
+    def delete(self):
+        '''
+        Deletes the buffer object, the VertexBuffer can not be used afterwards.
+        '''
+        if self._id is not None:
+            og_util.deleteBuffer(self._id)
+            self._id = None
+
+
+class SceneBuffers(object):
+    '''
+    The GPU buffers holding the data of a list of scene objects: one buffer per vertex attribute
+    (coordinates, colors, normals), one element buffer and one buffer with the instance records
+    (SceneObject.instanceData). The objects are stored one after the other.
+    Only the changes are uploaded: the ranges the objects recorded as modified or appended, and the
+    data of objects that moved because an object before them was added, removed or resized.
+    A growing last object (like a growing plant) therefore only uploads its new data (a new instance record).
+    The buffers take care of the change tracking of the objects (SceneObject.markClean),
+    so an object should only be uploaded through one SceneBuffers.
+    '''
+
+    @property
+    def bytesUploaded(self):
+        '''
+        Total number of bytes uploaded to the GPU by this SceneBuffers
+        '''
+        return (sum(buf.bytesUploaded for name, components, buf in self._attributes) +
+                self.elementBuffer.bytesUploaded + self.instanceBuffer.bytesUploaded)
+
+    def __init__(self, usage=GL.GL_DYNAMIC_DRAW, incremental=True):
+        '''
+        Constructor, creates the buffer objects, a current OpenGl context is required.
+        :param usage: Usage hint for the buffers
+        :param incremental: Upload only the changes, otherwise all data is uploaded on every change
+        '''
+        self.vertexBuffer = VertexBuffer(GL.GL_ARRAY_BUFFER, usage)
+        self.colorBuffer = VertexBuffer(GL.GL_ARRAY_BUFFER, usage)
+        self.normalBuffer = VertexBuffer(GL.GL_ARRAY_BUFFER, usage)
+        self.elementBuffer = VertexBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, usage)
+        self.instanceBuffer = VertexBuffer(GL.GL_ARRAY_BUFFER, usage)
+        # (SceneObject attribute, components per vertex, buffer)
+        self._attributes = (('vertices', 4, self.vertexBuffer),
+                            ('colors', 4, self.colorBuffer),
+                            ('normals', 3, self.normalBuffer))
+        self.incremental = incremental
+        self.vertexCount = 0
+        self.elementCount = 0
+        self.instanceCount = 0
+        # Increases with every upload
+        self.version = 0
+        # (object, version, vertexStart, vertexCount, elementStart, elementCount, instanceStart, instanceCount)
+        # of every object in the last upload
+        self._layout = []
+        # Byte offset in the instance buffer the instance inputs of the vertex array object point at,
+        # kept by the code that draws the objects
+        self.instanceOffset = None
+        # Statistics
+        self.skipped = 0
+
+    def update(self, sceneObjects):
+        '''
+        Uploads the changes of the scene objects since the last update.
+        Bind the vertex array object before calling this, the element buffer is bound to it.
+        :param sceneObjects: List of SceneObjects
+        :return: False when nothing was uploaded because nothing changed
+        '''
+        layout = []
+        vertexStart = 0
+        elementStart = 0
+        instanceStart = 0
+        for obj in sceneObjects:
+            vertexCount = obj.vertexCount
+            elementCount = len(obj.triangleIndices)
+            instanceCount = obj.instanceCount
+            layout.append((obj, obj.version, vertexStart, vertexCount, elementStart, elementCount,
+                           instanceStart, instanceCount))
+            vertexStart += vertexCount
+            elementStart += elementCount
+            instanceStart += instanceCount
+        if layout == self._layout:
+            self.skipped += 1
+            return False
+
+        # Make room, a reallocated buffer lost its content so everything is uploaded again
+        reallocated = False
+        for name, components, buf in self._attributes:
+            reallocated |= buf.reserve(vertexStart * components * FLOAT_SIZE)
+        reallocated |= self.elementBuffer.reserve(elementStart * INDEX_SIZE)
+        reallocated |= self.instanceBuffer.reserve(instanceStart * INSTANCE_SIZE)
+
+        # Objects before the first moved (or added) object stay in place, they only upload their changes
+        first = 0
+        if self.incremental and not reallocated:
+            while (first < len(layout) and first < len(self._layout) and
+                   layout[first][0] is self._layout[first][0] and
+                   layout[first][2] == self._layout[first][2] and layout[first][4] == self._layout[first][4] and
+                   layout[first][6] == self._layout[first][6]):
+                first += 1
+        for index in range(first):
+            if layout[index][1] != self._layout[index][1]:
+                self._uploadChanges(layout[index])
+        self._uploadFrom(layout, first)
+
+        for obj in sceneObjects:
+            obj.markClean()
+        self._layout = layout
+        self.vertexCount = vertexStart
+        self.elementCount = elementStart
+        self.instanceCount = instanceStart
+        self.version += 1
+        return True
+
+    def drawRanges(self):
+        '''
+        The element and instance range of every object in the last upload, to draw the objects separately
+        (e.g. each with its own model matrix). The element indices already include the vertex offset.
+        :return: List of (object, first element, element count, first instance, instance count)
+        '''
+        return [(entry[0], entry[4], entry[5], entry[6], entry[7]) for entry in self._layout]
+
+    def _uploadChanges(self, entry):
+        '''
+        Uploads the ranges that an object in place recorded as modified or appended.
+        '''
+        obj, version, vertexStart, vertexCount, elementStart, elementCount, instanceStart, instanceCount = entry
+        for name, components, buf in self._attributes:
+            data = getattr(obj, name).array
+            for start, end in obj.changedRanges(name):
+                buf.uploadRange((vertexStart * components + start) * FLOAT_SIZE, data[start:end])
+        indices = obj.triangleIndices.array
+        for start, end in obj.changedRanges('triangleIndices'):
+            self.elementBuffer.uploadRange((elementStart + start) * INDEX_SIZE,
+                                           (indices[start:end] + vertexStart).astype(np.uint32))
+        instances = obj.instanceData()
+        for start, end in obj.changedRanges('instances'):
+            self.instanceBuffer.uploadRange(instanceStart * INSTANCE_SIZE + start * FLOAT_SIZE, instances[start:end])
+
+    def _uploadFrom(self, layout, first):
+        '''
+        Uploads all data of the objects from index first onwards.
+        '''
+        if first >= len(layout):
+            return
+        objects = [entry[0] for entry in layout[first:]]
+        vertexStart = layout[first][2]
+        elementStart = layout[first][4]
+        for name, components, buf in self._attributes:
+            if first == 0:
+                buf.orphanStorage()
+            data = np.concatenate([getattr(obj, name).array for obj in objects]).astype(np.float32, copy=False)
+            buf.uploadRange(vertexStart * components * FLOAT_SIZE, data)
+        if first == 0:
+            self.elementBuffer.orphanStorage()
+        elementData = np.concatenate([entry[0].triangleIndices.array + entry[2] for entry in layout[first:]])
+        self.elementBuffer.uploadRange(elementStart * INDEX_SIZE, elementData.astype(np.uint32, copy=False))
+        if first == 0:
+            self.instanceBuffer.orphanStorage()
+        instanceData = np.concatenate([obj.instanceData() for obj in objects])
+        self.instanceBuffer.uploadRange(layout[first][6] * INSTANCE_SIZE, instanceData)
+
+    def delete(self):
+        for name, components, buf in self._attributes:
+            buf.delete()
+        self.elementBuffer.delete()
+        self.instanceBuffer.delete()